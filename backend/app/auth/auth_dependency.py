@@ -5,6 +5,7 @@ from auth.jwt_handler import decode_access_token
 from sqlalchemy.orm import Session
 
 
+from app.config import settings
 from app.database import get_db
 from models.user_model import User
 
@@ -26,3 +27,13 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             detail="Không tìm thấy người dùng",
         )
     return user
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    admin_emails = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if current_user.email.lower() not in admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Chỉ admin mới có quyền truy cập",
+        )
+    return current_user
@@ -17,5 +17,18 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(..., env="ACCESS_TOKEN_EXPIRE_MINUTES")
     OPENAI_API_KEY: str = Field(..., env="OPENAI_API_KEY")
 
+    # Ngân sách DB cho mỗi request (0 = tắt); vượt quá sẽ log kèm câu SQL gây ra
+    DB_QUERY_BUDGET: int = Field(25, env="DB_QUERY_BUDGET")
+    DB_TIME_BUDGET_MS: float = Field(500.0, env="DB_TIME_BUDGET_MS")
+    # Header X-DB-* trên response: lộ thời gian/số dòng của DB cho mọi client, chỉ bật khi dev
+    DB_STATS_HEADERS: bool = Field(False, env="DB_STATS_HEADERS")
+
+    # Danh sách email admin, phân tách bằng dấu phẩy (dùng cho các endpoint /admin)
+    ADMIN_EMAILS: str = Field("", env="ADMIN_EMAILS")
+
+    # Kênh đẩy realtime (/events): "local" (một process) hoặc "redis" (nhiều worker, cần gói redis)
+    PUBSUB_BACKEND: str = Field("local", env="PUBSUB_BACKEND")
+    PUBSUB_REDIS_URL: str = Field("", env="PUBSUB_REDIS_URL")
+
 settings = Settings()
 print("✅ Loaded settings:", settings.model_dump())
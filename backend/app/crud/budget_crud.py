@@ -1,13 +1,12 @@
 # crud/budget_crud.py
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func, text
+from sqlalchemy import and_, or_, desc, asc, text
 from uuid import UUID
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from fastapi import HTTPException, status
 
-from models.transaction import Transaction
 from models.budget import Budget, BudgetCategory, BudgetAlert
 from schemas.budget_schema import (
     BudgetCreate, 
@@ -23,7 +22,10 @@ from schemas.budget_schema import (
     BudgetVsActualResponse,
     BudgetPerformanceMetrics
 )
-from crud.category_crud import get_category_display_name, get_user_category_id_by_display_name
+from crud.summary_crud import get_category_totals
+from services.trend_service import build_trend
+from services.forecast_service import BudgetPeriod, project_budgets
+from crud.category_crud import get_category_display_name, get_user_category_id_by_display_name, get_user_catalog
 
 def create_budget(
     db: Session, 
@@ -317,7 +319,8 @@ def get_budget_categories(
             'UserCategoryID': category.UserCategoryID,
             'category_display_name': get_category_display_name(
                 db=db,
-                user_category_id=category.UserCategoryID),
+                user_category_id=category.UserCategoryID,
+                user_id=user_id),
             'allocated_amount': category.AllocatedAmount,
             'spent_amount': category.SpentAmount,
             'CreatedAt': category.CreatedAt,
@@ -335,30 +338,9 @@ def get_actual_spending_by_category(
     date_from: date,
     date_to: date
 ) -> Dict[UUID, Decimal]:
-    """Get actual spending by user category within date range"""
-    # This assumes you have Transaction, UserCategory, Category tables
-    # Adjust table names according to your actual schema
-    query = text("""
-        SELECT 
-            uc.UserCategoryID,
-            COALESCE(SUM(t.Amount), 0) as total_spent
-        FROM UserCategories uc
-        LEFT JOIN Transactions t ON uc.UserCategoryID = t.UserCategoryID 
-            AND t.UserID = :user_id 
-            AND t.TransactionType = 'expense'
-            AND t.TransactionDate >= :date_from 
-            AND t.TransactionDate <= :date_to
-        WHERE uc.UserID = :user_id
-        GROUP BY uc.UserCategoryID
-    """)
-    
-    results = db.execute(query, {
-        'user_id': user_id,
-        'date_from': date_from,
-        'date_to': date_to
-    }).fetchall()
-    
-    return {UUID(row.UserCategoryID): Decimal(row.total_spent or 0) for row in results}
+    """Get actual spending by user category within date range (snapshot tháng đã chốt + tổng theo ngày)"""
+    totals = get_category_totals(db, user_id, date_from, date_to, transaction_type='expense')
+    return {user_category_id: amount for (user_category_id, _), amount in totals.items()}
 
 def update_budget_spent_amounts(
     db: Session,
@@ -373,26 +355,21 @@ def update_budget_spent_amounts(
         BudgetCategory.BudgetID == budget_id
     ).all()
 
+    # Tổng theo danh mục từ snapshot/tổng theo ngày thay cho một query mỗi danh mục
+    spent_by_category = get_category_totals(db, user_id, transaction_type='expense') if categories else {}
+
     for category in categories:
-        spent_total = (
-            db.query(func.coalesce(func.sum(Transaction.Amount), 0))
-            .filter(
-                Transaction.UserID == user_id,
-                Transaction.UserCategoryID == category.UserCategoryID,
-                Transaction.TransactionType == 'expense'
-            )
-            .scalar()
-        )
-        category.SpentAmount = spent_total
+        category.SpentAmount = spent_by_category.get((category.UserCategoryID, 'expense'), 0)
 
     db.commit()
 
 def get_budget_overview(
     db: Session,
     user_id: UUID,
-    budget_id: UUID
+    budget_id: UUID,
+    include_projection: bool = True
 ) -> Optional[BudgetOverviewResponse]:
-    """Get comprehensive budget overview with actual spending"""
+    """Get comprehensive budget overview with actual spending (dự báo cuối kỳ từ forecast_service)"""
     # Get budget details
     budget = get_budget_by_id(db, user_id, budget_id)
     if not budget:
@@ -449,13 +426,11 @@ def get_budget_overview(
     else:
         days_remaining = 0
     
-    period_days = (budget.period_end - budget.period_start).days
     days_elapsed = (min(today, budget.period_end) - budget.period_start).days + 1
     
     daily_average = total_spent / days_elapsed if days_elapsed > 0 else Decimal('0')
-    projected_total = daily_average * period_days if period_days > 0 else None
     
-    return BudgetOverviewResponse(
+    overview = BudgetOverviewResponse(
         budget_id=budget.BudgetID,
         budget_name=budget.budget_name,
         budget_type=budget.budget_type,
@@ -468,9 +443,66 @@ def get_budget_overview(
         categories=category_overviews,
         is_over_budget=is_over_budget,
         days_remaining=days_remaining,
-        daily_average_spent=daily_average,
-        projected_total=projected_total
+        daily_average_spent=daily_average
     )
+    if include_projection:
+        _apply_projections(db, user_id, [overview])
+    return overview
+
+def _apply_projections(
+    db: Session,
+    user_id: UUID,
+    overviews: List[BudgetOverviewResponse],
+    refit_forecast: bool = True
+) -> None:
+    """Điền projected_total/lower/upper cho các overview bằng một lần dự báo
+    (refit_forecast=False: bỏ trống khi chưa có mô hình dự báo trong cache)"""
+    projections = project_budgets(db, user_id, [
+        BudgetPeriod(
+            overview.budget_id,
+            overview.period_start,
+            overview.period_end,
+            [category.user_category_id for category in overview.categories],
+            overview.total_spent
+        )
+        for overview in overviews
+    ], refit=refit_forecast)
+    for overview in overviews:
+        projection = projections.get(overview.budget_id)
+        if projection is None:
+            continue
+        overview.projected_total = projection.projected_total
+        overview.projected_lower = projection.lower
+        overview.projected_upper = projection.upper
+
+def get_active_budgets_with_overview(db: Session, user_id: UUID) -> List[BudgetOverviewResponse]:
+    """Overview của các ngân sách đang hoạt động (IsActive, kỳ chứa hôm nay)"""
+    today = date.today()
+    budget_ids = [
+        row.BudgetID
+        for row in db.query(Budget.BudgetID)
+        .filter(
+            Budget.UserID == user_id,
+            Budget.IsActive == True,
+            Budget.PeriodStart <= today,
+            Budget.PeriodEnd >= today
+        )
+        .order_by(Budget.PeriodEnd)
+        .all()
+    ]
+    return get_budget_overviews(db, user_id, budget_ids)
+
+def get_budget_overviews(
+    db: Session,
+    user_id: UUID,
+    budget_ids: List[UUID],
+    refit_forecast: bool = True
+) -> List[BudgetOverviewResponse]:
+    """Overview của nhiều ngân sách, dự báo cuối kỳ tính chung một lần"""
+    overviews = (get_budget_overview(db, user_id, budget_id, include_projection=False) for budget_id in budget_ids)
+    overviews = [overview for overview in overviews if overview is not None]
+    _apply_projections(db, user_id, overviews, refit_forecast)
+    return overviews
 
 def get_budget_vs_actual(
     db: Session,
@@ -516,18 +548,8 @@ def get_budget_vs_actual(
     )
 
 def get_category_display_names(db: Session, user_id: UUID) -> Dict[UUID, str]:
-    """Get category display names using coalesce logic"""
-    query = text("""
-        SELECT 
-            uc.UserCategoryID,
-            COALESCE(uc.CustomName, c.CategoryName) as category_display_name
-        FROM UserCategories uc
-        LEFT JOIN Categories c ON uc.CategoryID = c.CategoryID
-        WHERE uc.UserID = :user_id
-    """)
-    
-    results = db.execute(query, {'user_id': user_id}).fetchall()
-    return {UUID(row.UserCategoryID): row.category_display_name for row in results}
+    """Get category display names using coalesce logic (từ catalogue đã cache, chỉ đọc)"""
+    return get_user_catalog(db, user_id).names
 
 def get_spending_trend(
     db: Session,
@@ -535,32 +557,11 @@ def get_spending_trend(
     date_from: date,
     date_to: date
 ) -> List[Dict[str, Any]]:
-    """Get daily spending trend"""
-    query = text("""
-        SELECT 
-            t.TransactionDate as date,
-            SUM(t.Amount) as daily_spending
-        FROM Transactions t
-        WHERE t.UserID = :user_id 
-            AND t.TransactionType = 'expense'
-            AND t.TransactionDate >= :date_from 
-            AND t.TransactionDate <= :date_to
-        GROUP BY t.TransactionDate
-        ORDER BY t.TransactionDate
-    """)
-    
-    results = db.execute(query, {
-        'user_id': user_id,
-        'date_from': date_from,
-        'date_to': date_to
-    }).fetchall()
-    
+    """Get daily spending trend: chuỗi dày đặc (ngày không chi tiêu = 0) từ trend_service"""
+    trend = build_trend(db, user_id, date_from, date_to, period_type="daily")
     return [
-        {
-            "date": row.date.isoformat(),
-            "amount": float(row.daily_spending)
-        }
-        for row in results
+        {"date": label, "amount": amount}
+        for label, amount in zip(trend["labels"], trend["amounts"].tolist())
     ]
 
 def generate_budget_alerts(overview: BudgetOverviewResponse) -> List[str]:
@@ -579,4 +580,129 @@ def generate_budget_alerts(overview: BudgetOverviewResponse) -> List[str]:
             alerts.append(f"Over budget: {category.category_name} is {category.percentage_used:.1f}% over budget!")
         elif category.percentage_used >= 90:
             alerts.append(f"Critical: {category.category_name} is at {category.percentage_used:.1f}% of budget.")
-    
\ No newline at end of file
+
+    return alerts
+
+
+# Trọng số của chi tiêu thực tế khi AutoAdjust: phân bổ mới = cũ * (1 - w) + thực chi * w
+ROLLOVER_ADJUST_WEIGHT = Decimal("0.5")
+
+# Một lô rollover, toàn bộ là câu lệnh theo tập:
+#   1. #rollover: ngân sách đang hoạt động đã hết kỳ, chưa có kỳ sau; kỳ mới bắt đầu
+#      ngay sau PeriodEnd (không hở ngày nào, kể cả khi kỳ cũ lệch lịch như 15-31/1)
+#      và dài một đơn vị BudgetType; chạy trễ nhiều kỳ thì nhảy thẳng tới kỳ chứa
+#      :as_of, không tạo các kỳ trống ở giữa;
+#   2. #spend: thực chi từng danh mục trong kỳ cũ (DailyCategoryTotals) và phân bổ mới;
+#   3. chốt kỳ cũ (SpentAmount/TotalSpent cuối kỳ, IsActive = 0);
+#   4. tạo ngân sách và danh mục kỳ mới (PreviousBudgetID trỏ về kỳ cũ).
+# Bảng tạm sống đến khi đóng kết nối (connection trong pool được dùng lại giữa các
+# lô), nên được xoá ở đầu và cuối lô.
+_ROLLOVER_BUDGETS = """
+    SET NOCOUNT ON;
+    DROP TABLE IF EXISTS #rollover;
+    DROP TABLE IF EXISTS #spend;
+
+    SELECT TOP (:batch_size)
+        b.BudgetID AS OldBudgetID, NEWID() AS NewBudgetID, b.UserID, b.AutoAdjust,
+        b.PeriodStart AS OldStart, b.PeriodEnd AS OldEnd,
+        DATEADD(MONTH, n.Steps * u.Months, DATEADD(DAY, n.Steps * u.Days, a.Anchor)) AS NewStart,
+        DATEADD(DAY, -1, DATEADD(MONTH, (n.Steps + 1) * u.Months,
+            DATEADD(DAY, (n.Steps + 1) * u.Days, a.Anchor))) AS NewEnd
+    INTO #rollover
+    FROM Budgets b
+    CROSS APPLY (SELECT DATEADD(DAY, 1, b.PeriodEnd) AS Anchor) a
+    CROSS APPLY (
+        SELECT CASE b.BudgetType WHEN 'weekly' THEN 0 WHEN 'yearly' THEN 12 ELSE 1 END AS Months,
+               CASE b.BudgetType WHEN 'weekly' THEN 7 ELSE 0 END AS Days
+    ) u
+    CROSS APPLY (
+        SELECT CASE WHEN u.Days > 0 THEN DATEDIFF(DAY, a.Anchor, :as_of) / u.Days
+                    ELSE DATEDIFF(MONTH, a.Anchor, :as_of) / u.Months END AS Steps
+    ) k
+    CROSS APPLY (
+        -- DATEDIFF(MONTH) đếm ranh giới tháng nên có thể dư một kỳ
+        SELECT CASE WHEN k.Steps > 0
+                         AND DATEADD(MONTH, k.Steps * u.Months, DATEADD(DAY, k.Steps * u.Days, a.Anchor)) > :as_of
+                    THEN k.Steps - 1 ELSE k.Steps END AS Steps
+    ) n
+    WHERE b.IsActive = 1
+        AND b.PeriodEnd < :as_of
+        AND NOT EXISTS (SELECT 1 FROM Budgets nb WHERE nb.PreviousBudgetID = b.BudgetID);
+
+    SELECT r.OldBudgetID, bc.BudgetCategoryID, bc.UserCategoryID, bc.AllocatedAmount,
+           CASE WHEN s.Spent > 0 THEN s.Spent ELSE 0 END AS Spent,
+           CASE WHEN r.AutoAdjust = 1
+                THEN ROUND(bc.AllocatedAmount * (1 - :weight)
+                           + CASE WHEN s.Spent > 0 THEN s.Spent ELSE 0 END * :weight, 2)
+                ELSE bc.AllocatedAmount END AS NewAllocated
+    INTO #spend
+    FROM #rollover r
+    JOIN BudgetCategories bc ON bc.BudgetID = r.OldBudgetID
+    OUTER APPLY (
+        SELECT SUM(d.TotalAmount) AS Spent
+        FROM DailyCategoryTotals d
+        WHERE d.UserID = r.UserID
+            AND d.TransactionDate >= r.OldStart AND d.TransactionDate <= r.OldEnd
+            AND d.UserCategoryID = bc.UserCategoryID
+            AND d.TransactionType = 'expense'
+    ) s;
+
+    UPDATE bc SET SpentAmount = s.Spent, UpdatedAt = GETDATE()
+    FROM BudgetCategories bc
+    JOIN #spend s ON s.BudgetCategoryID = bc.BudgetCategoryID;
+
+    UPDATE b SET IsActive = 0, TotalSpent = ISNULL(t.Spent, 0)
+    FROM Budgets b
+    JOIN #rollover r ON r.OldBudgetID = b.BudgetID
+    OUTER APPLY (SELECT SUM(s.Spent) AS Spent FROM #spend s WHERE s.OldBudgetID = r.OldBudgetID) t;
+
+    -- AutoAdjust: tổng ngân sách đổi đúng bằng phần chênh của các phân bổ (giữ phần chưa phân bổ)
+    INSERT INTO Budgets
+        (BudgetID, UserID, BudgetName, BudgetType, Amount, PeriodStart, PeriodEnd,
+         TotalSpent, AutoAdjust, AlertThreshold, IsActive, PreviousBudgetID)
+    SELECT r.NewBudgetID, b.UserID, b.BudgetName, b.BudgetType,
+           CASE WHEN b.AutoAdjust = 1 AND b.Amount + a.NewTotal - a.OldTotal > 0
+                THEN b.Amount + a.NewTotal - a.OldTotal ELSE b.Amount END,
+           r.NewStart, r.NewEnd, 0, b.AutoAdjust, b.AlertThreshold, 1, b.BudgetID
+    FROM #rollover r
+    JOIN Budgets b ON b.BudgetID = r.OldBudgetID
+    OUTER APPLY (
+        SELECT SUM(s.AllocatedAmount) AS OldTotal, SUM(s.NewAllocated) AS NewTotal
+        FROM #spend s WHERE s.OldBudgetID = r.OldBudgetID
+    ) a;
+
+    INSERT INTO BudgetCategories (BudgetCategoryID, BudgetID, UserCategoryID, AllocatedAmount, SpentAmount)
+    SELECT NEWID(), r.NewBudgetID, s.UserCategoryID, s.NewAllocated, 0
+    FROM #spend s
+    JOIN #rollover r ON r.OldBudgetID = s.OldBudgetID;
+
+    DECLARE @rolled INT = (SELECT COUNT(*) FROM #rollover);
+    DROP TABLE #rollover;
+    DROP TABLE #spend;
+    SELECT @rolled;
+"""
+
+
+def rollover_budgets(
+    db: Session,
+    as_of: Optional[date] = None,
+    batch_size: int = 5000,
+    adjust_weight: Decimal = ROLLOVER_ADJUST_WEIGHT
+) -> int:
+    """Chốt các ngân sách đã hết kỳ (trước as_of, mặc định hôm nay) và tạo kỳ mới
+    kèm BudgetCategories cho mọi user, theo lô batch_size ngân sách, mỗi lô một
+    transaction. Chạy lại không tạo trùng (kỳ cũ đã IsActive = 0, và
+    UX_Budgets_PreviousBudgetID chặn hai job chạy song song). Trả về số ngân sách đã rollover."""
+    params = {"as_of": as_of or date.today(), "batch_size": batch_size, "weight": adjust_weight}
+    total = 0
+    while True:
+        try:
+            rolled = db.execute(text(_ROLLOVER_BUDGETS), params).scalar() or 0
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        total += rolled
+        if rolled < batch_size:
+            return total
+
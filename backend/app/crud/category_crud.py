@@ -1,12 +1,14 @@
 # crud/category_crud.py - Updated version
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy import and_, or_, desc, asc, column, exists, func, insert, select, table, true
 from uuid import UUID
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from models.category import Category, UserCategory
-from schemas.category_schema import CategoryCreate, CategoryUpdate, UserCategoryCreate, UserCategoryUpdate, CategoryDisplayResponse
+from schemas.category_schema import CategoryCreate, CategoryUpdate, CategoryResponse, UserCategoryCreate, UserCategoryUpdate, CategoryDisplayResponse
 import uuid
 from fastapi import HTTPException
+from app.utils.cache import InvalidatingCache
+from app.utils.text_normalize import normalize_text
 # ==================== CATEGORY CRUD ====================
 
 def get_category(db: Session, category_id: UUID) -> Optional[Category]:
@@ -43,66 +45,185 @@ def create_category(db: Session, category: CategoryCreate) -> Category:
     )
     
     db.add(db_category)
+    db.flush()
+    # Tạo sẵn user category của danh mục mới cho mọi user, để việc tra tên luôn chỉ đọc
+    provision_default_user_categories(db, category_id=db_category.CategoryID, commit=False)
     db.commit()
+    _invalidate_system_catalog()
     db.refresh(db_category)
     return db_category
 
-# ==================== USER CATEGORY CRUD ====================
 
-def get_all_category_display_names(db: Session, user_id: UUID) -> List[CategoryDisplayResponse]:
-    """Lấy toàn bộ tên danh mục hiển thị của một người, bao gồm:
-       - Category mặc định của hệ thống (dù user chưa dùng)
-       - UserCategory liên kết
-       - UserCategory custom"""
-    
-    # Lấy tất cả Category mặc định
-    system_categories = db.query(Category).filter(Category.IsActive == True).all()
+# ==================== CATEGORY CATALOG CACHE ====================
+# Tên hiển thị của danh mục được tra trên mọi lần tạo/liệt kê giao dịch, overview
+# ngân sách và chatbot. Thay vì join UserCategories -> Categories mỗi lần, danh mục
+# của từng user được đọc một lần thành các dict và giữ trong bộ nhớ; mọi hàm ghi
+# trong module này gọi _invalidate_user_catalog/_invalidate_system_catalog sau commit.
+
+class UserCategoryCatalog:
+    """Danh mục của một user"""
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        # UserCategoryID -> tên hiển thị (cả danh mục đã tắt, để hiển thị giao dịch cũ)
+        self.names: Dict[UUID, str] = {}
+        # (tên chuẩn hoá, loại) -> UserCategoryID của danh mục đang active
+        self.ids: Dict[Tuple[str, str], UUID] = {}
+
+
+_USER_CATALOGS = InvalidatingCache("user_category_catalog", ttl=300, max_entries=5000)
+# (user_id, category_type hoặc None) -> danh sách CategoryDisplayResponse đã sắp xếp
+_DISPLAY_LISTS = InvalidatingCache("category_display_list", ttl=300, max_entries=15000)
+_DISPLAY_TYPES = (None, "income", "expense")
+_SYSTEM_CATEGORIES = InvalidatingCache("system_categories", ttl=300, max_entries=1)
+
+
+def _load_user_catalog(db: Session, user_id: UUID) -> UserCategoryCatalog:
+    rows = (
+        db.query(
+            UserCategory.UserCategoryID,
+            UserCategory.CategoryID,
+            UserCategory.CustomName,
+            UserCategory.CategoryType,
+            UserCategory.IsActive,
+            Category.CategoryName,
+            Category.CategoryType.label("SystemCategoryType")
+        )
+        .outerjoin(Category, UserCategory.CategoryID == Category.CategoryID)
+        .filter(UserCategory.UserID == user_id)
+        .all()
+    )
+
+    catalog = UserCategoryCatalog()
+    custom_ids: Dict[Tuple[str, str], UUID] = {}
+    for row in rows:
+        catalog.names[row.UserCategoryID] = row.CustomName or row.CategoryName or "Unknown Category"
+        if not row.IsActive:
+            continue
+        if row.CategoryID is not None and row.CategoryName is not None:
+            # Ưu tiên danh mục liên kết với danh mục hệ thống
+            catalog.ids.setdefault(
+                (normalize_text(row.CustomName or row.CategoryName), row.SystemCategoryType), row.UserCategoryID
+            )
+        elif row.CategoryID is None and row.CustomName:
+            custom_ids.setdefault((normalize_text(row.CustomName), row.CategoryType), row.UserCategoryID)
+    for key, user_category_id in custom_ids.items():
+        catalog.ids.setdefault(key, user_category_id)
+    return catalog
+
+
+def get_user_catalog(db: Session, user_id: UUID) -> UserCategoryCatalog:
+    return _USER_CATALOGS.get_or_load(user_id, lambda: _load_user_catalog(db, user_id))
+
+
+def _load_system_categories(db: Session) -> Dict[UUID, CategoryResponse]:
+    return {
+        category.CategoryID: CategoryResponse.model_construct(
+            category_id=category.CategoryID,
+            category_name=category.CategoryName,
+            category_type=category.CategoryType,
+            parent_category_id=category.ParentCategoryID,
+            is_active=category.IsActive,
+            sort_order=category.SortOrder,
+            created_at=category.CreatedAt
+        )
+        for category in db.query(Category).all()
+    }
+
+
+def get_system_categories(db: Session) -> Dict[UUID, CategoryResponse]:
+    """CategoryID -> CategoryResponse của mọi danh mục hệ thống (cả danh mục đã tắt).
+    Các object được dùng chung giữa các response, caller không được sửa."""
+    return _SYSTEM_CATEGORIES.get_or_load("all", lambda: _load_system_categories(db))
 
-    # Lấy toàn bộ UserCategory của user
-    user_categories = db.query(UserCategory).filter(
-        UserCategory.UserID == user_id,
-        UserCategory.IsActive == True
+
+def _invalidate_user_catalog(user_id: UUID) -> None:
+    _USER_CATALOGS.invalidate(user_id)
+    for category_type in _DISPLAY_TYPES:
+        _DISPLAY_LISTS.invalidate((user_id, category_type))
+
+
+def _invalidate_system_catalog() -> None:
+    _SYSTEM_CATEGORIES.clear()
+    # Tên hiển thị của user lấy từ danh mục hệ thống khi không có CustomName
+    _USER_CATALOGS.clear()
+    _DISPLAY_LISTS.clear()
+
+
+# ==================== USER CATEGORY CRUD ====================
+
+def _load_display_categories(
+    db: Session,
+    user_id: UUID,
+    category_type: Optional[str] = None
+) -> List[CategoryDisplayResponse]:
+    """Một câu FULL OUTER JOIN giữa danh mục hệ thống đang active và user categories
+    đang active của user:
+       - dòng có Category: danh mục hệ thống (liên kết với user hoặc chưa dùng)
+       - dòng chỉ có UserCategory với CategoryID NULL: danh mục custom
+    UserCategory liên kết tới danh mục hệ thống đã tắt bị bỏ qua."""
+    system = select(Category.CategoryID, Category.CategoryName, Category.CategoryType).where(Category.IsActive == True)
+    owned = select(
+        UserCategory.UserCategoryID,
+        UserCategory.CategoryID,
+        UserCategory.CustomName,
+        UserCategory.CategoryType
+    ).where(UserCategory.UserID == user_id, UserCategory.IsActive == True)
+    if category_type:
+        system = system.where(Category.CategoryType == category_type)
+        owned = owned.where(UserCategory.CategoryType == category_type)
+    system = system.subquery()
+    owned = owned.subquery()
+
+    rows = db.execute(
+        select(
+            system.c.CategoryID,
+            system.c.CategoryName,
+            system.c.CategoryType,
+            owned.c.UserCategoryID,
+            owned.c.CategoryID.label("LinkedCategoryID"),
+            owned.c.CustomName,
+            owned.c.CategoryType.label("UserCategoryType")
+        )
+        .select_from(system.join(owned, owned.c.CategoryID == system.c.CategoryID, full=True))
+        .where(or_(system.c.CategoryID.isnot(None), owned.c.CategoryID.is_(None)))
     ).all()
-    user_category_map = {uc.CategoryID: uc for uc in user_categories if uc.CategoryID}
 
     display_categories = []
-
-    # Thêm tất cả category mặc định (liên kết hoặc chưa dùng)
-    for cat in system_categories:
-        if cat.CategoryID in user_category_map:
-            uc = user_category_map[cat.CategoryID]
-            display_name = uc.CustomName if uc.CustomName else cat.CategoryName
-            is_custom = bool(uc.CustomName)
-            user_category_id = uc.UserCategoryID
+    for row in rows:
+        if row.CategoryID is not None:
+            display_categories.append(CategoryDisplayResponse.model_construct(
+                display_name=row.CustomName or row.CategoryName,
+                category_type=row.CategoryType,
+                user_category_id=row.UserCategoryID,
+                category_id=row.CategoryID,
+                is_custom=bool(row.CustomName)
+            ))
         else:
-            display_name = cat.CategoryName
-            is_custom = False
-            user_category_id = None
-
-        display_categories.append(CategoryDisplayResponse(
-            display_name=display_name,
-            category_type=cat.CategoryType,
-            user_category_id=user_category_id,
-            category_id=cat.CategoryID,
-            is_custom=is_custom
-        ))
-
-    # Thêm user categories hoàn toàn custom
-    custom_only = [uc for uc in user_categories if uc.CategoryID is None]
-    for uc in custom_only:
-        display_categories.append(CategoryDisplayResponse(
-            display_name=uc.CustomName,
-            category_type=uc.CategoryType,
-            user_category_id=uc.UserCategoryID,
-            category_id=None,
-            is_custom=True
-        ))
-
-    # Sắp xếp
-    display_categories.sort(key=lambda x: (x.category_type, x.display_name))
+            display_categories.append(CategoryDisplayResponse.model_construct(
+                display_name=row.CustomName,
+                category_type=row.UserCategoryType,
+                user_category_id=row.UserCategoryID,
+                category_id=None,
+                is_custom=True
+            ))
+
+    if category_type:
+        display_categories.sort(key=lambda x: x.display_name)
+    else:
+        display_categories.sort(key=lambda x: (x.category_type, x.display_name))
     return display_categories
 
 
+def get_all_category_display_names(db: Session, user_id: UUID) -> List[CategoryDisplayResponse]:
+    """Lấy toàn bộ tên danh mục hiển thị của một người, bao gồm:
+       - Category mặc định của hệ thống (dù user chưa dùng)
+       - UserCategory liên kết
+       - UserCategory custom
+    Danh sách được cache, caller không được sửa."""
+    return _DISPLAY_LISTS.get_or_load((user_id, None), lambda: _load_display_categories(db, user_id))
+
+
 def get_category_display_names_by_type(
     db: Session,
     user_id: UUID,
@@ -111,86 +232,34 @@ def get_category_display_names_by_type(
     """Lấy toàn bộ tên danh mục hiển thị theo loại, bao gồm:
        - Category mặc định của hệ thống (dù user chưa dùng)
        - UserCategory liên kết
-       - UserCategory custom"""
-    
-    # Lấy tất cả Category mặc định theo loại
-    system_categories = db.query(Category).filter(
-        Category.IsActive == True,
-        Category.CategoryType == category_type
-    ).all()
+       - UserCategory custom
+    Danh sách được cache, caller không được sửa."""
+    if category_type not in _DISPLAY_TYPES:
+        return []
+    return _DISPLAY_LISTS.get_or_load(
+        (user_id, category_type), lambda: _load_display_categories(db, user_id, category_type)
+    )
 
-    # Lấy toàn bộ UserCategory của user theo loại
-    user_categories = db.query(UserCategory).filter(
-        UserCategory.UserID == user_id,
-        UserCategory.IsActive == True,
-        UserCategory.CategoryType == category_type
-    ).all()
-    user_category_map = {uc.CategoryID: uc for uc in user_categories if uc.CategoryID}
 
-    display_categories = []
+def get_category_display_name(db: Session, user_category_id: UUID, user_id: Optional[UUID] = None) -> str:
+    """Get the display name of a user category
 
-    # Thêm tất cả category mặc định (liên kết hoặc chưa dùng)
-    for cat in system_categories:
-        if cat.CategoryID in user_category_map:
-            uc = user_category_map[cat.CategoryID]
-            display_name = uc.CustomName if uc.CustomName else cat.CategoryName
-            is_custom = bool(uc.CustomName)
-            user_category_id = uc.UserCategoryID
-        else:
-            display_name = cat.CategoryName
-            is_custom = False
-            user_category_id = None
-
-        display_categories.append(CategoryDisplayResponse(
-            display_name=display_name,
-            category_type=cat.CategoryType,
-            user_category_id=user_category_id,
-            category_id=cat.CategoryID,
-            is_custom=is_custom
-        ))
-
-    # Thêm user categories hoàn toàn custom
-    custom_only = [uc for uc in user_categories if uc.CategoryID is None]
-    for uc in custom_only:
-        display_categories.append(CategoryDisplayResponse(
-            display_name=uc.CustomName,
-            category_type=uc.CategoryType,
-            user_category_id=uc.UserCategoryID,
-            category_id=None,
-            is_custom=True
-        ))
-
-    # Sắp xếp
-    display_categories.sort(key=lambda x: x.display_name)
-    return display_categories
+    Khi biết user_id, tra trong catalogue đã cache của user đó.
+    """
+    if user_id is not None:
+        name = get_user_catalog(db, user_id).names.get(user_category_id)
+        if name is not None:
+            return name
 
-
-def get_category_display_name(db: Session, user_category_id: UUID) -> str:
-    """Get the display name of a user category"""
-    user_category = (
-        db.query(UserCategory)
+    row = (
+        db.query(UserCategory.CustomName, Category.CategoryName)
+        .outerjoin(Category, UserCategory.CategoryID == Category.CategoryID)
         .filter(UserCategory.UserCategoryID == user_category_id)
         .first()
     )
-    
-    if not user_category:
+    if not row:
         return "Unknown Category"
-    
-    # Nếu là custom category hoàn toàn
-    if not user_category.CategoryID:
-        return user_category.CustomName or "Unknown Category"
-    
-    # Nếu có liên kết với category gốc
-    category = (
-        db.query(Category)
-        .filter(Category.CategoryID == user_category.CategoryID)
-        .first()
-    )
-    
-    if not category:
-        return user_category.CustomName or "Unknown Category"
-    
-    return user_category.CustomName if user_category.CustomName else category.CategoryName
+    return row.CustomName or row.CategoryName or "Unknown Category"
 
 def create_user_category(db: Session, user_id: UUID, user_category: UserCategoryCreate) -> UserCategory:
     """Tạo user category (có thể là custom hoàn toàn hoặc dựa trên category gốc)"""
@@ -206,6 +275,7 @@ def create_user_category(db: Session, user_id: UUID, user_category: UserCategory
                 existing.IsActive = True
                 existing.CustomName = user_category.custom_name
                 db.commit()
+                _invalidate_user_catalog(user_id)
                 db.refresh(existing)
                 return existing
             else:
@@ -239,6 +309,7 @@ def create_user_category(db: Session, user_id: UUID, user_category: UserCategory
                 existing_custom.IsActive = True
                 existing_custom.CustomName = user_category.custom_name
                 db.commit()
+                _invalidate_user_catalog(user_id)
                 db.refresh(existing_custom)
                 return existing_custom
             else:
@@ -257,6 +328,7 @@ def create_user_category(db: Session, user_id: UUID, user_category: UserCategory
 
     db.add(db_user_category)
     db.commit()
+    _invalidate_user_catalog(user_id)
     db.refresh(db_user_category)
     return db_user_category
 
@@ -279,53 +351,47 @@ def get_user_category(
 
 
 
-def get_user_categories_by_user(
-    db: Session, 
+def get_user_categories_page(
+    db: Session,
     user_id: UUID,
     skip: int = 0,
     limit: int = 100,
     is_active: Optional[bool] = None,
     category_type: Optional[str] = None
-):
-    """Lấy danh sách user categories theo user"""
-    query = db.query(UserCategory, Category).join(
-        Category, UserCategory.CategoryID == Category.CategoryID, isouter=True  # Sửa INNER → LEFT JOIN
+) -> Tuple[List[Any], int]:
+    """Một trang user categories và tổng số dòng khớp filter, trong một câu query.
+
+    Tổng số lấy bằng COUNT(*) OVER () trên cùng câu SELECT; chỉ khi trang
+    rỗng (skip vượt quá tổng) mới cần đếm riêng. Không join Categories:
+    thông tin danh mục gốc lấy từ get_system_categories() đã cache.
+    """
+    query = db.query(
+        UserCategory.UserCategoryID,
+        UserCategory.CategoryID,
+        UserCategory.CustomName,
+        UserCategory.CategoryType,
+        UserCategory.IsActive,
+        UserCategory.CreatedAt,
+        func.count().over().label("total")
     ).filter(UserCategory.UserID == user_id)
-    
-    if is_active is not None:
-        query = query.filter(UserCategory.IsActive == is_active)
-    
-    if category_type:
-        # Với custom category (CategoryID NULL), filter theo Category.CategoryType sẽ bỏ mất chúng
-        query = query.filter(
-            (Category.CategoryType == category_type) |
-            ((UserCategory.CategoryID.is_(None)) & (UserCategory.CategoryType == category_type))
-        )
-    
-    return query.order_by(UserCategory.CreatedAt.desc()) \
-            .offset(skip) \
-            .limit(limit) \
-            .all()
-
-
-
 
-def get_user_categories_count(
-    db: Session,
-    user_id: UUID,
-    is_active: Optional[bool] = None,
-    category_type: Optional[str] = None
-) -> int:
-    """Đếm số lượng user categories"""
-    query = db.query(UserCategory).filter(UserCategory.UserID == user_id)
-    
     if is_active is not None:
         query = query.filter(UserCategory.IsActive == is_active)
-    
     if category_type:
-        query = query.join(Category).filter(Category.CategoryType == category_type)
-    
-    return query.count()
+        # UserCategory.CategoryType luôn bằng loại của danh mục gốc (kiểm tra khi tạo)
+        query = query.filter(UserCategory.CategoryType == category_type)
+
+    rows = (
+        query.order_by(UserCategory.CreatedAt.desc(), UserCategory.UserCategoryID)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    if rows:
+        return rows, rows[0].total
+    if skip == 0:
+        return rows, 0
+    return rows, query.with_entities(func.count()).scalar()
 
 def get_user_category_by_user_and_category(
     db: Session, 
@@ -364,6 +430,7 @@ def update_user_category(
             setattr(db_user_category, field_mapping[field], value)
     
     db.commit()
+    _invalidate_user_catalog(db_user_category.UserID)
     db.refresh(db_user_category)
     return db_user_category
 
@@ -380,9 +447,60 @@ def delete_user_category(db: Session,user_id: UUID, user_category_id: UUID) -> b
 
     db.delete(db_user_category)
     db.commit()
+    _invalidate_user_catalog(user_id)
     
     return True
 
+def provision_default_user_categories(
+    db: Session,
+    user_id: Optional[UUID] = None,
+    category_id: Optional[UUID] = None,
+    commit: bool = True
+) -> int:
+    """Tạo UserCategory cho mọi cặp (user, danh mục hệ thống đang active) còn thiếu,
+    bằng một câu INSERT ... SELECT.
+
+    user_id: chỉ cho một user (lúc đăng ký); category_id: chỉ cho một danh mục
+    (lúc tạo danh mục hệ thống mới); bỏ trống cả hai để backfill toàn bộ.
+    Trả về số dòng được tạo.
+    """
+    users = table("Users", column("UserID"))
+    source = (
+        select(users.c.UserID, Category.CategoryID, Category.CategoryType)
+        .select_from(users.join(Category.__table__, true()))
+        .where(
+            Category.IsActive == True,
+            ~exists().where(
+                UserCategory.UserID == users.c.UserID,
+                UserCategory.CategoryID == Category.CategoryID
+            )
+        )
+    )
+    if user_id is not None:
+        source = source.where(users.c.UserID == user_id)
+    if category_id is not None:
+        source = source.where(Category.CategoryID == category_id)
+
+    # include_defaults=False: default Python của UserCategoryID chỉ được tính một lần
+    # cho cả câu lệnh (mọi dòng cùng một khoá); để DB sinh NEWID()/IsActive/CreatedAt cho từng dòng
+    result = db.execute(
+        insert(UserCategory.__table__).from_select(
+            ["UserID", "CategoryID", "CategoryType"], source, include_defaults=False
+        )
+    )
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+    if user_id is not None:
+        _invalidate_user_catalog(user_id)
+    else:
+        _USER_CATALOGS.clear()
+        _DISPLAY_LISTS.clear()
+    return result.rowcount
+
+
 def get_user_category_id_by_display_name(
     db: Session, 
     user_id: UUID, 
@@ -390,7 +508,16 @@ def get_user_category_id_by_display_name(
     transaction_type: str
 ) -> Optional[UUID]:
     """Get user category ID by display name and transaction type"""
-    
+    # So tên trên cột chuẩn hoá (bỏ dấu, chữ thường): "an uong" khớp "Ăn uống"
+    name_norm = normalize_text(display_name)
+    if not name_norm:
+        return None
+
+    cached = get_user_catalog(db, user_id).ids.get((name_norm, transaction_type))
+    if cached is not None:
+        return cached
+
+    # Không có trong catalogue (danh mục mới tạo ở worker khác): tra DB
     # Tìm trong user categories có liên kết với category gốc
     linked_result = (
         db.query(UserCategory)
@@ -400,10 +527,10 @@ def get_user_category_id_by_display_name(
             UserCategory.IsActive == True,
             Category.CategoryType == transaction_type,
             or_(
-                UserCategory.CustomName == display_name,
+                UserCategory.CustomNameNorm == name_norm,
                 and_(
                     UserCategory.CustomName.is_(None), 
-                    Category.CategoryName == display_name
+                    Category.CategoryNameNorm == name_norm
                 )
             )
         )
@@ -411,6 +538,7 @@ def get_user_category_id_by_display_name(
     )
     
     if linked_result:
+        _invalidate_user_catalog(user_id)
         return linked_result.UserCategoryID
     
     # Tìm trong user categories hoàn toàn tùy chỉnh
@@ -420,38 +548,86 @@ def get_user_category_id_by_display_name(
             UserCategory.UserID == user_id,
             UserCategory.CategoryID.is_(None),
             UserCategory.CategoryType == transaction_type,
-            UserCategory.CustomName == display_name,
+            UserCategory.CustomNameNorm == name_norm,
             UserCategory.IsActive == True
         )
         .first()
     )
     
     if custom_result:
+        _invalidate_user_catalog(user_id)
         return custom_result.UserCategoryID
     
-    # Nếu không tìm thấy, tìm trong category gốc và tạo user category mới
-    category = (
-        db.query(Category)
+    # Danh mục hệ thống đã được tạo sẵn cho user (provision_default_user_categories),
+    # nên hàm này chỉ đọc
+    return None
+
+
+def resolve_user_category_ids(
+    db: Session,
+    user_id: UUID,
+    keys: Iterable[Tuple[str, str]]
+) -> Dict[Tuple[str, str], UUID]:
+    """Phiên bản theo lô của get_user_category_id_by_display_name (chỉ đọc).
+
+    keys là các cặp (display_name, transaction_type). Tra catalogue đã cache,
+    các cặp còn thiếu được tìm bằng một query trên danh mục của user. Cặp
+    không tìm thấy sẽ không có trong kết quả.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    # Tra catalogue đã cache trước; chỉ các cặp còn thiếu mới cần query DB
+    catalog = get_user_catalog(db, user_id)
+    cached: Dict[Tuple[str, str], UUID] = {}
+    for key in keys:
+        user_category_id = catalog.ids.get((normalize_text(key[0]), key[1]))
+        if user_category_id is not None:
+            cached[key] = user_category_id
+    keys -= cached.keys()
+    if not keys:
+        return cached
+
+    # Tên được so không phân biệt dấu/hoa thường như bản đơn lẻ
+    norm_keys = {key: (normalize_text(key[0]), key[1]) for key in keys}
+    names = {name for name, _ in norm_keys.values() if name}
+
+    rows = (
+        db.query(
+            UserCategory.UserCategoryID,
+            UserCategory.CategoryID,
+            UserCategory.CustomNameNorm,
+            UserCategory.CategoryType,
+            Category.CategoryNameNorm,
+            Category.CategoryType.label("SystemCategoryType")
+        )
+        .outerjoin(Category, UserCategory.CategoryID == Category.CategoryID)
         .filter(
-            Category.IsActive == True,
-            Category.CategoryType == transaction_type,
-            Category.CategoryName == display_name
+            UserCategory.UserID == user_id,
+            UserCategory.IsActive == True,
+            or_(
+                UserCategory.CustomNameNorm.in_(names),
+                and_(UserCategory.CustomName.is_(None), Category.CategoryNameNorm.in_(names))
+            )
         )
-        .first()
+        .all()
     )
-    
-    if category:
-        # Tạo user category mới cho user
-        new_user_cat = UserCategory(
-            UserID=user_id,
-            CategoryID=category.CategoryID,
-            CustomName=None,
-            CategoryType=category.CategoryType,
-            IsActive=True
-        )
-        db.add(new_user_cat)
-        db.commit()
-        db.refresh(new_user_cat)
-        return new_user_cat.UserCategoryID
-    
-    return None
\ No newline at end of file
+
+    resolved: Dict[Tuple[str, str], UUID] = {}
+    custom_matches: Dict[Tuple[str, str], UUID] = {}
+    for row in rows:
+        if row.CategoryID is not None and row.CategoryNameNorm is not None:
+            # Ưu tiên danh mục liên kết với danh mục hệ thống, như bản đơn lẻ
+            key = (row.CustomNameNorm or row.CategoryNameNorm, row.SystemCategoryType)
+            resolved.setdefault(key, row.UserCategoryID)
+        elif row.CategoryID is None and row.CustomNameNorm:
+            custom_matches.setdefault((row.CustomNameNorm, row.CategoryType), row.UserCategoryID)
+    for key, user_category_id in custom_matches.items():
+        resolved.setdefault(key, user_category_id)
+    if resolved:
+        # DB có danh mục mà catalogue chưa có: catalogue đã cũ
+        _invalidate_user_catalog(user_id)
+
+    cached.update((key, resolved[norm_keys[key]]) for key in keys if norm_keys[key] in resolved)
+    return cached
@@ -0,0 +1,240 @@
+# crud/recurring_crud.py
+"""Giao dịch định kỳ: định nghĩa (RecurringTransactions) và tạo giao dịch cho
+các kỳ đến hạn.
+
+Kỳ thứ n của một định nghĩa luôn tính từ StartDate (StartDate + n * IntervalCount
+đơn vị), nên lương ngày 31 vẫn rơi vào ngày cuối của tháng ngắn rồi quay lại ngày
+31. materialize_due_recurring chạy theo lô cho mọi user: tạo giao dịch cho mọi kỳ
+từ NextRunDate đến as_of (bù cả các ngày job không chạy) qua
+transaction_crud.bulk_insert_transactions_for_users - một lần insert cho cả lô,
+rồi tổng hợp/dự báo/cảnh báo/thông báo như mọi lần ghi giao dịch. ExternalID
+'recurring:<RecurringID>:<ngày>' (unique theo user) làm cho việc chạy lại, kể cả
+khi job dừng giữa lúc insert và lúc cập nhật NextRunDate, không tạo trùng.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from models.transaction import RecurringTransaction
+from schemas.transaction_schema import RecurringTransactionCreate, RecurringTransactionResponse
+from crud import transaction_crud
+from crud.category_crud import get_user_catalog, get_user_category_id_by_display_name
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+# Số kỳ tối đa tạo cho một định nghĩa mỗi lần chạy; phần còn lại bù ở lần sau
+MAX_OCCURRENCES_PER_RUN = 1000
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    last_day = ((date(year, month, 28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)).day
+    return date(year, month, min(day.day, last_day))
+
+
+def nth_occurrence(definition: RecurringTransaction, n: int) -> date:
+    """Ngày của kỳ thứ n (0 = StartDate)"""
+    steps = n * definition.IntervalCount
+    if definition.Frequency == "daily":
+        return definition.StartDate + timedelta(days=steps)
+    if definition.Frequency == "weekly":
+        return definition.StartDate + timedelta(weeks=steps)
+    if definition.Frequency == "yearly":
+        return _add_months(definition.StartDate, steps * 12)
+    return _add_months(definition.StartDate, steps)
+
+
+def occurrence_index(definition: RecurringTransaction, day: date) -> int:
+    """Chỉ số kỳ của một ngày là kỳ của định nghĩa (ví dụ NextRunDate)"""
+    start = definition.StartDate
+    if definition.Frequency in ("daily", "weekly"):
+        units = (day - start).days // (7 if definition.Frequency == "weekly" else 1)
+    else:
+        units = (day.year - start.year) * 12 + day.month - start.month
+        if definition.Frequency == "yearly":
+            units //= 12
+    return units // definition.IntervalCount
+
+
+def _to_response(definition: RecurringTransaction, names: Dict[UUID, str]) -> RecurringTransactionResponse:
+    return RecurringTransactionResponse.model_construct(
+        recurring_id=definition.RecurringID,
+        user_category_id=definition.UserCategoryID,
+        category_display_name=names.get(definition.UserCategoryID, "Unknown Category"),
+        transaction_type=definition.TransactionType,
+        amount=definition.Amount,
+        description=definition.Description,
+        payment_method=definition.PaymentMethod,
+        location=definition.Location,
+        notes=definition.Notes,
+        frequency=definition.Frequency,
+        interval_count=definition.IntervalCount,
+        start_date=definition.StartDate,
+        end_date=definition.EndDate,
+        next_run_date=definition.NextRunDate,
+        last_run_date=definition.LastRunDate,
+        is_active=definition.IsActive,
+    )
+
+
+def create_recurring_transaction(
+    db: Session,
+    user_id: UUID,
+    data: RecurringTransactionCreate
+) -> RecurringTransactionResponse:
+    """Tạo định nghĩa; kỳ đầu (StartDate) được tạo ở lần chạy job kế tiếp nếu đã đến hạn"""
+    user_category_id = get_user_category_id_by_display_name(
+        db=db,
+        user_id=user_id,
+        display_name=data.category_display_name,
+        transaction_type=data.transaction_type
+    )
+    if not user_category_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy danh mục phù hợp"
+        )
+    definition = RecurringTransaction(
+        UserID=user_id,
+        UserCategoryID=user_category_id,
+        TransactionType=data.transaction_type,
+        Amount=data.amount,
+        Description=data.description,
+        PaymentMethod=data.payment_method,
+        Location=data.location,
+        Notes=data.notes,
+        Frequency=data.frequency,
+        IntervalCount=data.interval_count,
+        StartDate=data.start_date,
+        EndDate=data.end_date,
+        NextRunDate=data.start_date,
+        IsActive=True
+    )
+    db.add(definition)
+    db.commit()
+    db.refresh(definition)
+    return _to_response(definition, get_user_catalog(db, user_id).names)
+
+
+def get_recurring_transactions(
+    db: Session,
+    user_id: UUID,
+    include_inactive: bool = False
+) -> List[RecurringTransactionResponse]:
+    query = db.query(RecurringTransaction).filter(RecurringTransaction.UserID == user_id)
+    if not include_inactive:
+        query = query.filter(RecurringTransaction.IsActive == True)
+    definitions = query.order_by(RecurringTransaction.NextRunDate).all()
+    names = get_user_catalog(db, user_id).names if definitions else {}
+    return [_to_response(definition, names) for definition in definitions]
+
+
+def deactivate_recurring_transaction(db: Session, user_id: UUID, recurring_id: UUID) -> bool:
+    """Dừng định nghĩa; các giao dịch đã tạo được giữ nguyên"""
+    updated = (
+        db.query(RecurringTransaction)
+        .filter(RecurringTransaction.RecurringID == recurring_id, RecurringTransaction.UserID == user_id)
+        .update({RecurringTransaction.IsActive: False}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+def _due_rows(definition: RecurringTransaction, as_of: date) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Các dòng giao dịch của những kỳ đến hạn và giá trị mới cho định nghĩa"""
+    last_day = min(as_of, definition.EndDate) if definition.EndDate else as_of
+    n = occurrence_index(definition, definition.NextRunDate)
+    day = nth_occurrence(definition, n)
+    if day < definition.NextRunDate:
+        n += 1
+        day = nth_occurrence(definition, n)
+
+    rows: List[Dict[str, Any]] = []
+    last_run = definition.LastRunDate
+    while day <= last_day and len(rows) < MAX_OCCURRENCES_PER_RUN:
+        rows.append({
+            "ExternalID": f"recurring:{definition.RecurringID}:{day.isoformat()}",
+            "UserID": definition.UserID,
+            "UserCategoryID": definition.UserCategoryID,
+            "TransactionType": definition.TransactionType,
+            "Amount": definition.Amount,
+            "Description": definition.Description,
+            "TransactionDate": day,
+            "TransactionTime": time(0, 0),
+            "PaymentMethod": definition.PaymentMethod,
+            "Location": definition.Location,
+            "Notes": definition.Notes,
+            "CreatedBy": "recurring",
+        })
+        last_run = day
+        n += 1
+        day = nth_occurrence(definition, n)
+
+    state = {
+        "recurring_id": definition.RecurringID,
+        "next_run_date": day,
+        "last_run_date": last_run,
+        "is_active": definition.EndDate is None or day <= definition.EndDate,
+        "updated_at": datetime.utcnow(),
+    }
+    return rows, state
+
+
+# WHERE IsActive = 1: định nghĩa bị dừng trong lúc lô đang chạy (insert, cảnh báo...)
+# giữ nguyên trạng thái dừng; lô chỉ có thể tắt định nghĩa đã qua EndDate
+_recurring = RecurringTransaction.__table__
+_ADVANCE = (
+    update(_recurring)
+    .where(_recurring.c.RecurringID == bindparam("recurring_id"), _recurring.c.IsActive == True)
+    .values(
+        NextRunDate=bindparam("next_run_date"),
+        LastRunDate=bindparam("last_run_date"),
+        IsActive=bindparam("is_active"),
+        UpdatedAt=bindparam("updated_at")
+    )
+)
+
+
+def materialize_due_recurring(
+    db: Session,
+    as_of: Optional[date] = None,
+    batch_size: int = 5000
+) -> Tuple[int, int]:
+    """Tạo giao dịch cho mọi kỳ đến hạn (NextRunDate <= as_of, mặc định hôm nay)
+    của mọi user, batch_size định nghĩa mỗi lô. Trả về (số giao dịch tạo, số kỳ
+    đã có giao dịch từ lần chạy trước)."""
+    as_of = as_of or date.today()
+    inserted = skipped = 0
+    after: Optional[UUID] = None
+    while True:
+        query = db.query(RecurringTransaction).filter(
+            RecurringTransaction.IsActive == True,
+            RecurringTransaction.NextRunDate <= as_of
+        )
+        if after is not None:
+            query = query.filter(RecurringTransaction.RecurringID > after)
+        definitions = query.order_by(RecurringTransaction.RecurringID).limit(batch_size).all()
+        if not definitions:
+            return inserted, skipped
+        after = definitions[-1].RecurringID
+
+        rows: List[Dict[str, Any]] = []
+        states: List[Dict[str, Any]] = []
+        for definition in definitions:
+            due, state = _due_rows(definition, as_of)
+            rows.extend(due)
+            states.append(state)
+
+        # Insert trước, chuyển NextRunDate sau: dừng giữa chừng thì lần sau tạo lại
+        # đúng các kỳ đó và ExternalID loại phần đã có
+        created, existing = transaction_crud.bulk_insert_transactions_for_users(db, rows)
+        inserted += created
+        skipped += existing
+        db.execute(_ADVANCE, states)
+        db.commit()
+        if len(definitions) < batch_size:
+            return inserted, skipped
@@ -0,0 +1,233 @@
+# crud/summary_crud.py
+"""Tổng hợp giao dịch cho báo cáo.
+
+  * DailyCategoryTotals: tổng theo ngày/danh mục, trigger TR_Transactions_DailyTotals
+    giữ đúng khi ghi giao dịch; ở đây chỉ có thao tác tính lại theo lô.
+  * PeriodSnapshots/MonthlyCategoryTotals: tổng đã chốt của các tháng đã đóng
+    (close_periods). Sửa muộn một tháng chỉ làm mất snapshot của tháng đó.
+
+Truy vấn theo khoảng thời gian (get_monthly_totals, get_category_totals) lấy
+các tháng nằm trọn trong khoảng từ snapshot và phần còn lại (tháng đang mở,
+tháng chưa chốt, ngày lẻ ở hai đầu khoảng) từ DailyCategoryTotals.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, insert, or_, select, text, true
+from sqlalchemy.orm import Session
+
+from models.transaction import DailyCategoryTotal, MonthlyCategoryTotal, Transaction
+
+
+class PeriodTotal(NamedTuple):
+    PeriodMonth: date
+    UserCategoryID: UUID
+    TransactionType: str
+    TotalAmount: Decimal
+    TransactionCount: int
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def rebuild_daily_totals(db: Session, user_id: Optional[UUID] = None, commit: bool = True) -> int:
+    """Tính lại DailyCategoryTotals từ Transactions (của một user, hoặc tất cả),
+    bằng một DELETE và một INSERT ... SELECT GROUP BY. Trả về số dòng tổng hợp."""
+    clear = delete(DailyCategoryTotal)
+    source = select(
+        Transaction.UserID,
+        Transaction.TransactionDate,
+        Transaction.UserCategoryID,
+        Transaction.TransactionType,
+        func.sum(Transaction.Amount),
+        func.count()
+    ).group_by(
+        Transaction.UserID,
+        Transaction.TransactionDate,
+        Transaction.UserCategoryID,
+        Transaction.TransactionType
+    )
+    if user_id is not None:
+        clear = clear.where(DailyCategoryTotal.UserID == user_id)
+        source = source.where(Transaction.UserID == user_id)
+
+    db.execute(clear)
+    result = db.execute(
+        insert(DailyCategoryTotal).from_select(
+            ["UserID", "TransactionDate", "UserCategoryID", "TransactionType", "TotalAmount", "TransactionCount"],
+            source
+        )
+    )
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
+_CLOSE_SNAPSHOTS = """
+    INSERT INTO PeriodSnapshots (UserID, PeriodMonth)
+    SELECT DISTINCT d.UserID, DATEFROMPARTS(YEAR(d.TransactionDate), MONTH(d.TransactionDate), 1)
+    FROM DailyCategoryTotals d
+    WHERE d.TransactionDate < :open_month
+        {user_filter}
+        AND NOT EXISTS (
+            SELECT 1 FROM PeriodSnapshots s
+            WHERE s.UserID = d.UserID
+                AND s.PeriodMonth = DATEFROMPARTS(YEAR(d.TransactionDate), MONTH(d.TransactionDate), 1)
+        )
+"""
+
+# Snapshot chưa có dòng tổng nào = vừa tạo ở câu trên (tháng có snapshot luôn có giao dịch)
+_FILL_SNAPSHOTS = """
+    INSERT INTO MonthlyCategoryTotals
+        (UserID, PeriodMonth, UserCategoryID, TransactionType, TotalAmount, TransactionCount)
+    SELECT s.UserID, s.PeriodMonth, d.UserCategoryID, d.TransactionType,
+           SUM(d.TotalAmount), SUM(d.TransactionCount)
+    FROM PeriodSnapshots s
+    JOIN DailyCategoryTotals d ON d.UserID = s.UserID
+        AND d.TransactionDate >= s.PeriodMonth
+        AND d.TransactionDate < DATEADD(MONTH, 1, s.PeriodMonth)
+    WHERE 1 = 1
+        {user_filter}
+        AND NOT EXISTS (
+            SELECT 1 FROM MonthlyCategoryTotals m
+            WHERE m.UserID = s.UserID AND m.PeriodMonth = s.PeriodMonth
+        )
+    GROUP BY s.UserID, s.PeriodMonth, d.UserCategoryID, d.TransactionType
+"""
+
+
+def close_periods(
+    db: Session,
+    as_of: Optional[date] = None,
+    user_id: Optional[UUID] = None,
+    commit: bool = True
+) -> int:
+    """Chốt mọi tháng trước tháng chứa as_of (mặc định hôm nay) chưa có snapshot -
+    gồm cả tháng bị bỏ snapshot do sửa muộn. Trả về số tháng (user x tháng) được chốt."""
+    params: Dict[str, object] = {"open_month": month_start(as_of or date.today())}
+    close_filter = fill_filter = ""
+    if user_id is not None:
+        params["user_id"] = str(user_id)
+        close_filter, fill_filter = "AND d.UserID = :user_id", "AND s.UserID = :user_id"
+    closed = db.execute(text(_CLOSE_SNAPSHOTS.format(user_filter=close_filter)), params).rowcount
+    db.execute(text(_FILL_SNAPSHOTS.format(user_filter=fill_filter)), params)
+    if commit:
+        db.commit()
+    return closed
+
+
+def _live_ranges(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    frozen_months: List[date]
+) -> List[Tuple[Optional[date], Optional[date]]]:
+    """Phần của [date_from, date_to] không thuộc tháng đã chốt, dạng các khoảng
+    [đầu, cuối) (None = không giới hạn); các tháng chốt liên tiếp được gộp lại
+    nên thường chỉ còn một khoảng - DB seek theo từng khoảng trên khoá chính."""
+    ranges: List[Tuple[Optional[date], Optional[date]]] = []
+    cursor = date_from
+    end = date_to + timedelta(days=1) if date_to else None
+    for month in sorted(frozen_months):
+        if cursor is None or cursor < month:
+            ranges.append((cursor, month))
+        cursor = next_month(month)
+    if end is None or cursor is None or cursor < end:
+        ranges.append((cursor, end))
+    return ranges
+
+
+def get_period_totals(
+    db: Session,
+    user_id: UUID,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    transaction_type: Optional[str] = None
+) -> List[PeriodTotal]:
+    """Tổng theo (tháng, danh mục, loại) trong [date_from, date_to]: một query
+    đọc snapshot của các tháng nằm trọn trong khoảng, một query gộp theo tháng
+    phần ngày còn lại từ DailyCategoryTotals (đã loại các tháng có snapshot)."""
+    frozen_query = db.query(
+        MonthlyCategoryTotal.PeriodMonth,
+        MonthlyCategoryTotal.UserCategoryID,
+        MonthlyCategoryTotal.TransactionType,
+        MonthlyCategoryTotal.TotalAmount,
+        MonthlyCategoryTotal.TransactionCount
+    ).filter(MonthlyCategoryTotal.UserID == user_id)
+    if date_from:
+        first_full = date_from if date_from.day == 1 else next_month(date_from)
+        frozen_query = frozen_query.filter(MonthlyCategoryTotal.PeriodMonth >= first_full)
+    if date_to:
+        frozen_query = frozen_query.filter(MonthlyCategoryTotal.PeriodMonth < month_start(date_to + timedelta(days=1)))
+    if transaction_type:
+        frozen_query = frozen_query.filter(MonthlyCategoryTotal.TransactionType == transaction_type)
+    totals = [PeriodTotal(*row) for row in frozen_query.all()]
+
+    year = func.year(DailyCategoryTotal.TransactionDate)
+    month = func.month(DailyCategoryTotal.TransactionDate)
+    live_query = db.query(
+        year,
+        month,
+        DailyCategoryTotal.UserCategoryID,
+        DailyCategoryTotal.TransactionType,
+        func.sum(DailyCategoryTotal.TotalAmount),
+        func.sum(DailyCategoryTotal.TransactionCount)
+    ).filter(DailyCategoryTotal.UserID == user_id)
+    if transaction_type:
+        live_query = live_query.filter(DailyCategoryTotal.TransactionType == transaction_type)
+    ranges = _live_ranges(date_from, date_to, list({total.PeriodMonth for total in totals}))
+    if not ranges:
+        return totals
+    conditions = []
+    for start, end in ranges:
+        bounds = []
+        if start is not None:
+            bounds.append(DailyCategoryTotal.TransactionDate >= start)
+        if end is not None:
+            bounds.append(DailyCategoryTotal.TransactionDate < end)
+        conditions.append(and_(*bounds) if bounds else true())
+    live_query = live_query.filter(or_(*conditions))
+    live_rows = live_query.group_by(
+        year, month, DailyCategoryTotal.UserCategoryID, DailyCategoryTotal.TransactionType
+    ).all()
+
+    totals.extend(
+        PeriodTotal(date(row[0], row[1], 1), row[2], row[3], row[4], row[5])
+        for row in live_rows
+    )
+    return totals
+
+
+def get_monthly_totals(
+    db: Session,
+    user_id: UUID,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    transaction_type: Optional[str] = None
+) -> Dict[Tuple[date, str], Decimal]:
+    """Tổng theo (tháng, loại giao dịch)"""
+    result: Dict[Tuple[date, str], Decimal] = defaultdict(Decimal)
+    for total in get_period_totals(db, user_id, date_from, date_to, transaction_type):
+        result[(total.PeriodMonth, total.TransactionType)] += total.TotalAmount
+    return dict(result)
+
+
+def get_category_totals(
+    db: Session,
+    user_id: UUID,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    transaction_type: Optional[str] = None
+) -> Dict[Tuple[UUID, str], Decimal]:
+    """Tổng theo (danh mục, loại giao dịch) trên cả khoảng"""
+    result: Dict[Tuple[UUID, str], Decimal] = defaultdict(Decimal)
+    for total in get_period_totals(db, user_id, date_from, date_to, transaction_type):
+        result[(total.UserCategoryID, total.TransactionType)] += total.TotalAmount
+    return dict(result)
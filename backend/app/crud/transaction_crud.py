@@ -1,28 +1,62 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func, case
+from sqlalchemy import and_, or_, desc, asc, func, case, insert, update, delete, select, false
+from sqlalchemy.exc import IntegrityError
 from uuid import UUID
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime, date
+from decimal import Decimal
 import json
+import logging
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import ValidationError
 
-from models.transaction import Transaction
+from models.transaction import Transaction, TransactionSearchToken, search_token_rows, set_normalized_columns
 from models.category import Category,UserCategory
 from schemas.transaction_schema import (
     TransactionCreate, 
     TransactionUpdate,
     TransactionResponse,
+    TransactionCreateResponse,
     TransactionFilter,
-    TransactionListResponse)
-from  crud.category_crud import get_category_display_name, get_user_category_id_by_display_name
+    TransactionListResponse,
+    TransactionBatchOperation)
+from crud.summary_crud import get_monthly_totals
+from services.alert_service import evaluate_budget_alerts
+from services.forecast_service import invalidate_user_forecast
+from services.notification_service import notify_balance_change, notify_budget_alerts, notify_transaction_created
+from  crud.category_crud import get_category_display_name, get_user_catalog, get_user_category_id_by_display_name, resolve_user_category_ids
+from app.utils.text_normalize import normalize_text, search_tokens, transaction_fingerprint
+
+logger = logging.getLogger("app.alerts")
+
+
+# (UserCategoryID, ngày, loại, số tiền có dấu): giá trị mới cộng vào, giá trị cũ (khi sửa/xoá) trừ đi
+TransactionChange = Tuple[UUID, date, str, Decimal]
+
+
+def _transactions_written(db: Session, user_id: UUID, changes: List[TransactionChange]) -> None:
+    """Gọi sau mỗi commit ghi giao dịch: bỏ model dự báo đã cache (nếu ghi vào khoảng
+    lịch sử đã fit), sinh cảnh báo cho các ngân sách bị ảnh hưởng và đẩy thay đổi
+    số dư/cảnh báo mới cho client.
+    Giao dịch đã commit nên lỗi khi đánh giá cảnh báo chỉ được ghi log."""
+    invalidate_user_forecast(user_id, [change[1] for change in changes if change[2] == 'expense'])
+    notify_balance_change(user_id, changes)
+    try:
+        alerts = evaluate_budget_alerts(db, user_id, [(change[0], change[1]) for change in changes])
+    except Exception:
+        db.rollback()
+        logger.exception("Không đánh giá được cảnh báo ngân sách cho user %s", user_id)
+    else:
+        notify_budget_alerts(user_id, alerts)
 
 
 def create_transaction(
     db: Session, 
     user_id: UUID, 
     transaction_data: TransactionCreate
-) -> TransactionResponse:
-    """Create a new transaction"""
+) -> TransactionCreateResponse:
+    """Create a new transaction (gắn cờ nếu trùng số tiền, ngày và mô tả với giao dịch đã có)"""
     user_category_id = get_user_category_id_by_display_name(
         db= db, 
         user_id=user_id,
@@ -34,6 +68,11 @@ def create_transaction(
             status_code=404,
             detail="Không tìm thấy danh mục phù hợp"
         )
+    dedup_key = transaction_fingerprint(
+        transaction_data.amount, transaction_data.transaction_date, transaction_data.description
+    )
+    duplicate_of = find_duplicate_transactions(db, user_id, [dedup_key]).get(dedup_key)
+
     db_transaction = Transaction(
         UserID=user_id,
         UserCategoryID=user_category_id,
@@ -49,10 +88,13 @@ def create_transaction(
     )
     db.add(db_transaction)
     db.commit()
+    _transactions_written(db, user_id, [(
+        user_category_id, transaction_data.transaction_date, transaction_data.transaction_type, transaction_data.amount
+    )])
     db.refresh(db_transaction)
 
     # Lấy tên hiển thị của danh mục
-    category_display_name = get_category_display_name(db, user_category_id)
+    category_display_name = get_category_display_name(db, user_category_id, user_id)
     
     # Chuyển đổi transaction object thành dict và thêm category_display_name
     transaction_dict = {
@@ -70,10 +112,120 @@ def create_transaction(
         'created_by': db_transaction.CreatedBy,
         'category_display_name': category_display_name,
         'CreatedAt': db_transaction.CreatedAt,
-        'UpdatedAt': db_transaction.UpdatedAt
+        'UpdatedAt': db_transaction.UpdatedAt,
+        'possible_duplicate': duplicate_of is not None,
+        'duplicate_of': duplicate_of
     }
     
-    return TransactionResponse(**transaction_dict)
+    response = TransactionCreateResponse(**transaction_dict)
+    if response.created_by == 'chatbot':
+        notify_transaction_created(user_id, response)
+    return response
+
+def find_duplicate_transactions(db: Session, user_id: UUID, dedup_keys: List[str]) -> Dict[str, UUID]:
+    """Tra DedupKey theo lô qua index (UserID, DedupKey); trả về khoá -> giao dịch đã có"""
+    if not dedup_keys:
+        return {}
+    rows = (
+        db.query(Transaction.DedupKey, Transaction.TransactionID)
+        .filter(Transaction.UserID == user_id, Transaction.DedupKey.in_(set(dedup_keys)))
+        .all()
+    )
+    return {row.DedupKey: row.TransactionID for row in rows}
+
+def get_existing_external_ids(db: Session, user_id: UUID, external_ids: List[str]) -> Set[str]:
+    """ExternalID nào trong danh sách đã được import trước đó"""
+    if not external_ids:
+        return set()
+    rows = (
+        db.query(Transaction.ExternalID)
+        .filter(Transaction.UserID == user_id, Transaction.ExternalID.in_(external_ids))
+        .all()
+    )
+    return {row.ExternalID for row in rows}
+
+
+def _insert_search_tokens(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Thêm token tìm kiếm cho các dòng được insert/update theo lô (không qua event của mapper)"""
+    token_rows = []
+    for row in rows:
+        token_rows.extend(search_token_rows(
+            row["UserID"], row["TransactionID"], row.get("Description"), row.get("Notes"), row.get("Location")
+        ))
+    if token_rows:
+        db.execute(insert(TransactionSearchToken), token_rows)
+
+
+def bulk_insert_transactions(db: Session, user_id: UUID, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Insert một lô giao dịch đã validate của một user trong một transaction.
+
+    Mỗi dòng là dict theo tên cột của bảng Transactions và có ExternalID;
+    dòng có ExternalID đã tồn tại bị bỏ qua. Dùng executemany (fast_executemany
+    của pyodbc) thay vì add() từng object. Trả về (số dòng insert, số dòng trùng).
+    """
+    for row in rows:
+        row["UserID"] = user_id
+    return bulk_insert_transactions_for_users(db, rows)
+
+# Giới hạn 2100 tham số mỗi câu lệnh của SQL Server
+_EXTERNAL_ID_CHUNK = 1000
+
+def _existing_external_keys(db: Session, rows: List[Dict[str, Any]]) -> Set[Tuple[UUID, str]]:
+    """(UserID, ExternalID) nào trong các dòng đã tồn tại - seek trên UX_Transactions_User_ExternalID"""
+    existing: Set[Tuple[UUID, str]] = set()
+    for start in range(0, len(rows), _EXTERNAL_ID_CHUNK):
+        chunk = rows[start:start + _EXTERNAL_ID_CHUNK]
+        existing.update(
+            (row.UserID, row.ExternalID)
+            for row in db.query(Transaction.UserID, Transaction.ExternalID)
+            .filter(
+                Transaction.UserID.in_({row["UserID"] for row in chunk}),
+                Transaction.ExternalID.in_({row["ExternalID"] for row in chunk})
+            )
+            .all()
+        )
+    return existing
+
+def bulk_insert_transactions_for_users(db: Session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Như bulk_insert_transactions nhưng các dòng (có cột UserID) thuộc nhiều user:
+    một lần insert và một commit cho cả lô, sau đó cập nhật dự báo/cảnh báo/thông
+    báo cho từng user như mọi lần ghi khác."""
+    if not rows:
+        return 0, 0
+
+    for attempt in range(2):
+        existing = _existing_external_keys(db, rows)
+        new_rows = [row for row in rows if (row["UserID"], row["ExternalID"]) not in existing]
+        if not new_rows:
+            return 0, len(rows)
+
+        now = datetime.utcnow()
+        for row in new_rows:
+            row.setdefault("TransactionID", uuid.uuid4())
+            row.setdefault("DedupKey", transaction_fingerprint(row["Amount"], row["TransactionDate"], row["Description"]))
+            set_normalized_columns(row)
+            row.setdefault("CreatedAt", now)
+            row.setdefault("UpdatedAt", now)
+        try:
+            db.execute(insert(Transaction), new_rows)
+            _insert_search_tokens(db, new_rows)
+            db.commit()
+        except IntegrityError:
+            # Ghi song song cùng ExternalID: đọc lại ExternalID đã có rồi thử lại một lần
+            db.rollback()
+            if attempt:
+                raise
+            continue
+
+        changes_by_user: Dict[UUID, List[TransactionChange]] = {}
+        for row in new_rows:
+            changes_by_user.setdefault(row["UserID"], []).append(
+                (row["UserCategoryID"], row["TransactionDate"], row["TransactionType"], row["Amount"])
+            )
+        for user_id, changes in changes_by_user.items():
+            _transactions_written(db, user_id, changes)
+        return len(new_rows), len(rows) - len(new_rows)
+    return 0, len(rows)
 
 def get_transaction_by_id(
     db: Session, 
@@ -95,7 +247,7 @@ def get_transaction_by_id(
             detail="Không tìm thấy giao dịch"
         )
     # Lấy tên hiển thị của danh mục
-    category_display_name = get_category_display_name(db, transaction.UserCategoryID)
+    category_display_name = get_category_display_name(db, transaction.UserCategoryID, transaction.UserID)
     
     # Chuyển đổi transaction object thành dict và thêm category_display_name
     transaction_dict = {
@@ -134,7 +286,7 @@ def get_transaction_by_id(
     if not transaction:
         return None
     # Lấy tên hiển thị của danh mục
-    category_display_name = get_category_display_name(db, transaction.UserCategoryID)
+    category_display_name = get_category_display_name(db, transaction.UserCategoryID, transaction.UserID)
     # Chuyển đổi transaction object thành dict và thêm category_display_name
     transaction_dict = {
         'TransactionID': transaction.TransactionID,
@@ -155,38 +307,36 @@ def get_transaction_by_id(
     }
     return TransactionResponse(**transaction_dict)
 
-def get_transactions(
-    db: Session, 
-    user_id: UUID, 
-    filters: TransactionFilter
-) -> TransactionListResponse:
-    """Get transactions with optional filters"""
-    # Build base query
-    query = (
-        db.query(Transaction, UserCategory, Category)
-        .join(UserCategory, Transaction.UserCategoryID == UserCategory.UserCategoryID)
-        .join(Category, UserCategory.CategoryID == Category.CategoryID)
-        .filter(Transaction.UserID == user_id)
-    )
+def _apply_transaction_filters(query, user_id: UUID, filters: TransactionFilter):
+    """Áp dụng các điều kiện của TransactionFilter (dùng chung cho list và export)"""
     # Apply filters
     if filters.transaction_type:
         query = query.filter(Transaction.TransactionType == filters.transaction_type)
     
     if filters.category_display_name:
+        # Subquery trên UserCategories của user thay vì join vào query chính
+        name_norm = normalize_text(filters.category_display_name)
         query = query.filter(
-            or_(
-                UserCategory.CustomName == filters.category_display_name,
-                and_(
-                    UserCategory.CustomName.is_(None),
-                    Category.CategoryName == filters.category_display_name
+            Transaction.UserCategoryID.in_(
+                select(UserCategory.UserCategoryID)
+                .outerjoin(Category, UserCategory.CategoryID == Category.CategoryID)
+                .where(
+                    UserCategory.UserID == user_id,
+                    or_(
+                        UserCategory.CustomNameNorm == name_norm,
+                        and_(UserCategory.CustomName.is_(None), Category.CategoryNameNorm == name_norm)
+                    )
                 )
             )
         )
+    # Khớp tiền tố trên cột chuẩn hoá: "tien" khớp "Tiền mặt", và LIKE 'x%' seek được
+    # index (UserID, PaymentMethodNorm/LocationNorm); '%x%' sẽ quét mọi giao dịch của user.
+    # normalize_text đã bỏ ký tự % và _ nên giá trị đưa vào LIKE không chứa wildcard
     if filters.payment_method:
-        query = query.filter(Transaction.PaymentMethod.ilike(f"%{filters.payment_method}%"))
+        query = query.filter(Transaction.PaymentMethodNorm.like(f"{normalize_text(filters.payment_method)}%"))
     
     if filters.location:
-        query = query.filter(Transaction.Location.ilike(f"%{filters.location}%"))
+        query = query.filter(Transaction.LocationNorm.like(f"{normalize_text(filters.location)}%"))
     
     if filters.date_from:
         query = query.filter(Transaction.TransactionDate >= filters.date_from)
@@ -199,26 +349,65 @@ def get_transactions(
         query = query.filter(Transaction.Amount <= filters.amount_max)
     
     if filters.search:
-        search_term = f"%{filters.search}%"
-        query = query.filter(
-            or_(
-                Transaction.Description.ilike(search_term),
-                Transaction.Notes.ilike(search_term)
+        # Mỗi từ khoá (đã bỏ dấu) phải khớp tiền tố của một token trong
+        # Description/Notes/Location; tra qua chỉ mục TransactionSearchTokens
+        # bằng index seek thay vì quét toàn bộ lịch sử với LIKE '%...%'
+        terms = search_tokens(filters.search)
+        if not terms:
+            return query.filter(false())
+        for term in terms:
+            query = query.filter(
+                Transaction.TransactionID.in_(
+                    select(TransactionSearchToken.TransactionID).where(
+                        TransactionSearchToken.UserID == user_id,
+                        TransactionSearchToken.Token.like(f"{term}%")
+                    )
+                )
             )
-        )
     if filters.created_by:
         query = query.filter(Transaction.CreatedBy == filters.created_by)
+    return query
+
+# Các cột của một dòng trong danh sách giao dịch (bỏ DedupKey, ExternalID, cột chuẩn hoá...)
+_LIST_COLUMNS = (
+    Transaction.TransactionID,
+    Transaction.UserCategoryID,
+    Transaction.TransactionType,
+    Transaction.Amount,
+    Transaction.Description,
+    Transaction.TransactionDate,
+    Transaction.TransactionTime,
+    Transaction.PaymentMethod,
+    Transaction.Location,
+    Transaction.Notes,
+    Transaction.CreatedBy,
+    Transaction.CreatedAt,
+    Transaction.UpdatedAt,
+)
+
+def get_transactions(
+    db: Session, 
+    user_id: UUID, 
+    filters: TransactionFilter
+) -> TransactionListResponse:
+    """Get transactions with optional filters
 
-    # Đếm tổng số lượng giao dịch
-    total_count = query.count()
+    Chỉ đọc bảng Transactions (không join UserCategories/Categories); tên
+    hiển thị của danh mục lấy từ catalogue đã cache của user.
+    """
+    query = db.query(Transaction).filter(Transaction.UserID == user_id)
+    query = _apply_transaction_filters(query, user_id, filters)
 
-    total_query = query.with_entities(
+    # Đếm và tính tổng trong cùng một câu aggregate
+    totals = query.with_entities(
+        func.count().label('total_count'),
         func.sum(case((Transaction.TransactionType == 'income', Transaction.Amount), else_=0)).label('total_income'),
         func.sum(case((Transaction.TransactionType == 'expense', Transaction.Amount), else_=0)).label('total_expense')
     ).first()
 
-    total_income = total_query.total_income if total_query.total_income else 0
-    total_expense = total_query.total_expense if total_query.total_expense else 0
+    total_count = totals.total_count or 0
+    total_income = totals.total_income if totals.total_income else Decimal(0)
+    total_expense = totals.total_expense if totals.total_expense else Decimal(0)
     net_amount = total_income - total_expense
 
     # Apply sorting - Updated to use sort_by instead of order_by
@@ -228,38 +417,46 @@ def get_transactions(
     else:
         query = query.order_by(asc(sort_field))
 
-    # Apply pagination
-    query = query.offset(filters.skip).limit(filters.limit)
+    # Chỉ lấy các cột trả về cho client, rồi phân trang
+    results = (
+        query.with_entities(*_LIST_COLUMNS)
+        .offset(filters.skip)
+        .limit(filters.limit)
+        .all()
+    )
 
-    # Execute query and get results
-    results = query.all()
+    category_names = get_user_catalog(db, user_id).names
 
     transactions = []
-    for transaction, user_category, category in results:
-        category_display_name = user_category.CustomName if user_category.CustomName else category.CategoryName
+    for row in results:
+        category_display_name = category_names.get(row.UserCategoryID)
+        if category_display_name is None:
+            # Danh mục tạo sau khi catalogue được cache (worker khác)
+            category_display_name = get_category_display_name(db, row.UserCategoryID)
         
-        # Chuyển đổi transaction object thành dict và thêm category_display_name
+        # Chuyển đổi dòng kết quả thành dict và thêm category_display_name
         transaction_dict = {
-            'TransactionID': transaction.TransactionID,
-            'UserID': transaction.UserID,
-            'UserCategoryID': transaction.UserCategoryID,
-            'transaction_type': transaction.TransactionType,
-            'amount': transaction.Amount,
-            'description': transaction.Description,
-            'transaction_date': transaction.TransactionDate,
-            'transaction_time': transaction.TransactionTime,
-            'payment_method': transaction.PaymentMethod,
-            'location': transaction.Location,
-            'notes': transaction.Notes,
-            'created_by': transaction.CreatedBy,
+            'TransactionID': row.TransactionID,
+            'UserID': user_id,
+            'UserCategoryID': row.UserCategoryID,
+            'transaction_type': row.TransactionType,
+            'amount': row.Amount,
+            'description': row.Description,
+            'transaction_date': row.TransactionDate,
+            'transaction_time': row.TransactionTime,
+            'payment_method': row.PaymentMethod,
+            'location': row.Location,
+            'notes': row.Notes,
+            'created_by': row.CreatedBy,
             'category_display_name': category_display_name,
-            'CreatedAt': transaction.CreatedAt,
-            'UpdatedAt': transaction.UpdatedAt
+            'CreatedAt': row.CreatedAt,
+            'UpdatedAt': row.UpdatedAt
         }
-        
-        transactions.append(TransactionResponse(**transaction_dict))
 
-    return TransactionListResponse(
+        # Dữ liệu lấy từ DB đã đúng kiểu: model_construct bỏ qua bước validate từng dòng
+        transactions.append(TransactionResponse.model_construct(**transaction_dict))
+
+    return TransactionListResponse.model_construct(
         transaction=transactions,  
         total_count=total_count,
         total_income=total_income,
@@ -267,6 +464,55 @@ def get_transactions(
         net_amount=net_amount
     )
 
+def query_transactions_for_export(
+    db: Session,
+    user_id: UUID,
+    filters: TransactionFilter,
+    after: Optional[Tuple[date, UUID]] = None,
+    batch_size: int = 1000
+):
+    """Query cho export: chỉ lấy các cột cần thiết, đọc theo lô bằng server-side cursor.
+
+    Sắp xếp theo (TransactionDate, TransactionID) để có thể tiếp tục từ dòng
+    cuối cùng đã nhận (keyset) thay vì OFFSET.
+    """
+    display_name = func.coalesce(UserCategory.CustomName, Category.CategoryName).label("category_display_name")
+    query = (
+        db.query(
+            Transaction.TransactionID,
+            Transaction.TransactionDate,
+            Transaction.TransactionTime,
+            Transaction.TransactionType,
+            Transaction.Amount,
+            display_name,
+            Transaction.Description,
+            Transaction.PaymentMethod,
+            Transaction.Location,
+            Transaction.Notes,
+            Transaction.CreatedBy,
+            Transaction.CreatedAt,
+        )
+        .join(UserCategory, Transaction.UserCategoryID == UserCategory.UserCategoryID)
+        # Danh mục tự tạo có CategoryID NULL: outer join để export không bỏ sót chúng
+        .outerjoin(Category, UserCategory.CategoryID == Category.CategoryID)
+        .filter(Transaction.UserID == user_id)
+    )
+    query = _apply_transaction_filters(query, user_id, filters)
+
+    if after:
+        after_date, after_id = after
+        query = query.filter(
+            or_(
+                Transaction.TransactionDate > after_date,
+                and_(Transaction.TransactionDate == after_date, Transaction.TransactionID > after_id)
+            )
+        )
+
+    return (
+        query.order_by(asc(Transaction.TransactionDate), asc(Transaction.TransactionID))
+        .yield_per(batch_size)
+    )
+
 def update_transaction(
     db: Session, 
     user_id: UUID, 
@@ -288,6 +534,8 @@ def update_transaction(
             detail="Không tìm thấy giao dịch"
         )
 
+    previous = (transaction.UserCategoryID, transaction.TransactionDate, transaction.TransactionType, -transaction.Amount)
+
     # Cập nhật danh mục nếu cần
     if transaction_data.category_display_name:
         user_category_id = get_user_category_id_by_display_name(
@@ -323,9 +571,13 @@ def update_transaction(
 
     db.commit()
     db.refresh(transaction)
+    _transactions_written(db, user_id, [
+        previous,
+        (transaction.UserCategoryID, transaction.TransactionDate, transaction.TransactionType, transaction.Amount)
+    ])
 
     # Lấy tên hiển thị của danh mục
-    category_display_name = get_category_display_name(db, transaction.UserCategoryID)
+    category_display_name = get_category_display_name(db, transaction.UserCategoryID, transaction.UserID)
     
     # Chuyển đổi transaction object thành dict và thêm category_display_name
     transaction_dict = {
@@ -362,8 +614,10 @@ def delete_transaction(db: Session, transaction_id: UUID, user_id: UUID) -> bool
     if not transaction:
         return False
     
+    previous = (transaction.UserCategoryID, transaction.TransactionDate, transaction.TransactionType, -transaction.Amount)
     db.delete(transaction)
     db.commit()
+    _transactions_written(db, user_id, [previous])
     return True
 
 def get_transaction_summary(
@@ -372,21 +626,11 @@ def get_transaction_summary(
     date_from: Optional[date] = None, 
     date_to: Optional[date] = None
 ) -> dict:
-    """Get transaction summary for a user"""
-    query = db.query(
-        func.sum(case((Transaction.TransactionType == 'income', Transaction.Amount), else_=0)).label('total_income'),
-        func.sum(case((Transaction.TransactionType == 'expense', Transaction.Amount), else_=0)).label('total_expense')
-    ).filter(Transaction.UserID == user_id)
-
-    if date_from:
-        query = query.filter(Transaction.TransactionDate >= date_from)
-    if date_to:
-        query = query.filter(Transaction.TransactionDate <= date_to)
+    """Get transaction summary for a user (tháng đã chốt đọc snapshot, phần còn lại đọc tổng theo ngày)"""
+    totals = get_monthly_totals(db, user_id, date_from, date_to)
 
-    result = query.first()
-
-    # Nếu không có kết quả hoặc tất cả đều None
-    if not result or (result.total_income is None and result.total_expense is None):
+    # Không có giao dịch nào trong khoảng
+    if not totals:
         return {
             "message": "Không có giao dịch trong khoảng thời gian này",
             "total_income": 0,
@@ -394,11 +638,274 @@ def get_transaction_summary(
             "net_amount": 0
         }
 
-    total_income = result.total_income or 0
-    total_expense = result.total_expense or 0
+    total_income = sum(amount for (_, kind), amount in totals.items() if kind == 'income')
+    total_expense = sum(amount for (_, kind), amount in totals.items() if kind == 'expense')
 
     return {
         'total_income': total_income,
         'total_expense': total_expense,
         'net_amount': total_income - total_expense
     }
+
+# ==================== BATCH ====================
+
+# Tên field trong schema -> tên cột của bảng Transactions
+_TRANSACTION_COLUMNS = {
+    'transaction_type': 'TransactionType',
+    'amount': 'Amount',
+    'description': 'Description',
+    'transaction_date': 'TransactionDate',
+    'transaction_time': 'TransactionTime',
+    'payment_method': 'PaymentMethod',
+    'location': 'Location',
+    'notes': 'Notes',
+    'created_by': 'CreatedBy',
+}
+
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first.get("loc", ()))
+    return f"{location}: {first['msg']}" if location else first['msg']
+
+
+def apply_transaction_batch(
+    db: Session,
+    user_id: UUID,
+    operations: List[TransactionBatchOperation],
+    all_or_nothing: bool = False
+) -> Dict[str, Any]:
+    """Áp dụng một danh sách create/update/delete trong một transaction.
+
+    Các thao tác được gộp theo thứ tự trong bộ nhớ (create rồi update cùng ID
+    chỉ còn một INSERT, create rồi delete thì không chạm DB, delete rồi create
+    cùng ID là DELETE rồi INSERT), sau đó chạy tối đa một DELETE, một
+    executemany INSERT và một bulk UPDATE theo khoá chính - DELETE chạy trước.
+    Giao dịch hiện có và danh mục đều được tra một lần cho cả batch; ID do
+    client chọn cho create mà đã thuộc user khác là lỗi của riêng thao tác đó.
+    """
+    results: List[Dict[str, Any]] = []
+    parsed: List[Any] = []
+    fingerprint_state: Dict[UUID, Dict[str, Any]] = {}
+    previous: Dict[UUID, TransactionChange] = {}
+
+    # 1. Validate dữ liệu của từng thao tác
+    for index, operation in enumerate(operations):
+        result = {
+            "index": index,
+            "client_id": operation.client_id,
+            "op": operation.op,
+            "status": "ok",
+            "transaction_id": operation.transaction_id,
+            "error": None,
+        }
+        results.append(result)
+        payload = None
+        try:
+            if operation.op == "create":
+                payload = TransactionCreate(**(operation.data or {}))
+                if result["transaction_id"] is None:
+                    result["transaction_id"] = uuid.uuid4()
+            elif operation.transaction_id is None:
+                raise ValueError("transaction_id là bắt buộc")
+            elif operation.op == "update":
+                payload = TransactionUpdate(**(operation.data or {}))
+        except ValidationError as e:
+            result.update(status="error", error=_validation_message(e))
+        except ValueError as e:
+            result.update(status="error", error=str(e))
+        parsed.append(payload)
+
+    # 2. Một query cho mọi giao dịch hiện có được tham chiếu - không lọc theo
+    # user để phát hiện ID create trùng với giao dịch của user khác
+    referenced = {r["transaction_id"] for r in results if r["status"] == "ok" and r["transaction_id"]}
+    existing: Dict[UUID, Any] = {}
+    taken: Set[UUID] = set()
+    if referenced:
+        rows = (
+            db.query(
+                Transaction.TransactionID,
+                Transaction.UserID,
+                Transaction.TransactionType,
+                Transaction.UserCategoryID,
+                Transaction.Amount,
+                Transaction.TransactionDate,
+                Transaction.Description,
+                Transaction.Notes,
+                Transaction.Location
+            )
+            .filter(Transaction.TransactionID.in_(referenced))
+            .all()
+        )
+        taken = {row.TransactionID for row in rows if row.UserID != user_id}
+        rows = [row for row in rows if row.UserID == user_id]
+        existing = {row.TransactionID: row.TransactionType for row in rows}
+        # Giá trị trước khi sửa/xoá (số tiền âm) - cho ngân sách bị ảnh hưởng và chênh lệch số dư
+        previous = {
+            row.TransactionID: (row.UserCategoryID, row.TransactionDate, row.TransactionType, -row.Amount)
+            for row in rows
+        }
+        # Giá trị hiện tại của các cột tạo DedupKey và token tìm kiếm, để tính lại khi update một phần
+        fingerprint_state = {
+            row.TransactionID: {
+                'Amount': row.Amount,
+                'TransactionDate': row.TransactionDate,
+                'Description': row.Description,
+                'Notes': row.Notes,
+                'Location': row.Location,
+            }
+            for row in rows
+        }
+
+    # 3. Tính loại giao dịch hiệu lực của từng thao tác để tra danh mục theo lô
+    types: Dict[UUID, str] = dict(existing)
+    category_keys = set()
+    for result, payload in zip(results, parsed):
+        if result["status"] != "ok" or payload is None:
+            continue
+        transaction_id = result["transaction_id"]
+        transaction_type = payload.transaction_type or types.get(transaction_id)
+        if transaction_type:
+            types[transaction_id] = transaction_type
+            if payload.category_display_name:
+                category_keys.add((payload.category_display_name, transaction_type))
+    category_ids = resolve_user_category_ids(db, user_id, category_keys)
+
+    # 4. Gộp các thao tác theo thứ tự
+    now = datetime.utcnow()
+    creates: Dict[UUID, Dict[str, Any]] = {}
+    updates: Dict[UUID, Dict[str, Any]] = {}
+    deletes: Set[UUID] = set()
+    current_types: Dict[UUID, str] = dict(existing)
+
+    for result, payload in zip(results, parsed):
+        if result["status"] != "ok":
+            continue
+        transaction_id = result["transaction_id"]
+        op = result["op"]
+        try:
+            if op == "create":
+                if (
+                    transaction_id in taken
+                    or transaction_id in creates
+                    or (transaction_id in current_types and transaction_id not in deletes)
+                ):
+                    raise ValueError("Giao dịch đã tồn tại")
+                user_category_id = category_ids.get((payload.category_display_name, payload.transaction_type))
+                if not user_category_id:
+                    raise ValueError("Không tìm thấy danh mục phù hợp")
+                creates[transaction_id] = {
+                    'TransactionID': transaction_id,
+                    'UserID': user_id,
+                    'UserCategoryID': user_category_id,
+                    'TransactionType': payload.transaction_type,
+                    'Amount': payload.amount,
+                    'Description': payload.description,
+                    'TransactionDate': payload.transaction_date,
+                    'TransactionTime': payload.transaction_time or now.time(),
+                    'PaymentMethod': payload.payment_method,
+                    'Location': payload.location,
+                    'Notes': payload.notes,
+                    'CreatedBy': payload.created_by,
+                    'CreatedAt': now,
+                    'UpdatedAt': now,
+                    'ExternalID': None,
+                }
+                # Giữ lại delete trước đó (nếu có): dòng cũ bị xoá trước khi INSERT
+                current_types[transaction_id] = payload.transaction_type
+            elif op == "update":
+                if transaction_id not in creates and (transaction_id in deletes or transaction_id not in current_types):
+                    raise ValueError("Không tìm thấy giao dịch")
+                values = {
+                    _TRANSACTION_COLUMNS[key]: value
+                    for key, value in payload.model_dump(exclude_unset=True, exclude={'category_display_name'}).items()
+                    if key in _TRANSACTION_COLUMNS
+                }
+                transaction_type = values.get('TransactionType', current_types[transaction_id])
+                if payload.category_display_name:
+                    user_category_id = category_ids.get((payload.category_display_name, transaction_type))
+                    if not user_category_id:
+                        raise ValueError("Không tìm thấy danh mục phù hợp")
+                    values['UserCategoryID'] = user_category_id
+                current_types[transaction_id] = transaction_type
+                if transaction_id in creates:
+                    creates[transaction_id].update(values)
+                else:
+                    updates.setdefault(transaction_id, {'TransactionID': transaction_id}).update(values, UpdatedAt=now)
+            else:
+                if transaction_id in creates:
+                    del creates[transaction_id]
+                    del current_types[transaction_id]
+                elif transaction_id in deletes or transaction_id not in current_types:
+                    raise ValueError("Không tìm thấy giao dịch")
+                else:
+                    updates.pop(transaction_id, None)
+                    deletes.add(transaction_id)
+        except ValueError as e:
+            result.update(status="error", error=str(e))
+
+    failed = sum(1 for r in results if r["status"] == "error")
+    committed = not (all_or_nothing and failed)
+
+    # 5. Thực thi bằng các câu lệnh theo lô, commit một lần
+    if committed and (creates or updates or deletes):
+        # Insert/update theo lô không qua event của mapper nên tự tính DedupKey
+        for row in creates.values():
+            row['DedupKey'] = transaction_fingerprint(row['Amount'], row['TransactionDate'], row['Description'])
+            set_normalized_columns(row)
+        for transaction_id, values in updates.items():
+            set_normalized_columns(values)
+            if {'Amount', 'TransactionDate', 'Description'} & values.keys():
+                state = {**fingerprint_state[transaction_id], **values}
+                values['DedupKey'] = transaction_fingerprint(state['Amount'], state['TransactionDate'], state['Description'])
+        reindexed = [
+            {**fingerprint_state[transaction_id], **values, 'UserID': user_id}
+            for transaction_id, values in updates.items()
+            if {'Description', 'Notes', 'Location'} & values.keys()
+        ]
+        try:
+            if deletes:
+                db.execute(
+                    delete(Transaction)
+                    .where(Transaction.UserID == user_id, Transaction.TransactionID.in_(deletes))
+                    .execution_options(synchronize_session=False)
+                )
+            if creates:
+                db.execute(insert(Transaction), list(creates.values()))
+                _insert_search_tokens(db, list(creates.values()))
+            if updates:
+                db.execute(update(Transaction), list(updates.values()))
+            if reindexed:
+                db.execute(
+                    delete(TransactionSearchToken)
+                    .where(TransactionSearchToken.TransactionID.in_([row['TransactionID'] for row in reindexed]))
+                    .execution_options(synchronize_session=False)
+                )
+                _insert_search_tokens(db, reindexed)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        changes = [
+            (row['UserCategoryID'], row['TransactionDate'], row['TransactionType'], row['Amount'])
+            for row in creates.values()
+        ]
+        changes.extend(previous[transaction_id] for transaction_id in list(updates) + list(deletes))
+        for transaction_id, values in updates.items():
+            category_id, transaction_date, transaction_type, amount = previous[transaction_id]
+            changes.append((
+                values.get('UserCategoryID', category_id),
+                values.get('TransactionDate', transaction_date),
+                values.get('TransactionType', transaction_type),
+                values.get('Amount', -amount)
+            ))
+        _transactions_written(db, user_id, changes)
+    else:
+        db.rollback()
+
+    return {
+        "committed": committed,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
+from app.utils import metrics
 import urllib
 
 params = urllib.parse.quote_plus(
@@ -29,6 +30,7 @@ DATABASE_URL = f"mssql+pyodbc:///?odbc_connect={params}"
 # Create engine & session
 engine = create_engine(DATABASE_URL, echo=True, fast_executemany=True)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+metrics.register_engine(__name__, engine)
 Base = declarative_base()
 
 # Database dependency
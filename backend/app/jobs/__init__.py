@@ -0,0 +1,12 @@
+# jobs/__init__.py
+"""Các batch job chạy ngoài request, gọi từ thư mục backend:
+
+    python -m app.jobs.<tên_job>
+"""
+import sys
+from pathlib import Path
+
+# Code trong app dùng cả import kiểu "app.xxx" lẫn "xxx" (crud, models...)
+_APP_DIR = str(Path(__file__).resolve().parent.parent)
+if _APP_DIR not in sys.path:
+    sys.path.insert(0, _APP_DIR)
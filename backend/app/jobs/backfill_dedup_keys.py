@@ -0,0 +1,57 @@
+# jobs/backfill_dedup_keys.py
+"""Tính DedupKey cho các giao dịch tạo trước khi có cột này.
+
+    python -m app.jobs.backfill_dedup_keys --batch-size 5000
+"""
+import argparse
+
+from sqlalchemy import update
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from models.transaction import Transaction
+from app.utils.text_normalize import transaction_fingerprint
+
+
+def backfill(batch_size: int = 5000) -> int:
+    db = SessionLocal()
+    total = 0
+    try:
+        while True:
+            rows = (
+                db.query(
+                    Transaction.TransactionID,
+                    Transaction.Amount,
+                    Transaction.TransactionDate,
+                    Transaction.Description
+                )
+                .filter(Transaction.DedupKey.is_(None))
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            db.execute(update(Transaction), [
+                {
+                    "TransactionID": row.TransactionID,
+                    "DedupKey": transaction_fingerprint(row.Amount, row.TransactionDate, row.Description),
+                }
+                for row in rows
+            ])
+            db.commit()
+            total += len(rows)
+            print(f"Đã cập nhật {total} giao dịch")
+    finally:
+        db.close()
+    return total
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tính DedupKey cho giao dịch cũ")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+    print(f"Hoàn tất: {backfill(args.batch_size)} giao dịch")
+
+
+if __name__ == "__main__":
+    main()
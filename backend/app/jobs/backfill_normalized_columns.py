@@ -0,0 +1,95 @@
+# jobs/backfill_normalized_columns.py
+"""Tính các cột chuẩn hoá (PaymentMethodNorm, LocationNorm, CategoryNameNorm,
+CustomNameNorm) cho dữ liệu tạo trước khi có các cột này hoặc insert thẳng
+bằng SQL (vd. data_sample.sql).
+
+    python -m app.jobs.backfill_normalized_columns --batch-size 5000
+"""
+import argparse
+
+from sqlalchemy import and_, or_, update
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from models.category import Category, UserCategory
+from models.transaction import Transaction
+from app.utils.text_normalize import normalize_text
+
+
+def _backfill_categories(db) -> int:
+    rows = db.query(Category.CategoryID, Category.CategoryName).filter(Category.CategoryNameNorm.is_(None)).all()
+    if rows:
+        db.execute(update(Category), [
+            {"CategoryID": row.CategoryID, "CategoryNameNorm": normalize_text(row.CategoryName) or None}
+            for row in rows
+        ])
+        db.commit()
+    return len(rows)
+
+
+def _backfill_user_categories(db) -> int:
+    rows = (
+        db.query(UserCategory.UserCategoryID, UserCategory.CustomName)
+        .filter(UserCategory.CustomName.isnot(None), UserCategory.CustomNameNorm.is_(None))
+        .all()
+    )
+    if rows:
+        db.execute(update(UserCategory), [
+            {"UserCategoryID": row.UserCategoryID, "CustomNameNorm": normalize_text(row.CustomName) or None}
+            for row in rows
+        ])
+        db.commit()
+    return len(rows)
+
+
+def _backfill_transactions(db, batch_size: int) -> int:
+    total = 0
+    last_id = None
+    pending = or_(
+        and_(Transaction.PaymentMethod.isnot(None), Transaction.PaymentMethodNorm.is_(None)),
+        and_(Transaction.Location.isnot(None), Transaction.LocationNorm.is_(None))
+    )
+    while True:
+        query = db.query(Transaction.TransactionID, Transaction.PaymentMethod, Transaction.Location).filter(pending)
+        if last_id is not None:
+            # Giá trị chỉ gồm dấu câu vẫn chuẩn hoá thành NULL, nên đi theo keyset để không lặp lại
+            query = query.filter(Transaction.TransactionID > last_id)
+        rows = query.order_by(Transaction.TransactionID).limit(batch_size).all()
+        if not rows:
+            break
+        db.execute(update(Transaction), [
+            {
+                "TransactionID": row.TransactionID,
+                "PaymentMethodNorm": normalize_text(row.PaymentMethod) or None,
+                "LocationNorm": normalize_text(row.Location) or None,
+            }
+            for row in rows
+        ])
+        db.commit()
+        last_id = rows[-1].TransactionID
+        total += len(rows)
+        print(f"Đã cập nhật {total} giao dịch")
+    return total
+
+
+def backfill(batch_size: int = 5000) -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            "categories": _backfill_categories(db),
+            "user_categories": _backfill_user_categories(db),
+            "transactions": _backfill_transactions(db, batch_size),
+        }
+    finally:
+        db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tính các cột chuẩn hoá cho dữ liệu cũ")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+    print(f"Hoàn tất: {backfill(args.batch_size)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# jobs/close_periods.py
+"""Chốt số liệu các tháng đã đóng (PeriodSnapshots/MonthlyCategoryTotals).
+Chạy hằng đêm: chốt tháng vừa đóng và chốt lại tháng có giao dịch bị sửa muộn
+(snapshot của tháng đó đã bị trigger xoá).
+
+    python -m app.jobs.close_periods
+    python -m app.jobs.close_periods --as-of 2026-10-01 --user-id <UUID>
+"""
+import argparse
+from datetime import date
+from uuid import UUID
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from crud.summary_crud import close_periods
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Chốt tổng hợp giao dịch của các tháng đã đóng")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Chốt các tháng trước tháng chứa ngày này (mặc định hôm nay)")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        print(f"Hoàn tất: đã chốt {close_periods(db, as_of=args.as_of, user_id=args.user_id)} tháng")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
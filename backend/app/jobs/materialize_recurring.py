@@ -0,0 +1,34 @@
+# jobs/materialize_recurring.py
+"""Tạo giao dịch cho các kỳ đến hạn của mọi giao dịch định kỳ (lương, tiền nhà,
+thuê bao...), bù cả các ngày job không chạy. Chạy hằng ngày (hoặc nhiều lần
+trong ngày) - chạy lại không tạo trùng.
+
+    python -m app.jobs.materialize_recurring
+    python -m app.jobs.materialize_recurring --as-of 2026-10-19
+"""
+import argparse
+from datetime import date
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from crud.recurring_crud import materialize_due_recurring
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tạo giao dịch cho các kỳ đến hạn của giao dịch định kỳ")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Tạo các kỳ đến hết ngày này (mặc định hôm nay)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Số định nghĩa mỗi lô (một lần insert)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        inserted, skipped = materialize_due_recurring(db, as_of=args.as_of, batch_size=args.batch_size)
+        print(f"Hoàn tất: tạo {inserted} giao dịch, bỏ qua {skipped} kỳ đã có")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# jobs/provision_user_categories.py
+"""Tạo UserCategory cho các danh mục hệ thống mà user cũ chưa có (trước đây
+được tạo dần lúc user ghi giao dịch đầu tiên vào danh mục đó).
+
+    python -m app.jobs.provision_user_categories
+"""
+import argparse
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from crud.category_crud import provision_default_user_categories
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tạo sẵn danh mục mặc định cho mọi user")
+    parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        print(f"Hoàn tất: đã tạo {provision_default_user_categories(db)} user category")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# jobs/rebuild_daily_totals.py
+"""Tính lại bảng tổng hợp DailyCategoryTotals từ Transactions, từng user một
+(mỗi user một transaction để không khoá cả bảng).
+
+    python -m app.jobs.rebuild_daily_totals
+    python -m app.jobs.rebuild_daily_totals --user-id <UUID>
+"""
+import argparse
+from uuid import UUID
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from crud.summary_crud import rebuild_daily_totals
+from models.user_model import User
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tính lại tổng hợp giao dịch theo ngày/danh mục")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        else:
+            user_ids = [row.UserID for row in db.query(User.UserID).order_by(User.UserID).all()]
+        total = 0
+        for index, user_id in enumerate(user_ids, 1):
+            total += rebuild_daily_totals(db, user_id=user_id)
+            if index % 100 == 0:
+                print(f"Đã tính {index}/{len(user_ids)} user")
+        print(f"Hoàn tất: {total} dòng tổng hợp cho {len(user_ids)} user")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# jobs/rebuild_search_index.py
+"""Tạo lại token tìm kiếm (TransactionSearchTokens) cho toàn bộ giao dịch.
+
+    python -m app.jobs.rebuild_search_index --batch-size 2000
+"""
+import argparse
+
+from sqlalchemy import delete, insert
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from models.transaction import Transaction, TransactionSearchToken, search_token_rows
+
+
+def rebuild(batch_size: int = 2000) -> int:
+    db = SessionLocal()
+    total = 0
+    last_id = None
+    try:
+        while True:
+            query = db.query(
+                Transaction.TransactionID,
+                Transaction.UserID,
+                Transaction.Description,
+                Transaction.Notes,
+                Transaction.Location
+            )
+            if last_id is not None:
+                query = query.filter(Transaction.TransactionID > last_id)
+            rows = query.order_by(Transaction.TransactionID).limit(batch_size).all()
+            if not rows:
+                break
+
+            ids = [row.TransactionID for row in rows]
+            db.execute(delete(TransactionSearchToken).where(TransactionSearchToken.TransactionID.in_(ids)))
+            token_rows = []
+            for row in rows:
+                token_rows.extend(search_token_rows(
+                    row.UserID, row.TransactionID, row.Description, row.Notes, row.Location
+                ))
+            if token_rows:
+                db.execute(insert(TransactionSearchToken), token_rows)
+            db.commit()
+
+            last_id = ids[-1]
+            total += len(rows)
+            print(f"Đã lập chỉ mục {total} giao dịch")
+    finally:
+        db.close()
+    return total
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tạo lại chỉ mục tìm kiếm giao dịch")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+    print(f"Hoàn tất: {rebuild(args.batch_size)} giao dịch")
+
+
+if __name__ == "__main__":
+    main()
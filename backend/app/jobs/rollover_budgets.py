@@ -0,0 +1,38 @@
+# jobs/rollover_budgets.py
+"""Rollover ngân sách cho mọi user: chốt các ngân sách đã hết kỳ (IsActive = 0,
+lưu thực chi cuối kỳ) và tạo kỳ kế tiếp theo BudgetType kèm BudgetCategories;
+ngân sách AutoAdjust được điều chỉnh phân bổ theo thực chi kỳ vừa qua.
+Chạy hằng đêm, chạy lại không tạo trùng.
+
+    python -m app.jobs.rollover_budgets
+    python -m app.jobs.rollover_budgets --as-of 2026-11-01 --batch-size 10000
+"""
+import argparse
+from datetime import date
+from decimal import Decimal
+
+import app.jobs  # noqa: F401  (thiết lập sys.path)
+from database import SessionLocal
+from crud.budget_crud import ROLLOVER_ADJUST_WEIGHT, rollover_budgets
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Chốt ngân sách hết kỳ và tạo kỳ kế tiếp")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Rollover các ngân sách kết thúc trước ngày này (mặc định hôm nay)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Số ngân sách mỗi transaction")
+    parser.add_argument("--adjust-weight", type=Decimal, default=ROLLOVER_ADJUST_WEIGHT,
+                        help="Trọng số thực chi khi AutoAdjust (0 = giữ phân bổ, 1 = theo đúng thực chi)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rolled = rollover_budgets(db, as_of=args.as_of, batch_size=args.batch_size, adjust_weight=args.adjust_weight)
+        print(f"Hoàn tất: đã rollover {rolled} ngân sách")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
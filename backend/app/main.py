@@ -1,26 +1,64 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 from app.models import *
+from app.config import settings
+from app.utils import query_stats, metrics, profiler, pubsub
+from app.utils.json_response import FastJSONResponse
 
-from app.routes import auth_routes,transaction_routes, category_routes ,budget_routes , chatbot_routes
+from app.routes import auth_routes,transaction_routes, category_routes ,budget_routes , chatbot_routes, metrics_routes, admin_routes, events_routes, recurring_routes
 # ,user_routes 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    pubsub.configure(settings.PUBSUB_BACKEND, settings.PUBSUB_REDIS_URL)
+    # Nhận lệnh bật/tắt profiling do worker khác phát
+    profiler_commands = asyncio.create_task(profiler.PROFILER.follow(app))
     yield
+    profiler_commands.cancel()
     print("===== All Routes (lifespan startup) =====")
     for route in app.routes:
         print(f"[ROUTE] {route.path} - {route.methods}")
 
 # ✅ chỉ tạo app 1 lần duy nhất
-app = FastAPI(lifespan=lifespan)
+# FastJSONResponse (orjson) trả UTF-8 trực tiếp cho mọi route
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+db_logger = logging.getLogger("app.db")
+query_stats.install()
 
 @app.middleware("http")
-async def add_utf8_header(request, call_next):
-    response = await call_next(request)
-    if response.headers.get("content-type", "").startswith("application/json"):
-        response.headers["content-type"] = "application/json; charset=utf-8"
+async def db_query_stats(request, call_next):
+    stats, token = query_stats.start_request()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.end_request(token)
+
+    metrics.HTTP_DB_QUERIES.labels(metrics.route_template(request.scope)).observe(stats.query_count)
+    if settings.DB_STATS_HEADERS:
+        response.headers.update(stats.as_headers())
+
+    fields = {"method": request.method, "path": request.url.path, **stats.as_log_fields()}
+    violations = stats.budget_violations(settings.DB_QUERY_BUDGET, settings.DB_TIME_BUDGET_MS)
+    if violations:
+        if settings.DB_STATS_HEADERS:
+            response.headers["X-DB-Budget-Exceeded"] = ",".join(violations)
+        offenders = stats.offenders()
+        db_logger.warning(
+            "DB budget exceeded (%s) on %s %s: %d queries, %.1f ms\n%s",
+            ",".join(violations), request.method, request.url.path,
+            stats.query_count, stats.total_ms,
+            "\n".join(
+                f"  x{o['count']} {o['total_ms']}ms {o['sql']} params={o['parameters']}"
+                for o in offenders
+            ),
+            extra={**fields, "db_budget_exceeded": violations, "db_offenders": offenders},
+        )
+    else:
+        db_logger.debug("DB stats %s %s", request.method, request.url.path, extra=fields)
     return response
 
 # ✅ Middleware
@@ -31,6 +69,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Profiler đứng trong MetricsMiddleware; không có route nào bật thì gần như không tốn gì
+app.add_middleware(profiler.ProfilerMiddleware)
+# Thêm sau cùng để là lớp ngoài cùng: đo cả thời gian của các middleware khác
+app.add_middleware(metrics.MetricsMiddleware)
 
 # ✅ Router đăng ký sau khi app được tạo
 app.include_router(auth_routes.router)
@@ -38,4 +80,8 @@ app.include_router(chatbot_routes.router)
 app.include_router(category_routes.router)
 app.include_router(budget_routes.router)
 app.include_router(transaction_routes.router)
+app.include_router(recurring_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(admin_routes.router)
+app.include_router(events_routes.router)
 # app.include_router(user_routes.router)
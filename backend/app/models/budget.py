@@ -28,6 +28,8 @@ class Budget(Base):
     AutoAdjust = Column(Boolean, default=False)       # auto_adjust
     AlertThreshold = Column(Numeric(5,2), default=80.0)  # alert_threshold
     IsActive = Column(Boolean, default=True)          # is_active
+    # Ngân sách kỳ trước mà ngân sách này được tạo ra từ đó (job rollover_budgets)
+    PreviousBudgetID = Column(UNIQUEIDENTIFIER, nullable=True)
     
     # Timestamps
     CreatedAt = Column(DateTime, default=datetime.utcnow)
@@ -77,6 +79,8 @@ class BudgetAlert(Base):
     PercentageUsed = Column(Numeric(5,2), nullable=False) # percentage_used
     Message = Column(Text, nullable=True)                 # message
     IsRead = Column(Boolean, default=False)               # is_read
+    # Kỳ ngân sách lúc phát sinh cảnh báo: mỗi (ngân sách, danh mục, loại) chỉ một cảnh báo mỗi kỳ
+    PeriodStart = Column(Date, nullable=True)
     
     # Timestamp
     CreatedAt = Column(DateTime, default=datetime.utcnow)
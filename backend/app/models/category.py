@@ -1,8 +1,9 @@
 # models/category_model.py
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, text, Unicode
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, text, Unicode, event
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.utils.text_normalize import normalize_text
 from datetime import datetime
 import uuid
 
@@ -16,6 +17,8 @@ class Category(Base):
         server_default=text("NEWID()")
     )
     CategoryName = Column(Unicode(100), nullable=False, index=True)
+    # CategoryName đã bỏ dấu, chữ thường - tra theo tên không phân biệt dấu
+    CategoryNameNorm = Column(Unicode(100), nullable=True)
     CategoryType = Column(Unicode(50), nullable=False, index=True)
     ParentCategoryID = Column( UNIQUEIDENTIFIER,nullable=True)
     Description = Column(Unicode(500), nullable=True)
@@ -54,6 +57,7 @@ class UserCategory(Base):
         index=True
     )
     CustomName = Column(Unicode(100), nullable=True)
+    CustomNameNorm = Column(Unicode(100), nullable=True)
     CategoryType = Column(String(50), nullable=False)
     IsActive = Column(Boolean, default=True, nullable=False, index=True)
     CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -68,4 +72,16 @@ class UserCategory(Base):
     )
     
     # def __repr__(self):
-    #     return f"<UserCategory(UserCategoryID={self.UserCategoryID}, UserID={self.UserID}, CategoryID={self.CategoryID})>"
\ No newline at end of file
+    #     return f"<UserCategory(UserCategoryID={self.UserCategoryID}, UserID={self.UserID}, CategoryID={self.CategoryID})>"
+
+
+@event.listens_for(Category, "before_insert")
+@event.listens_for(Category, "before_update")
+def _set_category_name_norm(mapper, connection, target):
+    target.CategoryNameNorm = normalize_text(target.CategoryName) or None
+
+
+@event.listens_for(UserCategory, "before_insert")
+@event.listens_for(UserCategory, "before_update")
+def _set_custom_name_norm(mapper, connection, target):
+    target.CustomNameNorm = normalize_text(target.CustomName) or None
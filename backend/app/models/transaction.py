@@ -1,13 +1,15 @@
 # transaction_model.py
-from sqlalchemy import Column, String, Date, Time, Boolean, ForeignKey, Numeric, DateTime, Unicode
+from sqlalchemy import Column, String, Date, Time, Boolean, ForeignKey, Integer, Numeric, DateTime, Unicode, event, inspect, insert, delete
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
 from sqlalchemy.orm import relationship
 from database import Base
+from app.utils.text_normalize import normalize_text, search_tokens, transaction_fingerprint
 from datetime import datetime
 import uuid
 class Transaction(Base):
     __tablename__ = "Transactions"
-    __table_args__ = {'extend_existing': True}
+    # Bảng có trigger (UpdatedAt, DailyCategoryTotals): SQL Server không cho OUTPUT không INTO trên bảng có trigger
+    __table_args__ = {'extend_existing': True, 'implicit_returning': False}
 
     TransactionID = Column(UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4)
     UserID = Column(UNIQUEIDENTIFIER,  nullable=False)
@@ -23,7 +25,144 @@ class Transaction(Base):
     CreatedAt = Column(DateTime, default=datetime.utcnow)
     UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     CreatedBy = Column(String(20), default="manual")
+    # Khoá ngoài của giao dịch được import (FITID hoặc hash dòng) - chống import trùng
+    ExternalID = Column(Unicode(64), nullable=True)
+    # sha1(số tiền|ngày|mô tả chuẩn hoá) - index (UserID, DedupKey) để phát hiện giao dịch trùng
+    DedupKey = Column(String(40), nullable=True)
+    # Bản chuẩn hoá (bỏ dấu, chữ thường) để lọc không phân biệt dấu, có index theo UserID
+    PaymentMethodNorm = Column(Unicode(50), nullable=True)
+    LocationNorm = Column(String(255), nullable=True)
     
     # Relationships (optional)
     # user = relationship("User", back_populates="transactions")
     # category = relationship("Category", back_populates="transactions")
+
+
+class TransactionSearchToken(Base):
+    """Chỉ mục đảo (inverted index) cho tìm kiếm: một dòng cho mỗi token của
+    Description/Notes/Location, đã bỏ dấu và chữ thường. Khoá chính
+    (UserID, Token, TransactionID) cho phép tìm theo tiền tố bằng index seek."""
+    __tablename__ = "TransactionSearchTokens"
+    __table_args__ = {'extend_existing': True}
+
+    UserID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    Token = Column(Unicode(64), primary_key=True)
+    TransactionID = Column(UNIQUEIDENTIFIER, primary_key=True)
+
+
+class DailyCategoryTotal(Base):
+    """Tổng hợp theo ngày của Transactions: một dòng cho mỗi (user, danh mục,
+    ngày, loại) có giao dịch. Trigger TR_Transactions_DailyTotals cộng/trừ chênh
+    lệch trên mọi thao tác ghi (kể cả insert/update theo lô và SQL trực tiếp),
+    nên chỉ đọc bảng này - không ghi từ ORM."""
+    __tablename__ = "DailyCategoryTotals"
+    __table_args__ = {'extend_existing': True}
+
+    UserID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    TransactionDate = Column(Date, primary_key=True)
+    UserCategoryID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    TransactionType = Column(String(20), primary_key=True)
+    TotalAmount = Column(Numeric(18, 2), nullable=False)
+    TransactionCount = Column(Integer, nullable=False)
+
+
+
+class PeriodSnapshot(Base):
+    """Một tháng đã đóng và đã chốt số liệu của một user (PeriodMonth = ngày 1).
+    Trigger trên DailyCategoryTotals xoá dòng này (và MonthlyCategoryTotals của
+    tháng, qua cascade) khi có giao dịch của tháng đó bị sửa muộn."""
+    __tablename__ = "PeriodSnapshots"
+    __table_args__ = {'extend_existing': True}
+
+    UserID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    PeriodMonth = Column(Date, primary_key=True)
+    ClosedAt = Column(DateTime, default=datetime.utcnow)
+
+
+class MonthlyCategoryTotal(Base):
+    """Tổng theo tháng đã chốt của một tháng trong PeriodSnapshots"""
+    __tablename__ = "MonthlyCategoryTotals"
+    __table_args__ = {'extend_existing': True}
+
+    UserID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    PeriodMonth = Column(Date, primary_key=True)
+    UserCategoryID = Column(UNIQUEIDENTIFIER, primary_key=True)
+    TransactionType = Column(String(20), primary_key=True)
+    TotalAmount = Column(Numeric(18, 2), nullable=False)
+    TransactionCount = Column(Integer, nullable=False)
+
+
+class RecurringTransaction(Base):
+    """Định nghĩa giao dịch định kỳ (lương, tiền nhà, thuê bao...). Job
+    materialize_recurring tạo giao dịch cho mọi kỳ đến hạn (NextRunDate <= hôm
+    nay), ExternalID = 'recurring:<RecurringID>:<ngày>' nên chạy lại không trùng."""
+    __tablename__ = "RecurringTransactions"
+    __table_args__ = {'extend_existing': True}
+
+    RecurringID = Column(UNIQUEIDENTIFIER, primary_key=True, default=uuid.uuid4)
+    UserID = Column(UNIQUEIDENTIFIER, nullable=False)
+    UserCategoryID = Column(UNIQUEIDENTIFIER, nullable=False)
+    TransactionType = Column(String(20), nullable=False)  # 'income' or 'expense'
+    Amount = Column(Numeric(15,2), nullable=False)
+    Description = Column(String(500))
+    PaymentMethod = Column(Unicode(50))
+    Location = Column(String(255))
+    Notes = Column(String(500))
+    # daily, weekly, monthly, yearly - mỗi IntervalCount đơn vị một lần, tính từ StartDate
+    Frequency = Column(String(20), nullable=False)
+    IntervalCount = Column(Integer, nullable=False, default=1)
+    StartDate = Column(Date, nullable=False)
+    EndDate = Column(Date, nullable=True)
+    # Kỳ chưa tạo giao dịch sớm nhất
+    NextRunDate = Column(Date, nullable=False)
+    LastRunDate = Column(Date, nullable=True)
+    IsActive = Column(Boolean, default=True)
+    CreatedAt = Column(DateTime, default=datetime.utcnow)
+    UpdatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+SEARCHABLE_COLUMNS = ("Description", "Notes", "Location")
+NORMALIZED_COLUMNS = {"PaymentMethod": "PaymentMethodNorm", "Location": "LocationNorm"}
+
+
+def set_normalized_columns(values: dict) -> dict:
+    """Thêm cột *Norm cho các cột nguồn có trong values (dùng cho insert/update theo lô)"""
+    for source, target in NORMALIZED_COLUMNS.items():
+        if source in values:
+            values[target] = normalize_text(values[source]) or None
+    return values
+
+
+def search_token_rows(user_id, transaction_id, description, notes, location):
+    return [
+        {"UserID": user_id, "Token": token, "TransactionID": transaction_id}
+        for token in search_tokens(description, notes, location)
+    ]
+
+
+@event.listens_for(Transaction, "before_insert")
+@event.listens_for(Transaction, "before_update")
+def _set_derived_columns(mapper, connection, target):
+    # Ghi qua session (add/commit) tự cập nhật các cột dẫn xuất; các đường insert/update theo lô tự tính
+    if target.Amount is not None and target.TransactionDate is not None:
+        target.DedupKey = transaction_fingerprint(target.Amount, target.TransactionDate, target.Description)
+    for source, column in NORMALIZED_COLUMNS.items():
+        setattr(target, column, normalize_text(getattr(target, source)) or None)
+
+
+@event.listens_for(Transaction, "after_insert")
+def _index_new_transaction(mapper, connection, target):
+    rows = search_token_rows(target.UserID, target.TransactionID, target.Description, target.Notes, target.Location)
+    if rows:
+        connection.execute(insert(TransactionSearchToken.__table__), rows)
+
+
+@event.listens_for(Transaction, "after_update")
+def _reindex_transaction(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in SEARCHABLE_COLUMNS):
+        return
+    connection.execute(
+        delete(TransactionSearchToken.__table__)
+        .where(TransactionSearchToken.TransactionID == target.TransactionID)
+    )
+    _index_new_transaction(mapper, connection, target)
@@ -0,0 +1,94 @@
+# routers/admin.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.routing import APIRoute
+from typing import Optional
+
+from app.auth.auth_dependency import get_current_admin_user
+from app.schemas.admin_schema import ProfilerTargetRequest
+from app.utils.profiler import PROFILER, render_flamegraph_svg, worker_id
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+
+def _label(route: str, method: Optional[str]) -> str:
+    return f"{method.upper()} {route}" if method else route
+
+
+def _get_target(route: str, method: Optional[str]):
+    target = PROFILER.find(route, method)
+    if target is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Route {_label(route, method)} chưa được bật profiling (hoặc cần chỉ rõ method)"
+        )
+    return target
+
+
+@router.get("/profiler")
+def get_profiler_status():
+    """Trạng thái profiler và số mẫu / tỉ lệ mẫu của từng route (của worker trả lời)"""
+    return PROFILER.status()
+
+
+@router.post("/profiler/routes", status_code=status.HTTP_201_CREATED)
+def enable_route_profiling(payload: ProfilerTargetRequest, request: Request):
+    """Bật profiling cho một route trên mọi worker (ghi đè cấu hình và xoá kết quả cũ của route đó)"""
+    method = payload.method.upper() if payload.method else None
+    routes = [
+        r for r in request.app.routes
+        if isinstance(r, APIRoute) and r.path == payload.route and (method is None or method in r.methods)
+    ]
+    if not routes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Không tìm thấy route {_label(payload.route, method)}"
+        )
+    if len(routes) > 1 or (method is None and len(routes[0].methods) > 1):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Route {payload.route} có nhiều method, cần chỉ rõ method"
+        )
+    route = routes[0]
+    target = PROFILER.enable(route, method or next(iter(route.methods)), payload.sample_rate, payload.interval_ms)
+    PROFILER.broadcast({
+        "action": "enable",
+        "route": target.path,
+        "method": target.method,
+        "sample_rate": target.sample_rate,
+        "interval_ms": payload.interval_ms,
+    })
+    return target.summary()
+
+
+@router.delete("/profiler/routes")
+def disable_route_profiling(route: str = Query(...), method: Optional[str] = Query(None)):
+    """Tắt profiling của route trên mọi worker, trả về thống kê cuối cùng của worker trả lời"""
+    target = PROFILER.disable(_get_target(route, method).key)
+    if target is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Route {route} chưa được bật profiling"
+        )
+    PROFILER.broadcast({"action": "disable", "key": target.key})
+    return target.summary()
+
+
+@router.get("/profiler/collapsed")
+def get_collapsed_stacks(route: str = Query(...), method: Optional[str] = Query(None)):
+    """Stack dạng collapsed (dùng với flamegraph.pl hoặc speedscope)"""
+    return PlainTextResponse(_get_target(route, method).collapsed(), headers={"X-Profiler-Worker": worker_id()})
+
+
+@router.get("/profiler/flamegraph")
+def get_flamegraph(route: str = Query(...), method: Optional[str] = Query(None)):
+    """Flame graph SVG của route"""
+    return Response(
+        render_flamegraph_svg(_get_target(route, method)),
+        media_type="image/svg+xml",
+        headers={"X-Profiler-Worker": worker_id()}
+    )
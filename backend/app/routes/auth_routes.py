@@ -5,6 +5,7 @@ from app.models import user_model
 from app.utils.security import hash_password, verify_password, create_reset_token, verify_reset_token
 from app.database import get_db
 from app.auth.jwt_handler import create_access_token
+from crud.category_crud import provision_default_user_categories
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/register")
@@ -19,6 +20,9 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
         password_hash=hash_password(user.password)
     )
     db.add(new_user)
+    db.flush()
+    # Tạo sẵn danh mục mặc định trong cùng transaction (một câu INSERT ... SELECT)
+    provision_default_user_categories(db, user_id=new_user.UserID, commit=False)
     db.commit()
     return {"message": "Đăng ký thành công"}
 
@@ -1,5 +1,5 @@
 # routers/budget.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
@@ -20,9 +20,12 @@ from schemas.budget_schema import (
     BudgetVsActualResponse,
     # BudgetPerformanceMetrics,
     BudgetAnalysisRequest,
-    BudgetComparisonRequest
+    BudgetComparisonRequest,
+    BudgetAlertResponse
 )
 from crud import budget_crud
+from services import alert_service, trend_service
+from app.utils.json_response import FastJSONResponse
 from auth.auth_dependency import get_current_user  
 
 router = APIRouter(
@@ -438,6 +441,12 @@ def get_budget_dashboard(
     current_user: dict = Depends(get_current_user)
 ):
     """Get comprehensive budget dashboard data"""
+    if period_type not in trend_service.PERIOD_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period type. Must be 'daily', 'weekly', or 'monthly'."
+        )
+
     # Get active budgets with overview
     overviews = budget_crud.get_active_budgets_with_overview(
         db=db,
@@ -457,24 +466,28 @@ def get_budget_dashboard(
     total_budget = sum(overview.total_budget for overview in overviews)
     total_spent = sum(overview.total_spent for overview in overviews)
     
-    # Collect all alerts
-    all_alerts = []
-    for overview in overviews:
-        vs_actual = budget_crud.get_budget_vs_actual(db, current_user.UserID, overview.budget_id)
-        if vs_actual:
-            all_alerts.extend(vs_actual.alerts)
+    # Cảnh báo do alert_service sinh khi ghi giao dịch; chỉ đọc các cảnh báo chưa đọc
+    unread_alerts = alert_service.get_unread_alerts(db, current_user.UserID, limit=10)
     
-    # Get spending trends for all budgets
+    # Xu hướng chi tiêu của từng ngân sách theo period_type (chỉ các danh mục của ngân sách, đến hôm nay)
+    today = date.today()
     trends_data = []
     for overview in overviews:
-        vs_actual = budget_crud.get_budget_vs_actual(db, current_user.UserID, overview.budget_id)
-        if vs_actual:
-            trends_data.append({
-                "budget_name": overview.budget_name,
-                "trend": vs_actual.spending_trend
-            })
+        trend = trend_service.build_trend(
+            db,
+            current_user.UserID,
+            overview.period_start,
+            min(overview.period_end, today),
+            period_type=period_type,
+            user_category_ids=[category.user_category_id for category in overview.categories]
+        )
+        trends_data.append({
+            "budget_id": str(overview.budget_id),
+            "budget_name": overview.budget_name,
+            "trend": trend
+        })
     
-    return {
+    return FastJSONResponse({
         "summary": {
             "total_budgets": len(overviews),
             "total_budget_amount": float(total_budget),
@@ -495,6 +508,11 @@ def get_budget_dashboard(
                 "percentage_used": float(overview.overall_percentage_used),
                 "is_over_budget": overview.is_over_budget,
                 "days_remaining": overview.days_remaining,
+                "projection": {
+                    "projected_total": float(overview.projected_total),
+                    "lower": float(overview.projected_lower),
+                    "upper": float(overview.projected_upper)
+                } if include_projections and overview.projected_total is not None else None,
                 "top_categories": [
                     {
                         "name": cat.category_name,
@@ -507,6 +525,41 @@ def get_budget_dashboard(
             for overview in overviews
         ],
         "trends": trends_data,
-        "alerts": all_alerts[:10],  # Limit to top 10 alerts
+        "alerts": [_alert_response(alert) for alert in unread_alerts],
         "generated_at": datetime.now().isoformat()
-    }
\ No newline at end of file
+    })
+
+def _alert_response(alert) -> BudgetAlertResponse:
+    # model_construct: PercentageUsed có thể > 100 (le=100 trong schema chỉ dành cho dữ liệu nhập)
+    return BudgetAlertResponse.model_construct(
+        AlertID=alert.AlertID,
+        BudgetID=alert.BudgetID,
+        BudgetCategoryID=alert.BudgetCategoryID,
+        UserID=alert.UserID,
+        alert_type=alert.AlertType,
+        current_amount=alert.CurrentAmount,
+        percentage_used=alert.PercentageUsed,
+        message=alert.Message,
+        is_read=alert.IsRead,
+        CreatedAt=alert.CreatedAt
+    )
+
+@router.get("/alerts/unread", response_model=List[BudgetAlertResponse])
+def get_unread_alerts(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of alerts"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get unread budget alerts, newest first"""
+    alerts = alert_service.get_unread_alerts(db, current_user.UserID, limit=limit)
+    return FastJSONResponse([_alert_response(alert) for alert in alerts])
+
+@router.put("/alerts/read")
+def mark_alerts_read(
+    alert_ids: Optional[List[UUID]] = Body(None, description="Alert IDs; omit to mark all unread alerts"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Mark the given alerts (or all unread alerts) as read"""
+    updated = alert_service.mark_alerts_read(db, current_user.UserID, alert_ids)
+    return {"updated": updated}
@@ -13,6 +13,7 @@ from schemas.category_schema import (
 )
 from crud import category_crud
 from auth.auth_dependency import get_current_user
+from app.utils.json_response import FastJSONResponse
 
 # Create router
 router = APIRouter(
@@ -145,7 +146,10 @@ async def get_my_category_display_names(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Lấy tất cả tên hiển thị danh mục của user hiện tại"""
+    """Lấy tất cả tên hiển thị danh mục của user hiện tại
+
+    Danh sách được cache theo (user, loại) và huỷ khi danh mục thay đổi.
+    """
     if category_type:
         display_categories = category_crud.get_category_display_names_by_type(
             db=db, 
@@ -158,10 +162,11 @@ async def get_my_category_display_names(
             user_id=current_user.UserID
         )
     
-    return CategoryDisplayListResponse(
+    # Danh sách đã đúng schema: trả thẳng, không để response_model validate lại từng phần tử
+    return FastJSONResponse(CategoryDisplayListResponse.model_construct(
         display_categories=display_categories,
         total=len(display_categories)
-    )
+    ))
 
 @router.get("/user-categories/", response_model=UserCategoryListResponse)
 async def get_my_user_categories(
@@ -174,7 +179,8 @@ async def get_my_user_categories(
 ):
     """Lấy danh sách user categories của user hiện tại"""
     try:
-        user_categories = category_crud.get_user_categories_by_user(
+        # Trang và tổng số trong cùng một query; danh mục gốc lấy từ bảng đã cache
+        rows, total = category_crud.get_user_categories_page(
             db=db,
             user_id=current_user.UserID,
             skip=skip,
@@ -182,71 +188,27 @@ async def get_my_user_categories(
             is_active=is_active,
             category_type=category_type
         )
-        
-        total = category_crud.get_user_categories_count(
-            db=db,
-            user_id=current_user.UserID,
-            is_active=is_active,
-            category_type=category_type
-        )
-        
-        # Chuyển đổi sang response format
+        system_categories = category_crud.get_system_categories(db)
+
         response_categories = []
-        for result in user_categories:
-            # ALWAYS extract as tuple since CRUD returns (UserCategory, Category)
-            user_category, category = result
-            
-            # Handle the case where CategoryID might be accessed differently
-            category_id = None
-            if hasattr(user_category, 'CategoryID'):
-                category_id = user_category.CategoryID
-            elif hasattr(result, 'CategoryID'):
-                category_id = result.CategoryID
-            
-            # If category_id exists but category is None, fetch it separately
-            if category_id and not category:
-                category = category_crud.get_category(db, category_id)
-            
-            # Get display name
-            custom_name = None
-            if hasattr(user_category, 'CustomName'):
-                custom_name = user_category.CustomName
-            elif hasattr(result, 'CustomName'):
-                custom_name = result.CustomName
-                
-            display_name = custom_name
-            if not display_name and category:
-                display_name = category.CategoryName
-            
-            # Build the response
-            response_categories.append(UserCategoryResponse(
-                user_category_id=user_category.UserCategoryID,
-                user_id=user_category.UserID,
-                category_id=category_id if category_id else None,
-                custom_name=custom_name,
-                category_type=user_category.CategoryType,
-                is_active=user_category.IsActive,
-                created_at=user_category.CreatedAt,
-                category=CategoryResponse(
-                    category_id=category.CategoryID,
-                    category_name=category.CategoryName,
-                    category_type=category.CategoryType,
-                    description=category.Description,
-                    icon=category.Icon,
-                    color=category.Color,
-                    is_default=category.IsDefault,
-                    parent_category_id=category.ParentCategoryID if category.ParentCategoryID else None,
-                    is_active=category.IsActive,
-                    sort_order=category.SortOrder,
-                    created_at=category.CreatedAt
-                ) if category else None,
-                display_name=display_name or "Unknown Category"
+        for row in rows:
+            category = system_categories.get(row.CategoryID) if row.CategoryID else None
+            response_categories.append(UserCategoryResponse.model_construct(
+                user_category_id=row.UserCategoryID,
+                user_id=current_user.UserID,
+                category_id=row.CategoryID,
+                custom_name=row.CustomName,
+                category_type=row.CategoryType,
+                is_active=row.IsActive,
+                created_at=row.CreatedAt,
+                category=category,
+                display_name=row.CustomName or (category.category_name if category else None) or "Unknown Category"
             ))
-        
-        return UserCategoryListResponse(
+
+        return FastJSONResponse(UserCategoryListResponse.model_construct(
             user_categories=response_categories,
             total=total
-        )
+        ))
         
     except Exception as e:
         print(f"Error in get_my_user_categories: {str(e)}")
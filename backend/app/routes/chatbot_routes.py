@@ -1,6 +1,5 @@
 # routers/chatbot.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -25,8 +24,6 @@ from schemas.chat_schema import (
 from crud import chatbot_crud
 from services.gpt_service import chatbot_service
 from auth.auth_dependency import get_current_user
-from fastapi.responses import JSONResponse
-import json
 
 router = APIRouter(
     prefix="/chat",
@@ -35,17 +32,6 @@ router = APIRouter(
 )
 
 
-# Thêm custom JSON encoder để đảm bảo UTF-8
-class UnicodeJSONResponse(JSONResponse):
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,  # Quan trọng: không escape unicode
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
-
 # Chat Session Endpoints (unchanged)
 @router.post("/sessions", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
 def create_chat_session(
@@ -277,8 +263,7 @@ async def chat_interact(
         action_performed=action_data
         )
 
-        # Dùng jsonable_encoder để model chuyển thành dict trước
-        return UnicodeJSONResponse(content=jsonable_encoder(response_data))
+        return response_data
 
         
     except Exception as e:
@@ -0,0 +1,102 @@
+# routers/events.py
+"""Đẩy sự kiện realtime của user (notification_service): BudgetAlert mới,
+chênh lệch số dư sau mỗi lần ghi giao dịch, giao dịch do chatbot tạo - thay
+cho việc poll /budgets/active/summary và /transactions/summary/statistics.
+
+EventSource/WebSocket của trình duyệt không gửi được header Authorization nên
+token nhận qua ?token=, hoặc header Bearer như các route khác.
+"""
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from auth.jwt_handler import decode_access_token
+from database import SessionLocal
+from models.user_model import User
+from services.notification_service import user_channel
+from app.utils.pubsub import BROKER
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Gửi comment ping khi không có sự kiện để proxy không cắt kết nối
+HEARTBEAT_SECONDS = 15
+
+
+def _authenticate(token: Optional[str]) -> Optional[UUID]:
+    """UserID của token; session DB chỉ mở trong lúc tra user, không giữ suốt kết nối.
+
+    Truy vấn đồng bộ - handler async gọi qua run_in_threadpool để không chặn event loop.
+    """
+    payload = decode_access_token(token) if token else None
+    if payload is None:
+        return None
+    db = SessionLocal()
+    try:
+        row = db.query(User.UserID).filter(User.email == payload.get("sub")).first()
+    finally:
+        db.close()
+    return row[0] if row else None
+
+
+def _request_token(request: Request, token: Optional[str]) -> Optional[str]:
+    if token:
+        return token
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else None
+
+
+@router.get("/stream")
+async def stream_events(request: Request, token: Optional[str] = Query(None)):
+    """Server-Sent Events: mỗi sự kiện là 'event: <type>' + 'data: <json>'"""
+    user_id = await run_in_threadpool(_authenticate, _request_token(request, token))
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token không hợp lệ hoặc hết hạn",
+        )
+    subscription = BROKER.subscribe(user_channel(user_id))
+
+    async def event_stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.get(timeout=HEARTBEAT_SECONDS)
+                if message is None:
+                    yield b": ping\n\n"
+                    continue
+                event_type = orjson.loads(message).get("type", "message")
+                yield b"event: " + event_type.encode() + b"\ndata: " + message + b"\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """WebSocket: mỗi sự kiện là một text frame JSON"""
+    user_id = await run_in_threadpool(_authenticate, token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = BROKER.subscribe(user_channel(user_id))
+    try:
+        while True:
+            message = await subscription.get(timeout=HEARTBEAT_SECONDS)
+            if message is None:
+                await websocket.send_text('{"type":"ping"}')
+                continue
+            await websocket.send_text(message.decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
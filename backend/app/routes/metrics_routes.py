@@ -0,0 +1,15 @@
+# routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Metrics dạng text cho Prometheus scrape"""
+    return PlainTextResponse(REGISTRY.expose(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,47 @@
+# routers/recurring.py
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.security import HTTPBearer
+from sqlalchemy.orm import Session
+from typing import List
+from uuid import UUID
+
+from database import get_db
+from schemas.transaction_schema import RecurringTransactionCreate, RecurringTransactionResponse
+from crud import recurring_crud
+from auth.auth_dependency import get_current_user
+
+router = APIRouter(
+    prefix="/recurring-transactions",
+    tags=["recurring-transactions"],
+    dependencies=[Depends(HTTPBearer())]
+)
+
+@router.post("/", response_model=RecurringTransactionResponse, status_code=status.HTTP_201_CREATED)
+def create_recurring_transaction(
+    recurring: RecurringTransactionCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Create a recurring transaction; due occurrences are created by the materialize_recurring job."""
+    return recurring_crud.create_recurring_transaction(db=db, user_id=current_user.UserID, data=recurring)
+
+@router.get("/", response_model=List[RecurringTransactionResponse])
+def get_recurring_transactions(
+    include_inactive: bool = Query(False, description="Include stopped definitions"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    return recurring_crud.get_recurring_transactions(
+        db=db, user_id=current_user.UserID, include_inactive=include_inactive
+    )
+
+@router.delete("/{recurring_id}", status_code=status.HTTP_200_OK)
+def stop_recurring_transaction(
+    recurring_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stop a recurring transaction; transactions already created are kept."""
+    if not recurring_crud.deactivate_recurring_transaction(db, current_user.UserID, recurring_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy giao dịch định kỳ.")
+    return {"detail": "Đã dừng giao dịch định kỳ."}
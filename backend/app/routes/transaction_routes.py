@@ -1,5 +1,6 @@
 # routers/transaction.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -11,12 +12,21 @@ from schemas.transaction_schema import (
     TransactionCreate, 
     TransactionUpdate, 
     TransactionResponse, 
+    TransactionCreateResponse,
     TransactionListResponse,
-    TransactionFilter
+    TransactionFilter,
+    TransactionImportResult,
+    TransactionBatchRequest,
+    TransactionBatchResponse,
+    DuplicateCheckRequest,
+    DuplicateCheckResponse
 )
 from crud import transaction_crud as crud_transaction
 from  crud.category_crud import get_category_display_name
 from auth.auth_dependency import get_current_user  
+from services import export_service, import_service
+from app.utils.json_response import FastJSONResponse
+from app.utils.text_normalize import transaction_fingerprint
 
 router = APIRouter(
     prefix="/transactions",
@@ -24,7 +34,7 @@ router = APIRouter(
     dependencies=[Depends(HTTPBearer())]
 )
 
-@router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=TransactionCreateResponse, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     transaction: TransactionCreate,
     db: Session = Depends(get_db),
@@ -40,18 +50,72 @@ def create_transaction(
     
     return created_transaction
 
+@router.post("/import", response_model=TransactionImportResult)
+def import_transactions(
+    file: UploadFile = File(..., description="CSV file or OFX/QFX bank statement"),
+    file_format: str = Form("auto", regex="^(auto|csv|ofx)$", description="'auto' detects OFX/QFX by file extension"),
+    default_expense_category: Optional[str] = Form(None, description="Category for expense rows without one"),
+    default_income_category: Optional[str] = Form(None, description="Category for income rows without one"),
+    skip_duplicates: bool = Form(False, description="Skip rows matching an existing transaction's amount, date and description"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk import transactions. Re-uploading the same file skips rows that were already imported."""
+    return import_service.import_transactions(
+        db=db,
+        user_id=current_user.UserID,
+        stream=file.file,
+        file_format=import_service.detect_format(file.filename, file_format),
+        default_expense_category=default_expense_category,
+        default_income_category=default_income_category,
+        skip_duplicates=skip_duplicates
+    )
+
+@router.post("/batch", response_model=TransactionBatchResponse)
+def batch_transactions(
+    batch: TransactionBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Apply a list of create/update/delete operations in one DB transaction (offline sync)."""
+    return crud_transaction.apply_transaction_batch(
+        db=db,
+        user_id=current_user.UserID,
+        operations=batch.operations,
+        all_or_nothing=batch.all_or_nothing
+    )
+
+@router.post("/duplicates/check", response_model=DuplicateCheckResponse)
+def check_duplicate_transactions(
+    request: DuplicateCheckRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Find existing transactions with the same amount, date and normalised description."""
+    keys = [
+        transaction_fingerprint(item.amount, item.transaction_date, item.description)
+        for item in request.items
+    ]
+    matches = crud_transaction.find_duplicate_transactions(db, current_user.UserID, keys)
+    return {
+        "duplicates": [
+            {"index": index, "transaction_id": matches[key]}
+            for index, key in enumerate(keys) if key in matches
+        ]
+    }
+
 @router.get("/", response_model=TransactionListResponse)
 def get_transactions(
     transaction_type: Optional[str] = Query(None, description="Filter by transaction type: 'income' or 'expense'"),
     category_display_name: Optional[str] = Query(None, description="Filter by category display name"),
-    payment_method: Optional[str] = Query(None, description="Filter by payment method"),
-    location: Optional[str] = Query(None, description="Filter by location"),
+    payment_method: Optional[str] = Query(None, description="Filter by payment method prefix (accent- and case-insensitive)"),
+    location: Optional[str] = Query(None, description="Filter by location prefix (accent- and case-insensitive)"),
     date_from: Optional[date] = Query(None, description="Filter by start date YYYY-MM-DD"),
     date_to: Optional[date] = Query(None, description="Filter by end date YYYY-MM-DD"),
     amount_min: Optional[float] = Query(None, description="Filter by minimum amount"),
     amount_max: Optional[float] = Query(None, description="Filter by maximum amount"),
     search: Optional[str] = Query(None, description="Search transactions by description or notes"),
-    created_by: Optional[str] = Query(None, regex ="^(manual|chatbot)$", description="Filter by transaction creator: 'manual' or 'chatbot'"),
+    created_by: Optional[str] = Query(None, regex ="^(manual|chatbot|imported)$", description="Filter by transaction creator: 'manual', 'chatbot' or 'imported'"),
 
     skip: int = Query(0, ge=0, description="Number of transactions to skip for pagination"),
     limit: int = Query(10, ge=1, le=100, description="Number of transactions to return per page"),
@@ -68,8 +132,8 @@ def get_transactions(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid transaction type. Must be 'income' or 'expense'.")
 
     # Validate created_by
-    if created_by and created_by.lower() not in ['manual', 'chatbot']:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid created_by value. Must be 'manual' or 'chatbot'.")
+    if created_by and created_by.lower() not in ['manual', 'chatbot', 'imported']:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid created_by value. Must be 'manual', 'chatbot' or 'imported'.")
 
     # Get transactions with filters, pagination, and sorting
     filters = TransactionFilter(
@@ -88,11 +152,65 @@ def get_transactions(
         order_by=sort_by,
         sort_order=sort_order
         )
-    return crud_transaction.get_transactions(
+    # Trả Response trực tiếp để FastAPI không validate lại cả trang qua response_model
+    return FastJSONResponse(crud_transaction.get_transactions(
         db=db,
         user_id=current_user.UserID,
         filters=filters
+    ))
+@router.get("/export")
+def export_transactions(
+    export_format: str = Query("csv", alias="format", regex="^(csv|ndjson)$", description="Export format: 'csv' or 'ndjson'"),
+    transaction_type: Optional[str] = Query(None, regex="^(income|expense)$", description="Filter by transaction type: 'income' or 'expense'"),
+    category_display_name: Optional[str] = Query(None, description="Filter by category display name"),
+    payment_method: Optional[str] = Query(None, description="Filter by payment method prefix (accent- and case-insensitive)"),
+    location: Optional[str] = Query(None, description="Filter by location prefix (accent- and case-insensitive)"),
+    date_from: Optional[date] = Query(None, description="Filter by start date YYYY-MM-DD"),
+    date_to: Optional[date] = Query(None, description="Filter by end date YYYY-MM-DD"),
+    amount_min: Optional[float] = Query(None, description="Filter by minimum amount"),
+    amount_max: Optional[float] = Query(None, description="Filter by maximum amount"),
+    search: Optional[str] = Query(None, description="Search transactions by description or notes"),
+    cursor: Optional[str] = Query(None, description="Resume after this cursor (value of the 'cursor' column of the last row received)"),
+    gzip: bool = Query(False, description="Compress the stream with gzip (Content-Encoding: gzip)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream the whole transaction history as CSV or NDJSON, oldest first."""
+    after = None
+    if cursor:
+        try:
+            after = export_service.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    filters = TransactionFilter(
+        transaction_type=transaction_type,
+        category_display_name=category_display_name,
+        payment_method=payment_method,
+        location=location,
+        date_from=date_from,
+        date_to=date_to,
+        amount_min=amount_min,
+        amount_max=amount_max,
+        search=search
     )
+
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="transactions.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export_service.stream_transactions(
+            user_id=current_user.UserID,
+            filters=filters,
+            export_format=export_format,
+            after=after,
+            compress=gzip
+        ),
+        media_type=media_type,
+        headers=headers
+    )
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(
     transaction_id: UUID,
@@ -202,11 +320,12 @@ def get_transactions_by_category(
         sort_by= "TransactionDate",
         sort_order= "desc"
     )
-    return crud_transaction.get_transactions(
+    # Trả Response trực tiếp để FastAPI không validate lại cả trang qua response_model
+    return FastJSONResponse(crud_transaction.get_transactions(
         db = db,
         user_id= current_user.UserID,
         filters = filters
-    )
+    ))
 @router.get("/by_date_range/", response_model= TransactionListResponse)
 def get_transactions_by_date_range(
     date_from: Optional[date] = Query(None, description="Filter by start date YYYY-MM-DD"),
@@ -228,8 +347,9 @@ def get_transactions_by_date_range(
     sort_order="desc"
     )
     
-    return crud_transaction.get_transactions(
+    # Trả Response trực tiếp để FastAPI không validate lại cả trang qua response_model
+    return FastJSONResponse(crud_transaction.get_transactions(
         db=db,
         user_id=current_user.UserID,
         filters=filters
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
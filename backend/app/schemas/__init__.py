@@ -1,2 +1,2 @@
 # __init__.py
-from . import user_schema, category_schema, transaction_schema, budget_schema, chat_schema, report_schema, audit_schema
\ No newline at end of file
+from . import user_schema, category_schema, transaction_schema, budget_schema, chat_schema, report_schema, audit_schema, admin_schema
\ No newline at end of file
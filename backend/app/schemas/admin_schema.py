@@ -0,0 +1,9 @@
+# schemas/admin.py
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ProfilerTargetRequest(BaseModel):
+    route: str = Field(..., description="Path template của route, vd. /budgets/analysis/dashboard")
+    method: Optional[str] = Field(None, description="HTTP method; bắt buộc khi path có nhiều route (GET/PUT...)")
+    sample_rate: float = Field(0.1, gt=0, le=1, description="Tỉ lệ request được profile")
+    interval_ms: Optional[float] = Field(None, ge=1, le=1000, description="Chu kỳ lấy mẫu stack (ms)")
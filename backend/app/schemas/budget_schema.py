@@ -139,6 +139,8 @@ class BudgetOverviewResponse(BaseModel):
     days_remaining: int
     daily_average_spent: Decimal
     projected_total: Optional[Decimal] = None
+    projected_lower: Optional[Decimal] = Field(None, description="Lower bound of the 90% forecast interval")
+    projected_upper: Optional[Decimal] = Field(None, description="Upper bound of the 90% forecast interval")
 
 class BudgetVsActualResponse(BaseModel):
     """Budget vs Actual comparison"""
@@ -2,7 +2,7 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from uuid import UUID
 from datetime import date, time, datetime
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Literal, Dict, Any
 from decimal import Decimal
 import json
 
@@ -79,6 +79,10 @@ class TransactionResponse(BaseModel):
     CreatedAt: datetime
     UpdatedAt: Optional[datetime] = None
 
+class TransactionCreateResponse(TransactionResponse):
+    possible_duplicate: bool = Field(False, description="Another transaction has the same amount, date and description")
+    duplicate_of: Optional[UUID] = Field(None, description="The existing transaction it likely duplicates")
+
 class TransactionListResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -96,10 +100,10 @@ class TransactionFilter(BaseModel):
         None, description="Filter by category display name"
     )
     payment_method: Optional[str] = Field(
-        None, description="Filter by payment method"
+        None, description="Filter by payment method prefix (accent- and case-insensitive)"
     )
     location: Optional[str] = Field(
-        None, description="Filter by location"
+        None, description="Filter by location prefix (accent- and case-insensitive)"
     )
     date_from: Optional[Union[str, date]] = Field(
         None, description="Filter by start date (YYYY-MM-DD, DD/MM/YYYY, MM/DD/YYYY)"
@@ -117,7 +121,7 @@ class TransactionFilter(BaseModel):
         None, description="Search text in transaction details"
     )
     created_by: Optional[str] = Field(
-        None, description="Transaction source: 'manual' or 'imported'"
+        None, description="Transaction source: 'manual', 'chatbot', 'imported' or 'recurring'"
     )
 
     # Pagination
@@ -138,8 +142,8 @@ class TransactionFilter(BaseModel):
     @field_validator('created_by')
     @classmethod
     def validate_created_by(cls, v: Optional[str]) -> Optional[str]:
-        if v and v.lower() not in ['manual', 'imported']:
-            raise ValueError('Created by must be either "manual" or "imported"')
+        if v and v.lower() not in ['manual', 'chatbot', 'imported', 'recurring']:
+            raise ValueError('Created by must be one of "manual", "chatbot", "imported" or "recurring"')
         return v.lower() if v else v
     
     @field_validator('sort_order')
@@ -165,3 +169,107 @@ class TransactionFilter(BaseModel):
                     continue
             raise ValueError("Invalid date format. Supported formats: YYYY-MM-DD, DD/MM/YYYY, MM/DD/YYYY")
         return v
+
+class TransactionImportError(BaseModel):
+    row: int = Field(..., description="Row number in the uploaded file (1-based, header excluded)")
+    error: str = Field(..., description="Why the row was rejected")
+
+class TransactionImportResult(BaseModel):
+    total_rows: int = Field(..., description="Rows read from the file")
+    imported: int = Field(..., description="Rows inserted")
+    duplicates: int = Field(..., description="Rows skipped because they were imported before")
+    failed: int = Field(..., description="Rows rejected by validation")
+    likely_duplicates: int = Field(0, description="Rows matching an existing transaction (amount, date, description)")
+    likely_duplicate_rows: List[int] = Field(default_factory=list, description="Row numbers of likely duplicates (capped)")
+    errors: List[TransactionImportError] = Field(default_factory=list, description="Per-row errors (capped)")
+
+class TransactionBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"] = Field(..., description="Operation to apply")
+    client_id: Optional[str] = Field(None, max_length=100, description="Opaque id echoed back in the result")
+    transaction_id: Optional[UUID] = Field(
+        None, description="Target transaction (update/delete). Optional for create: offline clients may choose the ID"
+    )
+    data: Optional[Dict[str, Any]] = Field(
+        None, description="TransactionCreate fields for create, TransactionUpdate fields for update"
+    )
+
+class TransactionBatchRequest(BaseModel):
+    operations: List[TransactionBatchOperation] = Field(..., min_length=1, max_length=500)
+    all_or_nothing: bool = Field(False, description="Roll back everything if any operation fails")
+
+class TransactionBatchItemResult(BaseModel):
+    index: int
+    client_id: Optional[str] = None
+    op: str
+    status: Literal["ok", "error"]
+    transaction_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class TransactionBatchResponse(BaseModel):
+    committed: bool = Field(..., description="Whether the successful operations were committed")
+    succeeded: int
+    failed: int
+    results: List[TransactionBatchItemResult]
+
+class DuplicateCheckItem(BaseModel):
+    amount: Decimal = Field(..., gt=0)
+    transaction_date: date
+    description: Optional[str] = Field(None, max_length=500)
+
+class DuplicateCheckRequest(BaseModel):
+    items: List[DuplicateCheckItem] = Field(..., min_length=1, max_length=1000)
+
+class DuplicateCheckMatch(BaseModel):
+    index: int = Field(..., description="Index of the item in the request")
+    transaction_id: UUID = Field(..., description="Existing transaction with the same fingerprint")
+
+class DuplicateCheckResponse(BaseModel):
+    duplicates: List[DuplicateCheckMatch]
+
+# ===== Recurring transactions =====
+class RecurringTransactionCreate(BaseModel):
+    transaction_type: str = Field(..., description="Type of transaction: 'income' or 'expense'")
+    amount: Decimal = Field(..., gt=0, description="Amount of every occurrence")
+    category_display_name: str = Field(..., max_length=100, description="Display name of the category")
+    description: Optional[str] = Field(None, max_length=500)
+    payment_method: Optional[str] = Field(None, max_length=50)
+    location: Optional[str] = Field(None, max_length=255)
+    notes: Optional[str] = Field(None, max_length=500)
+    frequency: Literal["daily", "weekly", "monthly", "yearly"] = Field(..., description="Repeat unit")
+    interval_count: int = Field(1, ge=1, le=366, description="Repeat every N units")
+    start_date: date = Field(..., description="First occurrence")
+    end_date: Optional[date] = Field(None, description="No occurrence after this date")
+
+    @field_validator('transaction_type')
+    @classmethod
+    def validate_transaction_type(cls, v: str) -> str:
+        if v.lower() not in ['income', 'expense']:
+            raise ValueError('Transaction type must be either "income" or "expense"')
+        return v.lower()
+
+    @field_validator('end_date')
+    @classmethod
+    def validate_end_date(cls, v: Optional[date], info) -> Optional[date]:
+        if v is not None and 'start_date' in info.data and v < info.data['start_date']:
+            raise ValueError('End date must not be before start date')
+        return v
+
+class RecurringTransactionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    recurring_id: UUID
+    user_category_id: UUID
+    category_display_name: str
+    transaction_type: str
+    amount: Decimal
+    description: Optional[str] = None
+    payment_method: Optional[str] = None
+    location: Optional[str] = None
+    notes: Optional[str] = None
+    frequency: str
+    interval_count: int
+    start_date: date
+    end_date: Optional[date] = None
+    next_run_date: date
+    last_run_date: Optional[date] = None
+    is_active: bool
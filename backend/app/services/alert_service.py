@@ -0,0 +1,181 @@
+# alert_service.py
+"""Sinh BudgetAlert khi ghi giao dịch, chỉ cho các ngân sách bị ảnh hưởng.
+
+transaction_crud gọi evaluate_budget_alerts sau mỗi lần commit với các cặp
+(UserCategoryID, ngày giao dịch) vừa bị chạm (cả giá trị cũ và mới khi sửa).
+Ngân sách bị ảnh hưởng = đang hoạt động, có danh mục trong các cặp đó và kỳ
+giao với khoảng ngày của chúng. Với mỗi ngân sách:
+
+  * toàn ngân sách: 'exceeded' (>= 100%), 'threshold' (>= AlertThreshold),
+    'warning' (dự báo cuối kỳ vượt ngân sách - chỉ khi mô hình dự báo đã có
+    trong cache, đường ghi không fit lại mô hình);
+  * từng danh mục: 'exceeded' (>= 100%), 'near_limit' (>= 90%).
+
+Mỗi (ngân sách, danh mục, loại, kỳ) chỉ có một dòng (unique index
+UX_BudgetAlerts_Dedup), nên ghi nhiều lần không sinh cảnh báo trùng.
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from crud import budget_crud
+from models.budget import Budget, BudgetAlert, BudgetCategory
+from schemas.budget_schema import BudgetOverviewResponse
+
+CATEGORY_NEAR_LIMIT = Decimal("90")
+# PercentageUsed là DECIMAL(5,2)
+_MAX_PERCENTAGE = Decimal("999.99")
+
+AlertKey = Tuple[UUID, Optional[UUID], str, date]
+
+
+def _affected_budgets(db: Session, user_id: UUID, touched: List[Tuple[UUID, date]]) -> Dict[UUID, Budget]:
+    category_ids = {user_category_id for user_category_id, _ in touched}
+    dates = [transaction_date for _, transaction_date in touched]
+    budgets = (
+        db.query(Budget)
+        .join(BudgetCategory, BudgetCategory.BudgetID == Budget.BudgetID)
+        .filter(
+            Budget.UserID == user_id,
+            Budget.IsActive == True,
+            Budget.PeriodStart <= max(dates),
+            Budget.PeriodEnd >= min(dates),
+            BudgetCategory.UserCategoryID.in_(category_ids)
+        )
+        .distinct()
+        .all()
+    )
+    return {budget.BudgetID: budget for budget in budgets}
+
+
+def _candidates(
+    budget: Budget,
+    overview: BudgetOverviewResponse,
+    budget_category_ids: Dict[UUID, UUID]
+) -> List[Dict]:
+    """Các cảnh báo mà trạng thái hiện tại của ngân sách thoả điều kiện"""
+    alerts = []
+
+    def add(alert_type: str, budget_category_id: Optional[UUID], amount: Decimal, percentage: Decimal, message: str):
+        alerts.append({
+            "AlertID": uuid.uuid4(),
+            "BudgetID": budget.BudgetID,
+            "BudgetCategoryID": budget_category_id,
+            "UserID": budget.UserID,
+            "AlertType": alert_type,
+            "CurrentAmount": max(amount, Decimal("0")),
+            "PercentageUsed": min(max(percentage, Decimal("0")), _MAX_PERCENTAGE),
+            "Message": message,
+            "IsRead": False,
+            "PeriodStart": budget.PeriodStart,
+        })
+
+    percentage = overview.overall_percentage_used
+    threshold = Decimal(budget.AlertThreshold if budget.AlertThreshold is not None else 80)
+    if percentage >= 100:
+        add("exceeded", None, overview.total_spent, percentage,
+            f"Over budget: {budget.BudgetName} is at {percentage:.1f}% of budget!")
+    elif percentage >= threshold:
+        add("threshold", None, overview.total_spent, percentage,
+            f"Warning: You've used {percentage:.1f}% of {budget.BudgetName}.")
+    if (
+        percentage < 100
+        and overview.projected_total is not None
+        and overview.total_budget > 0
+        and overview.projected_total > overview.total_budget
+    ):
+        add("warning", None, overview.total_spent, percentage,
+            f"Projected: {budget.BudgetName} is on track to reach "
+            f"{overview.projected_total / overview.total_budget * 100:.1f}% by {budget.PeriodEnd.isoformat()}.")
+
+    for category in overview.categories:
+        budget_category_id = budget_category_ids.get(category.user_category_id)
+        if category.percentage_used >= 100:
+            add("exceeded", budget_category_id, category.spent_amount, category.percentage_used,
+                f"Over budget: {category.category_name} is at {category.percentage_used:.1f}% of budget!")
+        elif category.percentage_used >= CATEGORY_NEAR_LIMIT:
+            add("near_limit", budget_category_id, category.spent_amount, category.percentage_used,
+                f"Critical: {category.category_name} is at {category.percentage_used:.1f}% of budget.")
+    return alerts
+
+
+def _existing_keys(db: Session, budget_ids: Iterable[UUID]) -> set:
+    rows = (
+        db.query(BudgetAlert.BudgetID, BudgetAlert.BudgetCategoryID, BudgetAlert.AlertType, BudgetAlert.PeriodStart)
+        .filter(BudgetAlert.BudgetID.in_(list(budget_ids)))
+        .all()
+    )
+    return {tuple(row) for row in rows}
+
+
+def _key(alert: Dict) -> AlertKey:
+    return alert["BudgetID"], alert["BudgetCategoryID"], alert["AlertType"], alert["PeriodStart"]
+
+
+def evaluate_budget_alerts(db: Session, user_id: UUID, touched: Iterable[Tuple[UUID, date]]) -> List[Dict]:
+    """Đánh giá và lưu cảnh báo mới cho các ngân sách bị ảnh hưởng; trả về các cảnh báo vừa tạo"""
+    touched = [(user_category_id, transaction_date) for user_category_id, transaction_date in touched
+               if user_category_id is not None and transaction_date is not None]
+    if not touched:
+        return []
+    budgets = _affected_budgets(db, user_id, touched)
+    if not budgets:
+        return []
+
+    budget_category_ids: Dict[UUID, Dict[UUID, UUID]] = {}
+    for row in (
+        db.query(BudgetCategory.BudgetID, BudgetCategory.UserCategoryID, BudgetCategory.BudgetCategoryID)
+        .filter(BudgetCategory.BudgetID.in_(list(budgets)))
+        .all()
+    ):
+        budget_category_ids.setdefault(row.BudgetID, {})[row.UserCategoryID] = row.BudgetCategoryID
+
+    candidates = []
+    for overview in budget_crud.get_budget_overviews(db, user_id, list(budgets), refit_forecast=False):
+        budget = budgets[overview.budget_id]
+        candidates.extend(_candidates(budget, overview, budget_category_ids.get(budget.BudgetID, {})))
+    if not candidates:
+        return []
+
+    for attempt in range(2):
+        existing = _existing_keys(db, budgets)
+        new_alerts = [alert for alert in candidates if _key(alert) not in existing]
+        if not new_alerts:
+            return []
+        try:
+            db.execute(insert(BudgetAlert), new_alerts)
+            db.commit()
+            return new_alerts
+        except IntegrityError:
+            # Hai lần ghi song song cùng sinh một cảnh báo: đọc lại rồi thử một lần nữa
+            db.rollback()
+            if attempt:
+                raise
+    return []
+
+
+def get_unread_alerts(db: Session, user_id: UUID, limit: int = 10) -> List[BudgetAlert]:
+    """Cảnh báo chưa đọc mới nhất (index IX_BudgetAlerts_User_Unread)"""
+    return (
+        db.query(BudgetAlert)
+        .filter(BudgetAlert.UserID == user_id, BudgetAlert.IsRead == False)
+        .order_by(BudgetAlert.CreatedAt.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def mark_alerts_read(db: Session, user_id: UUID, alert_ids: Optional[List[UUID]] = None) -> int:
+    """Đánh dấu đã đọc các cảnh báo (hoặc mọi cảnh báo chưa đọc) của user"""
+    query = db.query(BudgetAlert).filter(BudgetAlert.UserID == user_id, BudgetAlert.IsRead == False)
+    if alert_ids is not None:
+        query = query.filter(BudgetAlert.AlertID.in_(alert_ids))
+    updated = query.update({BudgetAlert.IsRead: True}, synchronize_session=False)
+    db.commit()
+    return updated
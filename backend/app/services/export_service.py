@@ -0,0 +1,143 @@
+# export_service.py
+"""Export lịch sử giao dịch dạng CSV hoặc NDJSON, stream từng khối.
+
+Dữ liệu được đọc bằng server-side cursor (yield_per) và ghi ra từng khối
+nhỏ, nên bộ nhớ không phụ thuộc vào độ dài lịch sử. Mỗi dòng kèm cột
+"cursor"; nếu kết nối bị ngắt, client gọi lại với cursor của dòng cuối cùng
+đã nhận đủ để tiếp tục.
+"""
+import csv
+import io
+import zlib
+from datetime import date
+from typing import Iterable, Iterator, Optional, Tuple
+from uuid import UUID
+
+from database import SessionLocal
+from crud import transaction_crud
+from schemas.transaction_schema import TransactionFilter
+from app.utils.json_response import dumps
+
+EXPORT_FIELDS = [
+    "cursor",
+    "transaction_id",
+    "transaction_date",
+    "transaction_time",
+    "transaction_type",
+    "amount",
+    "category_display_name",
+    "description",
+    "payment_method",
+    "location",
+    "notes",
+    "created_by",
+    "created_at",
+]
+
+# Số dòng gom lại trước khi đẩy một khối ra response
+FLUSH_ROWS = 500
+
+_UTF8_BOM = "\ufeff"
+
+
+def encode_cursor(transaction_date: date, transaction_id: UUID) -> str:
+    return f"{transaction_date.isoformat()}_{transaction_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[date, UUID]:
+    """Giải mã cursor 'YYYY-MM-DD_<uuid>'; ValueError nếu sai định dạng"""
+    day, _, transaction_id = cursor.partition("_")
+    return date.fromisoformat(day), UUID(transaction_id)
+
+
+def _row_values(row) -> list:
+    return [
+        encode_cursor(row.TransactionDate, row.TransactionID),
+        str(row.TransactionID),
+        row.TransactionDate.isoformat(),
+        row.TransactionTime.isoformat() if row.TransactionTime else None,
+        row.TransactionType,
+        str(row.Amount),
+        row.category_display_name,
+        row.Description,
+        row.PaymentMethod,
+        row.Location,
+        row.Notes,
+        row.CreatedBy,
+        row.CreatedAt.isoformat() if row.CreatedAt else None,
+    ]
+
+
+def _csv_chunks(rows: Iterable, with_header: bool) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if with_header:
+        # BOM để Excel đọc đúng tiếng Việt
+        buffer.write(_UTF8_BOM)
+        writer.writerow(EXPORT_FIELDS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(_row_values(row))
+        pending += 1
+        if pending >= FLUSH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def _ndjson_chunks(rows: Iterable) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(EXPORT_FIELDS, _row_values(row)))))
+        if len(lines) >= FLUSH_ROWS:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # wbits=31: định dạng gzip; Z_SYNC_FLUSH để client nhận được dữ liệu sau mỗi khối
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_transactions(
+    user_id: UUID,
+    filters: TransactionFilter,
+    export_format: str = "csv",
+    after: Optional[Tuple[date, UUID]] = None,
+    compress: bool = False,
+    batch_size: int = 1000
+) -> Iterator[bytes]:
+    """Generator trả về các khối bytes của file export.
+
+    Tự mở session riêng: dependency get_db đã đóng session trước khi
+    StreamingResponse bắt đầu gửi body.
+    """
+    db = SessionLocal()
+    try:
+        rows = transaction_crud.query_transactions_for_export(
+            db=db,
+            user_id=user_id,
+            filters=filters,
+            after=after,
+            batch_size=batch_size
+        )
+        if export_format == "ndjson":
+            chunks = _ndjson_chunks(rows)
+        else:
+            chunks = _csv_chunks(rows, with_header=after is None)
+        if compress:
+            chunks = _gzip_chunks(chunks)
+        yield from chunks
+    finally:
+        db.close()
@@ -0,0 +1,214 @@
+# forecast_service.py
+"""Dự báo chi tiêu cuối kỳ của ngân sách, kèm khoảng tin cậy.
+
+Mô hình cho từng danh mục (tính cùng lúc cho mọi danh mục của user bằng ma
+trận danh mục x ngày trên HISTORY_DAYS ngày gần nhất của DailyCategoryTotals,
+bắt đầu từ ngày chi đầu tiên trong khoảng đó):
+
+  * khoản định kỳ: ngày trong tháng mà danh mục có chi ở ít nhất
+    RECURRING_RATIO số tháng quan sát (tiền nhà, điện, học phí...) - dự báo
+    bằng trung bình các tháng tại đúng ngày đó;
+  * các ngày còn lại: trung bình theo thứ trong tuần, cộng chênh lệch của
+    MONTH_END_DAYS ngày cuối tháng;
+  * phương sai phần dư cho khoảng tin cậy (giả định các ngày độc lập).
+
+Tham số mô hình được cache theo user (_MODELS) đến khi hết ngày hoặc có giao
+dịch chi ghi vào khoảng lịch sử đã fit (transaction_crud gọi
+invalidate_user_forecast; giao dịch hôm nay/tương lai không đổi mô hình).
+Chỉ đường đọc mới fit lại: đường ghi (alert_service) gọi với refit=False và
+bỏ qua dự báo khi chưa có mô hình trong cache. Phép chiếu cho nhiều ngân sách
+là vài phép cộng dồn/lấy chỉ số trên mảng nên không cache.
+
+    projections = project_budgets(db, user_id, [BudgetPeriod(budget_id, start, end, category_ids, spent)])
+    projections[budget_id].projected_total, .lower, .upper
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.transaction import DailyCategoryTotal
+from services.trend_service import dense_series
+from app.utils.cache import InvalidatingCache
+
+HISTORY_DAYS = 182
+RECURRING_RATIO = 0.8
+MIN_RECURRING_MONTHS = 3
+MONTH_END_DAYS = 3
+# Khoảng tin cậy 90% hai phía
+Z_SCORE = 1.645
+_CENT = Decimal("0.01")
+
+_MODELS = InvalidatingCache("spend_forecast", ttl=3600)
+
+
+class BudgetPeriod(NamedTuple):
+    budget_id: UUID
+    period_start: date
+    period_end: date
+    user_category_ids: Sequence[UUID]
+    spent: Decimal
+
+
+class BudgetProjection(NamedTuple):
+    projected_total: Decimal
+    lower: Decimal
+    upper: Decimal
+
+
+class _Model(NamedTuple):
+    fitted_on: date
+    categories: Dict[UUID, int]
+    weekday_mean: np.ndarray     # danh mục x 7
+    month_end_delta: np.ndarray  # danh mục
+    residual_var: np.ndarray     # danh mục
+    recurring: np.ndarray        # danh mục x 31 (bool)
+    recurring_mean: np.ndarray   # danh mục x 31
+    recurring_var: np.ndarray    # danh mục x 31
+
+
+def invalidate_user_forecast(user_id: UUID, expense_dates: Iterable[date]) -> None:
+    """Bỏ mô hình đã cache nếu có ngày chi nằm trong khoảng lịch sử của lần fit"""
+    today = date.today()
+    history_from = today - timedelta(days=HISTORY_DAYS)
+    if any(day is not None and history_from <= day < today for day in expense_dates):
+        _MODELS.invalidate(user_id)
+
+
+def _calendar(days: np.ndarray):
+    """Thứ (0 = thứ Hai), ngày trong tháng (0-based) và cờ cuối tháng của từng ngày"""
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 là thứ Năm
+    months = days.astype("datetime64[M]")
+    day_of_month = (days - months.astype("datetime64[D]")).astype(np.int64)
+    to_month_end = ((months + 1).astype("datetime64[D]") - days).astype(np.int64)
+    return weekday, day_of_month, to_month_end <= MONTH_END_DAYS
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64), where=denominator > 0)
+
+
+def _fit(db: Session, user_id: UUID, today: date) -> _Model:
+    history_from = today - timedelta(days=HISTORY_DAYS)
+    history_to = today - timedelta(days=1)
+    rows = (
+        db.query(DailyCategoryTotal.TransactionDate, DailyCategoryTotal.UserCategoryID, DailyCategoryTotal.TotalAmount)
+        .filter(
+            DailyCategoryTotal.UserID == user_id,
+            DailyCategoryTotal.TransactionType == 'expense',
+            DailyCategoryTotal.TransactionDate >= history_from,
+            DailyCategoryTotal.TransactionDate <= history_to
+        )
+        .all()
+    )
+    categories: Dict[UUID, int] = {}
+    groups = np.fromiter(
+        (categories.setdefault(row[1], len(categories)) for row in rows), dtype=np.int64, count=len(rows)
+    )
+    dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    amounts = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    # User mới: chỉ tính từ ngày chi đầu tiên, không coi các ngày trước đó là chi 0
+    if rows:
+        history_from = max(history_from, min(row[0] for row in rows))
+    # Ma trận danh mục x ngày, ngày không chi = 0
+    spend = dense_series(dates, amounts, history_from, history_to, "daily", groups, max(len(categories), 1))
+    spend = spend[:len(categories)]
+
+    days = np.arange(np.datetime64(history_from, "D"), np.datetime64(history_to, "D") + 1)
+    weekday, day_of_month, month_end = _calendar(days)
+    weekday_onehot = np.eye(7)[weekday]
+    dom_onehot = np.eye(31)[day_of_month]
+
+    # Khoản định kỳ theo ngày trong tháng
+    observed = dom_onehot.sum(axis=0)
+    paid = (spend > 0).astype(np.float64) @ dom_onehot
+    recurring = (observed >= MIN_RECURRING_MONTHS) & (_safe_divide(paid, observed[None, :]) >= RECURRING_RATIO)
+    recurring_mean = _safe_divide(spend @ dom_onehot, observed[None, :])
+    recurring_var = np.maximum(_safe_divide((spend ** 2) @ dom_onehot, observed[None, :]) - recurring_mean ** 2, 0)
+
+    # Trung bình theo thứ trên các ngày thường (không định kỳ, không cuối tháng)
+    regular = ~recurring[:, day_of_month]
+    base_days = regular & ~month_end[None, :]
+    weekday_mean = _safe_divide((spend * base_days) @ weekday_onehot, base_days.astype(np.float64) @ weekday_onehot)
+
+    expected = weekday_mean[:, weekday]
+    end_days = regular & month_end[None, :]
+    month_end_delta = _safe_divide(((spend - expected) * end_days).sum(axis=1), end_days.sum(axis=1))
+    expected = np.maximum(expected + month_end_delta[:, None] * month_end[None, :], 0)
+    residual_var = _safe_divide((((spend - expected) ** 2) * regular).sum(axis=1), regular.sum(axis=1))
+
+    return _Model(today, categories, weekday_mean, month_end_delta, residual_var,
+                  recurring, recurring_mean, recurring_var)
+
+
+def _get_model(db: Session, user_id: UUID, today: date, refit: bool = True) -> Optional[_Model]:
+    if not refit:
+        model = _MODELS.peek(user_id)
+        return model if model is not None and model.fitted_on == today else None
+    model = _MODELS.get_or_load(user_id, lambda: _fit(db, user_id, today))
+    if model.fitted_on != today:
+        _MODELS.invalidate(user_id)
+        model = _MODELS.get_or_load(user_id, lambda: _fit(db, user_id, today))
+    return model
+
+
+def _to_money(values: np.ndarray) -> List[Decimal]:
+    return [Decimal(repr(round(float(value), 2))).quantize(_CENT) for value in values]
+
+
+def project_budgets(
+    db: Session,
+    user_id: UUID,
+    budgets: Sequence[BudgetPeriod],
+    today: Optional[date] = None,
+    refit: bool = True
+) -> Dict[UUID, BudgetProjection]:
+    """Dự báo tổng chi cuối kỳ cho các ngân sách = đã chi + kỳ vọng của các ngày
+    còn lại (từ mai đến hết kỳ), trên các danh mục của từng ngân sách.
+
+    refit=False chỉ dùng mô hình đã cache; chưa có thì trả về {}."""
+    if not budgets:
+        return {}
+    today = today or date.today()
+    model = _get_model(db, user_id, today, refit)
+    if model is None:
+        return {}
+
+    horizon_end = max(budget.period_end for budget in budgets)
+    horizon = max((horizon_end - today).days, 0)
+    days = np.arange(np.datetime64(today, "D") + 1, np.datetime64(today, "D") + 1 + horizon)
+    weekday, day_of_month, month_end = _calendar(days)
+
+    # Kỳ vọng và phương sai danh mục x ngày tương lai, cộng dồn theo ngày (cột 0 = chưa có ngày nào)
+    is_recurring = model.recurring[:, day_of_month]
+    regular = np.maximum(model.weekday_mean[:, weekday] + model.month_end_delta[:, None] * month_end[None, :], 0)
+    expected = np.where(is_recurring, model.recurring_mean[:, day_of_month], regular)
+    variance = np.where(is_recurring, model.recurring_var[:, day_of_month], model.residual_var[:, None])
+    size = len(model.categories)
+    cumulative_expected = np.concatenate([np.zeros((size, 1)), np.cumsum(expected, axis=1)], axis=1)
+    cumulative_variance = np.concatenate([np.zeros((size, 1)), np.cumsum(variance, axis=1)], axis=1)
+
+    # Ma trận ngân sách x danh mục và khoảng ngày còn lại [start, end) của từng ngân sách
+    membership = np.zeros((len(budgets), size))
+    for row, budget in enumerate(budgets):
+        columns = [model.categories[c] for c in budget.user_category_ids if c in model.categories]
+        membership[row, columns] = 1
+    first_day = today + timedelta(days=1)
+    starts = np.array([max((budget.period_start - first_day).days, 0) for budget in budgets])
+    ends = np.array([max((budget.period_end - today).days, 0) for budget in budgets])
+    starts = np.minimum(starts, ends)
+
+    remaining = (membership * (cumulative_expected[:, ends] - cumulative_expected[:, starts]).T).sum(axis=1)
+    spread = Z_SCORE * np.sqrt((membership * (cumulative_variance[:, ends] - cumulative_variance[:, starts]).T).sum(axis=1))
+
+    spent = np.fromiter((budget.spent for budget in budgets), dtype=np.float64, count=len(budgets))
+    projected = spent + remaining
+    lower = np.maximum(projected - spread, spent)
+    upper = projected + spread
+    return {
+        budget.budget_id: BudgetProjection(*values)
+        for budget, values in zip(budgets, zip(_to_money(projected), _to_money(lower), _to_money(upper)))
+    }
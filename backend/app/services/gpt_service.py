@@ -7,6 +7,7 @@ from decimal import Decimal
 from sqlalchemy.orm import Session
 from uuid import UUID
 import asyncio
+import time
 from openai import OpenAI
 
 from schemas.chat_schema import Intent, ActionType, TransactionFromChatRequest
@@ -14,6 +15,7 @@ from schemas.transaction_schema import TransactionCreate
 from crud import transaction_crud
 from crud.category_crud import get_user_category_id_by_display_name
 from app.config import settings  # Import your settings
+from app.utils import metrics
 
 class FinancialChatbotService:
     """Financial advice chatbot service with NLP capabilities"""
@@ -24,6 +26,7 @@ class FinancialChatbotService:
             base_url="https://openrouter.ai/api/v1",
             api_key=settings.OPENAI_API_KEY  # Use your config
         )
+        self.model = "openai/gpt-3.5-turbo"  # or use "openai/gpt-4" for better results
         
         self.intent_patterns = {
             Intent.ADD_TRANSACTION: [
@@ -98,8 +101,10 @@ class FinancialChatbotService:
                     confidence = 0.8  # Base confidence
                     if len([p for p in patterns if re.search(p, message, re.IGNORECASE)]) > 1:
                         confidence = 0.9  # Higher confidence if multiple patterns match
+                    metrics.CHAT_INTENTS.labels(intent.value).inc()
                     return intent, confidence
         
+        metrics.CHAT_INTENTS.labels(Intent.GENERAL_QUERY.value).inc()
         return Intent.GENERAL_QUERY, 0.5
 
     def extract_entities(self, message: str, intent: Intent) -> Dict[str, Any]:
@@ -193,15 +198,28 @@ class FinancialChatbotService:
             if financial_context:
                 user_context += f"Financial context: {json.dumps(financial_context, ensure_ascii=False)}\n"
             
-            completion = self.client.chat.completions.create(
-                model="openai/gpt-3.5-turbo",  # or use "openai/gpt-4" for better results
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_context}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            started = time.perf_counter()
+            try:
+                completion = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_context}
+                    ],
+                    max_tokens=500,
+                    temperature=0.7
+                )
+            except Exception:
+                metrics.LLM_REQUESTS.labels(self.model, "error").inc()
+                raise
+            finally:
+                metrics.LLM_LATENCY.labels(self.model).observe(time.perf_counter() - started)
+
+            metrics.LLM_REQUESTS.labels(self.model, "ok").inc()
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                metrics.LLM_TOKENS.labels(self.model, "prompt").inc(usage.prompt_tokens or 0)
+                metrics.LLM_TOKENS.labels(self.model, "completion").inc(usage.completion_tokens or 0)
             
             return completion.choices[0].message.content.strip()
             
@@ -341,6 +359,11 @@ Bạn muốn làm gì hôm nay?"""
             )
             
             transaction_type_vn = "thu nhập" if entities.get('transaction_type') == 'income' else "chi tiêu"
+            duplicate_note = (
+                f"\n\n⚠️ Ngày {created_transaction.transaction_date.strftime('%d/%m/%Y')} đã có một giao dịch "
+                "cùng số tiền và mô tả. Nếu bị ghi trùng, bạn có thể xoá bớt một giao dịch."
+                if created_transaction.possible_duplicate else ""
+            )
             
             return (
                 f"✅ Đã ghi nhận giao dịch thành công!\n\n"
@@ -348,13 +371,16 @@ Bạn muốn làm gì hôm nay?"""
                 f"• Loại: {transaction_type_vn.title()}\n"
                 f"• Số tiền: {entities['amount']:,.0f} VNĐ\n"
                 f"• Danh mục: {entities['category']}\n"
-                f"• Thời gian: {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+                f"• Thời gian: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+                f"{duplicate_note}",
                 ActionType.TRANSACTION_CREATED,
                 {
                     "transaction_id": str(created_transaction.TransactionID),
                     "amount": entities['amount'],
                     "category": entities['category'],
-                    "type": entities.get('transaction_type', 'expense')
+                    "type": entities.get('transaction_type', 'expense'),
+                    "possible_duplicate": created_transaction.possible_duplicate,
+                    "duplicate_of": str(created_transaction.duplicate_of) if created_transaction.duplicate_of else None
                 }
             )
             
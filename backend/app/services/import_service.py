@@ -0,0 +1,359 @@
+# import_service.py
+"""Import giao dịch hàng loạt từ file CSV hoặc sao kê OFX/QFX.
+
+Quy trình:
+  1. Đọc file theo dòng, chuẩn hoá và validate từng dòng bằng kiểm tra nhẹ
+     thay vì dựng model Pydantic cho mỗi dòng.
+  2. Cứ đủ CHUNK_SIZE dòng hợp lệ thì gom các cặp (tên danh mục, loại) của lô
+     và tra một lần bằng category_crud.resolve_user_category_ids.
+  3. Insert lô đó ngay (executemany, mỗi lô một transaction) rồi bỏ khỏi bộ
+     nhớ: bộ nhớ không tăng theo số dòng hợp lệ, chỉ còn bảng đếm lần xuất
+     hiện của hash dòng (dùng cho ExternalID bên dưới).
+
+Mỗi dòng có một ExternalID: FITID của OFX, cột external_id của CSV, hoặc hash
+của (ngày, loại, số tiền, mô tả) kèm số thứ tự lần xuất hiện trong file. Upload
+lại cùng file sẽ bỏ qua các dòng đã import.
+
+Ngoài ra mỗi dòng được so với DedupKey (số tiền, ngày, mô tả chuẩn hoá) của
+các giao dịch đã có, kể cả nhập tay hay từ chatbot: dòng trùng được đếm vào
+likely_duplicates, hoặc bị bỏ qua nếu skip_duplicates=True.
+"""
+import codecs
+import csv
+import hashlib
+import re
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from crud import transaction_crud
+from crud.category_crud import resolve_user_category_ids
+from app.utils.text_normalize import transaction_fingerprint
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+MAX_AMOUNT = Decimal("9999999999999.99")  # DECIMAL(15,2)
+
+# Tên cột CSV được chấp nhận -> trường nội bộ (khớp cả file từ /transactions/export)
+CSV_COLUMNS = {
+    "transaction_date": "date", "date": "date", "ngay": "date", "ngày": "date",
+    "amount": "amount", "so_tien": "amount", "số tiền": "amount",
+    "transaction_type": "type", "type": "type", "loai": "type", "loại": "type",
+    "category_display_name": "category", "category": "category", "danh_muc": "category", "danh mục": "category",
+    "description": "description", "mo_ta": "description", "mô tả": "description",
+    "transaction_time": "time", "time": "time",
+    "payment_method": "payment_method",
+    "location": "location",
+    "notes": "notes",
+    "external_id": "external_id", "transaction_id": "external_id", "fitid": "external_id",
+}
+
+MAX_LENGTHS = {"description": 500, "payment_method": 50, "location": 255, "notes": 500, "category": 100}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%Y%m%d")
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+# ==================== PARSE ====================
+
+def _text_lines(stream: BinaryIO) -> Iterator[str]:
+    """Đọc file upload theo dòng; utf-8-sig bỏ BOM nếu có"""
+    reader = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    for line in reader:
+        yield line
+
+
+def iter_csv_records(stream: BinaryIO) -> Iterator[Dict[str, str]]:
+    reader = csv.reader(_text_lines(stream))
+    header = next(reader, None)
+    if not header:
+        return
+    fields = [CSV_COLUMNS.get(name.strip().lower()) for name in header]
+    if "date" not in fields or "amount" not in fields:
+        raise ImportRowError("CSV cần có cột ngày (transaction_date) và số tiền (amount)")
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield {field: value for field, value in zip(fields, values) if field}
+
+
+def iter_ofx_records(stream: BinaryIO) -> Iterator[Dict[str, str]]:
+    """Đọc các khối <STMTTRN> của OFX/QFX (cả dạng SGML không đóng thẻ lẫn XML)"""
+    record: Optional[Dict[str, str]] = None
+    for line in _text_lines(stream):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing:
+                    if record is not None:
+                        yield record
+                    record = None
+                else:
+                    record = {}
+                continue
+            if record is None or closing:
+                continue
+            value = value.strip()
+            if tag == "DTPOSTED":
+                record["date"] = value[:8]
+            elif tag == "TRNAMT":
+                record["amount"] = value
+            elif tag == "FITID":
+                record["external_id"] = f"ofx:{value}"
+            elif tag == "NAME":
+                record["description"] = value
+            elif tag == "MEMO":
+                record["notes"] = value
+    if record:
+        yield record
+
+
+def detect_format(filename: Optional[str], file_format: str) -> str:
+    if file_format != "auto":
+        return file_format
+    name = (filename or "").lower()
+    return "ofx" if name.endswith((".ofx", ".qfx")) else "csv"
+
+
+# ==================== VALIDATE ====================
+
+def _parse_date(value: str) -> date:
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ImportRowError(f"Ngày không hợp lệ: {value!r}")
+
+
+def _parse_amount(value: str) -> Decimal:
+    cleaned = value.strip().replace(" ", "").replace("₫", "").replace("VND", "")
+    # 1.234.567,50 (kiểu Việt Nam) hoặc 1,234,567.50
+    if "," in cleaned and "." in cleaned:
+        if cleaned.rfind(",") > cleaned.rfind("."):
+            cleaned = cleaned.replace(".", "").replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    elif "," in cleaned:
+        if cleaned.count(",") == 1 and len(cleaned.split(",")[1]) <= 2:
+            cleaned = cleaned.replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    elif "." in cleaned:
+        # 100.000 hoặc 1.234.567 là dấu phân cách hàng nghìn
+        parts = cleaned.split(".")
+        if len(parts) > 2 or len(parts[1]) == 3:
+            cleaned = cleaned.replace(".", "")
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise ImportRowError(f"Số tiền không hợp lệ: {value!r}")
+    if not amount.is_finite():
+        raise ImportRowError(f"Số tiền không hợp lệ: {value!r}")
+    return amount
+
+
+def _parse_time(value: Optional[str]) -> Optional[time]:
+    if not value or not value.strip():
+        return None
+    try:
+        return time.fromisoformat(value.strip())
+    except ValueError:
+        raise ImportRowError(f"Giờ không hợp lệ: {value!r}")
+
+
+def _clean_text(record: Dict[str, str], field: str) -> Optional[str]:
+    value = (record.get(field) or "").strip()
+    if not value:
+        return None
+    if len(value) > MAX_LENGTHS[field]:
+        raise ImportRowError(f"{field} dài quá {MAX_LENGTHS[field]} ký tự")
+    return value
+
+
+def validate_record(
+    record: Dict[str, str],
+    default_categories: Dict[str, Optional[str]]
+) -> Dict:
+    """Chuẩn hoá một dòng; ném ImportRowError nếu dòng không hợp lệ"""
+    if not record.get("date") or not record.get("amount"):
+        raise ImportRowError("Thiếu ngày hoặc số tiền")
+    transaction_date = _parse_date(record["date"])
+    amount = _parse_amount(record["amount"])
+
+    transaction_type = (record.get("type") or "").strip().lower()
+    if not transaction_type:
+        # Sao kê ngân hàng: số âm là chi, số dương là thu
+        transaction_type = "expense" if amount < 0 else "income"
+    if transaction_type not in ("income", "expense"):
+        raise ImportRowError(f"Loại giao dịch không hợp lệ: {transaction_type!r}")
+
+    amount = abs(amount).quantize(Decimal("0.01"))
+    if amount <= 0:
+        raise ImportRowError("Số tiền phải lớn hơn 0")
+    if amount > MAX_AMOUNT:
+        raise ImportRowError("Số tiền vượt quá giới hạn")
+
+    category = _clean_text(record, "category") or default_categories.get(transaction_type)
+    if not category:
+        raise ImportRowError("Thiếu danh mục và không có danh mục mặc định cho loại giao dịch này")
+
+    external_id = (record.get("external_id") or "").strip() or None
+    if external_id and len(external_id) > 64:
+        external_id = "sha1:" + hashlib.sha1(external_id.encode("utf-8")).hexdigest()
+
+    return {
+        "TransactionDate": transaction_date,
+        "TransactionTime": _parse_time(record.get("time")),
+        "TransactionType": transaction_type,
+        "Amount": amount,
+        "Description": _clean_text(record, "description"),
+        "PaymentMethod": _clean_text(record, "payment_method"),
+        "Location": _clean_text(record, "location"),
+        "Notes": _clean_text(record, "notes"),
+        "category": category,
+        "ExternalID": external_id,
+    }
+
+
+def _row_fingerprint(row: Dict, occurrence: int) -> str:
+    key = "|".join([
+        row["TransactionDate"].isoformat(),
+        row["TransactionType"],
+        str(row["Amount"]),
+        (row["Description"] or "").lower(),
+        str(occurrence),
+    ])
+    return "row:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+# ==================== IMPORT ====================
+
+def import_transactions(
+    db: Session,
+    user_id: UUID,
+    stream: BinaryIO,
+    file_format: str,
+    default_expense_category: Optional[str] = None,
+    default_income_category: Optional[str] = None,
+    skip_duplicates: bool = False
+) -> Dict:
+    """Import file và trả về thống kê kèm lỗi theo từng dòng"""
+    records = iter_ofx_records(stream) if file_format == "ofx" else iter_csv_records(stream)
+    default_categories = {"expense": default_expense_category, "income": default_income_category}
+
+    errors: List[Dict] = []
+    failed = 0
+    pending: List[Tuple[int, Dict]] = []
+    occurrences: Dict[str, int] = {}
+    total_rows = 0
+    imported = duplicates = likely_duplicates = 0
+    likely_duplicate_rows: List[int] = []
+
+    def reject(row_number: int, message: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": message})
+
+    def flush() -> None:
+        """Ghi các dòng hợp lệ đang chờ (tối đa CHUNK_SIZE) rồi bỏ chúng khỏi bộ nhớ"""
+        nonlocal imported, duplicates, likely_duplicates
+        batch = pending[:]
+        pending.clear()
+        if not batch:
+            return
+        # Một lần tra danh mục cho cả lô (catalogue đã cache, lô sau thường không query)
+        category_ids = resolve_user_category_ids(
+            db, user_id, {(row["category"], row["TransactionType"]) for _, row in batch}
+        )
+
+        chunk: List[Dict] = []
+        chunk_numbers: List[int] = []
+        for row_number, row in batch:
+            user_category_id = category_ids.get((row.pop("category"), row["TransactionType"]))
+            if user_category_id is None:
+                reject(row_number, "Không tìm thấy danh mục phù hợp")
+                continue
+            row["UserCategoryID"] = user_category_id
+            row["CreatedBy"] = "imported"
+            if row["TransactionTime"] is None:
+                row["TransactionTime"] = time(0, 0)
+            chunk.append(row)
+            chunk_numbers.append(row_number)
+        if not chunk:
+            return
+
+        # Dòng đã import từ lần upload trước không tính là "có thể trùng"
+        already_imported = transaction_crud.get_existing_external_ids(
+            db, user_id, [row["ExternalID"] for row in chunk]
+        )
+        if already_imported:
+            duplicates += sum(1 for row in chunk if row["ExternalID"] in already_imported)
+            pairs = [(n, row) for n, row in zip(chunk_numbers, chunk) if row["ExternalID"] not in already_imported]
+            chunk_numbers = [n for n, _ in pairs]
+            chunk = [row for _, row in pairs]
+
+        for row in chunk:
+            row["DedupKey"] = transaction_fingerprint(row["Amount"], row["TransactionDate"], row["Description"])
+        # Một query theo index (UserID, DedupKey) cho cả lô
+        matches = transaction_crud.find_duplicate_transactions(db, user_id, [row["DedupKey"] for row in chunk])
+        if matches:
+            kept = []
+            for row_number, row in zip(chunk_numbers, chunk):
+                if row["DedupKey"] in matches:
+                    likely_duplicates += 1
+                    if len(likely_duplicate_rows) < MAX_REPORTED_ERRORS:
+                        likely_duplicate_rows.append(row_number)
+                    if skip_duplicates:
+                        continue
+                kept.append(row)
+            chunk = kept
+        inserted, skipped = transaction_crud.bulk_insert_transactions(db, user_id, chunk)
+        imported += inserted
+        duplicates += skipped
+
+    try:
+        for row_number, record in enumerate(records, start=1):
+            total_rows = row_number
+            try:
+                row = validate_record(record, default_categories)
+            except ImportRowError as e:
+                reject(row_number, str(e))
+                continue
+            if row["ExternalID"] is None:
+                base = _row_fingerprint(row, 0)
+                occurrence = occurrences.get(base, 0)
+                occurrences[base] = occurrence + 1
+                row["ExternalID"] = base if occurrence == 0 else _row_fingerprint(row, occurrence)
+            pending.append((row_number, row))
+            if len(pending) >= CHUNK_SIZE:
+                flush()
+    except ImportRowError as e:
+        # Lỗi ở mức file (vd. thiếu cột bắt buộc)
+        return {"total_rows": 0, "imported": 0, "duplicates": 0, "failed": 0,
+                "likely_duplicates": 0, "likely_duplicate_rows": [],
+                "errors": [{"row": 0, "error": str(e)}]}
+    except csv.Error as e:
+        reject(total_rows + 1, f"CSV không hợp lệ: {str(e)}")
+    flush()
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "total_rows": total_rows,
+        "imported": imported,
+        "duplicates": duplicates,
+        "failed": failed,
+        "likely_duplicates": likely_duplicates,
+        "likely_duplicate_rows": likely_duplicate_rows,
+        "errors": errors,
+    }
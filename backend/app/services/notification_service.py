@@ -0,0 +1,59 @@
+# notification_service.py
+"""Sự kiện realtime gửi tới client của một user, qua app.utils.pubsub.BROKER
+trên kênh "user:<UserID>" (routes/events_routes.py đẩy ra SSE/WebSocket).
+
+Mỗi tin có dạng {"type": ..., "data": ..., "at": ...}:
+  * balance.changed     - chênh lệch thu/chi của một lần ghi giao dịch
+  * budget.alert        - BudgetAlert vừa được tạo
+  * transaction.created - giao dịch do chatbot tạo
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Tuple
+from uuid import UUID
+
+from schemas.transaction_schema import TransactionCreateResponse
+from app.utils.pubsub import BROKER
+
+
+def user_channel(user_id: UUID) -> str:
+    return f"user:{user_id}"
+
+
+def publish_user_event(user_id: UUID, event_type: str, data: Any) -> None:
+    BROKER.publish(user_channel(user_id), {"type": event_type, "data": data, "at": datetime.utcnow()})
+
+
+def notify_balance_change(user_id: UUID, changes: Iterable[Tuple[UUID, Any, str, Decimal]]) -> None:
+    """changes: (UserCategoryID, ngày, loại, số tiền có dấu) như transaction_crud truyền vào"""
+    deltas: Dict[str, Decimal] = {"income": Decimal("0"), "expense": Decimal("0")}
+    count = 0
+    for _, _, transaction_type, amount in changes:
+        if transaction_type in deltas:
+            deltas[transaction_type] += amount
+        count += 1
+    if not any(deltas.values()):
+        return
+    publish_user_event(user_id, "balance.changed", {
+        "income_delta": deltas["income"],
+        "expense_delta": deltas["expense"],
+        "net_delta": deltas["income"] - deltas["expense"],
+        "changes": count,
+    })
+
+
+def notify_budget_alerts(user_id: UUID, alerts: Iterable[Dict[str, Any]]) -> None:
+    for alert in alerts:
+        publish_user_event(user_id, "budget.alert", {
+            "alert_id": alert["AlertID"],
+            "budget_id": alert["BudgetID"],
+            "budget_category_id": alert["BudgetCategoryID"],
+            "alert_type": alert["AlertType"],
+            "current_amount": alert["CurrentAmount"],
+            "percentage_used": alert["PercentageUsed"],
+            "message": alert["Message"],
+        })
+
+
+def notify_transaction_created(user_id: UUID, transaction: TransactionCreateResponse) -> None:
+    publish_user_event(user_id, "transaction.created", transaction.model_dump(mode="json", by_alias=True))
@@ -0,0 +1,179 @@
+# trend_service.py
+"""Chuỗi xu hướng chi tiêu dày đặc (mỗi kỳ một giá trị, kỳ không có giao dịch = 0)
+theo ngày/tuần/tháng, tính bằng NumPy.
+
+    trend = build_trend(db, user_id, date(2021, 1, 1), date.today(), period_type="monthly")
+    trend["labels"]          # ["2021-01-01", "2021-02-01", ...] - ngày đầu mỗi kỳ
+    trend["amounts"]         # np.ndarray float64, cùng độ dài với labels
+    trend["cumulative"]      # cộng dồn
+    trend["moving_average"]  # trung bình trượt (cửa sổ trend["window"] kỳ)
+
+Dữ liệu lấy từ bảng tổng hợp: theo ngày/tuần đọc DailyCategoryTotals, theo
+tháng đọc qua summary_crud.get_period_totals (tháng đã chốt lấy từ snapshot).
+Gom kỳ bằng np.bincount, nên chi phí là một lượt qua các dòng tổng hợp; mảng
+được FastJSONResponse (orjson OPT_SERIALIZE_NUMPY) serialize thẳng, không
+dựng dict cho từng điểm.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from crud.category_crud import get_user_catalog
+from crud.summary_crud import get_period_totals
+from models.transaction import DailyCategoryTotal
+
+PERIOD_TYPES = ("daily", "weekly", "monthly")
+DEFAULT_WINDOWS = {"daily": 7, "weekly": 4, "monthly": 3}
+
+
+def _first_bucket(date_from: date, period_type: str) -> np.datetime64:
+    start = np.datetime64(date_from, "D")
+    if period_type == "weekly":
+        # Tuần bắt đầu từ thứ Hai
+        return start - np.timedelta64(date_from.weekday(), "D")
+    if period_type == "monthly":
+        return start.astype("datetime64[M]").astype("datetime64[D]")
+    return start
+
+
+def bucket_starts(date_from: date, date_to: date, period_type: str) -> np.ndarray:
+    """Ngày đầu của mọi kỳ phủ [date_from, date_to] (datetime64[D])"""
+    end = np.datetime64(date_to, "D")
+    if period_type == "monthly":
+        months = np.arange(
+            np.datetime64(date_from, "M"), end.astype("datetime64[M]") + 1, dtype="datetime64[M]"
+        )
+        return months.astype("datetime64[D]")
+    step = 7 if period_type == "weekly" else 1
+    return np.arange(_first_bucket(date_from, period_type), end + 1, step, dtype="datetime64[D]")
+
+
+def bucket_index(dates: np.ndarray, date_from: date, period_type: str) -> np.ndarray:
+    """Chỉ số kỳ (0-based) của từng ngày trong dates"""
+    if period_type == "monthly":
+        return (dates.astype("datetime64[M]") - np.datetime64(date_from, "M")).astype(np.int64)
+    offsets = (dates - _first_bucket(date_from, period_type)).astype(np.int64)
+    return offsets // 7 if period_type == "weekly" else offsets
+
+
+def dense_series(
+    dates: np.ndarray,
+    amounts: np.ndarray,
+    date_from: date,
+    date_to: date,
+    period_type: str,
+    groups: Optional[np.ndarray] = None,
+    group_count: int = 1
+) -> np.ndarray:
+    """Ma trận (group_count x số kỳ) tổng tiền mỗi kỳ, kỳ trống = 0"""
+    size = len(bucket_starts(date_from, date_to, period_type))
+    index = bucket_index(dates, date_from, period_type)
+    if groups is not None:
+        index = groups * size + index
+    return np.bincount(index, weights=amounts, minlength=group_count * size).reshape(group_count, size)
+
+
+def moving_average(series: np.ndarray, window: int) -> np.ndarray:
+    """Trung bình trượt theo trục cuối; các kỳ đầu (chưa đủ cửa sổ) chia cho số kỳ đã có"""
+    cumulative = np.cumsum(series, axis=-1)
+    lagged = np.zeros_like(cumulative)
+    lagged[..., window:] = cumulative[..., :-window]
+    counts = np.minimum(np.arange(1, series.shape[-1] + 1), window)
+    return (cumulative - lagged) / counts
+
+
+def _load_rows(
+    db: Session,
+    user_id: UUID,
+    date_from: date,
+    date_to: date,
+    period_type: str,
+    transaction_type: str,
+    user_category_ids: Optional[Sequence[UUID]]
+) -> List[tuple]:
+    """Các dòng (ngày, UserCategoryID, số tiền) đã gộp ở mức tổng hợp"""
+    if period_type == "monthly":
+        wanted = set(user_category_ids) if user_category_ids is not None else None
+        return [
+            (total.PeriodMonth, total.UserCategoryID, total.TotalAmount)
+            for total in get_period_totals(db, user_id, date_from, date_to, transaction_type)
+            if wanted is None or total.UserCategoryID in wanted
+        ]
+
+    query = db.query(
+        DailyCategoryTotal.TransactionDate,
+        DailyCategoryTotal.UserCategoryID,
+        func.sum(DailyCategoryTotal.TotalAmount)
+    ).filter(
+        DailyCategoryTotal.UserID == user_id,
+        DailyCategoryTotal.TransactionType == transaction_type,
+        DailyCategoryTotal.TransactionDate >= date_from,
+        DailyCategoryTotal.TransactionDate <= date_to
+    )
+    if user_category_ids is not None:
+        query = query.filter(DailyCategoryTotal.UserCategoryID.in_(list(user_category_ids)))
+    return query.group_by(DailyCategoryTotal.TransactionDate, DailyCategoryTotal.UserCategoryID).all()
+
+
+def build_trend(
+    db: Session,
+    user_id: UUID,
+    date_from: date,
+    date_to: date,
+    period_type: str = "daily",
+    transaction_type: str = "expense",
+    user_category_ids: Optional[Sequence[UUID]] = None,
+    by_category: bool = False,
+    window: Optional[int] = None
+) -> Dict[str, Any]:
+    """Xu hướng dày đặc trong [date_from, date_to]; by_category thêm chuỗi riêng
+    cho từng danh mục có giao dịch (cùng trục kỳ với chuỗi tổng)."""
+    if period_type not in PERIOD_TYPES:
+        raise ValueError(f"period_type phải là một trong {', '.join(PERIOD_TYPES)}")
+    window = window or DEFAULT_WINDOWS[period_type]
+    starts = bucket_starts(date_from, date_to, period_type)
+    rows = _load_rows(db, user_id, date_from, date_to, period_type, transaction_type, user_category_ids)
+
+    dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    amounts = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    category_ids: List[UUID] = []
+    groups = None
+    if by_category:
+        positions: Dict[UUID, int] = {}
+        groups = np.fromiter(
+            (positions.setdefault(row[1], len(positions)) for row in rows), dtype=np.int64, count=len(rows)
+        )
+        category_ids = list(positions)
+
+    if by_category and category_ids:
+        per_category = dense_series(dates, amounts, date_from, date_to, period_type, groups, len(category_ids))
+        series = per_category.sum(axis=0)
+    else:
+        per_category = np.zeros((0, len(starts)))
+        series = dense_series(dates, amounts, date_from, date_to, period_type)[0]
+
+    trend: Dict[str, Any] = {
+        "period_type": period_type,
+        "window": window,
+        "labels": np.datetime_as_string(starts, unit="D").tolist(),
+        "amounts": np.round(series, 2),
+        "cumulative": np.round(np.cumsum(series), 2),
+        "moving_average": np.round(moving_average(series, window), 2),
+        "total": round(float(series.sum()), 2),
+    }
+    if by_category:
+        names = get_user_catalog(db, user_id).names
+        trend["categories"] = [
+            {
+                "user_category_id": category_id,
+                "name": names.get(category_id, "Unknown Category"),
+                "amounts": np.round(per_category[position], 2),
+                "cumulative": np.round(np.cumsum(per_category[position]), 2),
+            }
+            for position, category_id in enumerate(category_ids)
+        ]
+    return trend
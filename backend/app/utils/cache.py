@@ -0,0 +1,88 @@
+# utils/cache.py
+"""Cache trong bộ nhớ theo khoá, có TTL và huỷ (invalidate) khi dữ liệu nguồn thay đổi.
+
+    CATALOG = InvalidatingCache("category_catalog", ttl=300)
+    catalog = CATALOG.get_or_load(user_id, lambda: load_catalog(db, user_id))
+    ...
+    db.commit()
+    CATALOG.invalidate(user_id)
+
+Mỗi khoá đang được load có một số phiên bản; invalidate() tăng phiên bản nên
+kết quả của một lần load đang chạy song song (đọc dữ liệu trước khi commit)
+sẽ không được lưu lại. Phiên bản bị xoá khi lần load cuối của khoá kết thúc,
+nên số khoá được theo dõi không vượt quá số lần load đang chạy.
+
+Cache chỉ nằm trong một process: khi chạy nhiều worker, TTL giới hạn thời
+gian một worker khác còn thấy dữ liệu cũ.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from app.utils.metrics import record_cache
+
+
+class InvalidatingCache:
+    def __init__(self, name: str, ttl: float = 300.0, max_entries: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # khoá đang load -> [phiên bản, số lần load đang chạy]
+        self._loading: Dict[Hashable, List[int]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                record_cache(self.name, True)
+                return entry[1]
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[1] += 1
+            version = (self._generation, loading[0])
+        record_cache(self.name, False)
+
+        try:
+            value = loader()
+        except BaseException:
+            with self._lock:
+                self._release(key, loading)
+            raise
+        with self._lock:
+            # Bỏ theo dõi và kiểm tra phiên bản trong cùng một lần giữ lock
+            self._release(key, loading)
+            if (self._generation, loading[0]) == version:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def _release(self, key: Hashable, loading: List[int]) -> None:
+        loading[1] -= 1
+        if not loading[1]:
+            del self._loading[key]
+
+    def peek(self, key: Hashable) -> Any:
+        """Giá trị còn hạn của khoá, hoặc None - không gọi loader"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                return entry[1]
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            loading = self._loading.get(key)
+            if loading is not None:
+                loading[0] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
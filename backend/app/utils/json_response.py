@@ -0,0 +1,50 @@
+# utils/json_response.py
+"""Response class JSON mặc định của toàn bộ API, dùng orjson.
+
+orjson tự xử lý UUID, date, datetime, time và enum, trả thẳng bytes UTF-8
+(không escape tiếng Việt), nên không cần middleware sửa content-type hay
+json.dumps(ensure_ascii=False) thủ công nữa.
+
+Nếu content là một pydantic model (vd. dựng bằng model_construct từ dữ liệu
+DB), model được serialize thẳng ra bytes bằng pydantic-core, không qua dict
+trung gian và không validate lại.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        # Giống jsonable_encoder: số nguyên giữ int, còn lại float
+        # (NaN/Infinity có exponent là chuỗi; float() của chúng được orjson ghi thành null)
+        if not obj.is_finite():
+            return float(obj)
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if hasattr(obj, "model_dump"):
+        # Model lồng trong dict/list cũng theo alias, như model ở cấp ngoài cùng
+        return obj.model_dump(mode="json", by_alias=True)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json; charset=utf-8"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # by_alias như response_model của FastAPI
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+        return dumps(content)
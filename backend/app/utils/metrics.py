@@ -0,0 +1,315 @@
+# utils/metrics.py
+"""Registry metrics tối giản theo định dạng text của Prometheus.
+
+Không phụ thuộc thư viện ngoài. API giống prometheus_client ở mức cơ bản:
+
+    REQUESTS = counter("http_requests_total", "Tổng số request", ["method", "route", "status"])
+    REQUESTS.labels("GET", "/transactions/", "200").inc()
+
+Mỗi child (một bộ giá trị label) được cache nên trên hot path chỉ tốn
+một lần tra dict và một lần cộng dưới lock.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # ô cuối là +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        # Giá trị label nên là str; không ép kiểu ở đây để giữ hot path rẻ
+        key = values
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} cần {len(self.labelnames)} label, nhận {len(key)}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Module có thể bị import hai lần (app.xxx và xxx) - dùng lại metric cũ
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Callback chạy trước mỗi lần expose để cập nhật gauge (vd. pool DB)"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def expose(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector error: {str(e)}")
+        return "\n".join(metric.expose() for metric in list(self._metrics.values())) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ==================== METRICS DÙNG CHUNG ====================
+
+HTTP_REQUESTS = counter("http_requests_total", "Total HTTP requests", ["method", "route", "status"])
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests currently being served")
+HTTP_DB_QUERIES = histogram(
+    "http_request_db_queries", "SQL statements per request", ["route"],
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+
+DB_POOL_SIZE = gauge("db_pool_size", "Configured connection pool size", ["engine"])
+DB_POOL_CHECKED_OUT = gauge("db_pool_checked_out", "Connections currently checked out", ["engine"])
+DB_POOL_CHECKED_IN = gauge("db_pool_checked_in", "Idle connections in the pool", ["engine"])
+DB_POOL_OVERFLOW = gauge("db_pool_overflow", "Overflow connections in use", ["engine"])
+
+LLM_REQUESTS = counter("llm_requests_total", "LLM completion calls", ["model", "status"])
+LLM_LATENCY = histogram(
+    "llm_request_duration_seconds", "LLM completion latency", ["model"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+LLM_TOKENS = counter("llm_tokens_total", "LLM tokens consumed", ["model", "kind"])
+
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups", ["cache", "result"])
+CACHE_HIT_RATIO = gauge("cache_hit_ratio", "Cache hit ratio since process start", ["cache"])
+
+CHAT_INTENTS = counter("chat_intents_total", "Detected chat intents", ["intent"])
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _collect_cache_ratio() -> None:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), child in list(CACHE_REQUESTS._children.items()):
+        bucket = totals.setdefault(cache, [0.0, 0.0])
+        bucket[0 if result == "hit" else 1] += child.value
+    for cache, (hits, misses) in totals.items():
+        if hits + misses:
+            CACHE_HIT_RATIO.labels(cache).set(hits / (hits + misses))
+
+
+def register_engine(name: str, engine) -> None:
+    """Theo dõi pool của engine (đọc khi scrape, không tốn gì trên hot path)"""
+    def collect() -> None:
+        pool = engine.pool
+        for metric, attr in (
+            (DB_POOL_SIZE, "size"),
+            (DB_POOL_CHECKED_OUT, "checkedout"),
+            (DB_POOL_CHECKED_IN, "checkedin"),
+            (DB_POOL_OVERFLOW, "overflow"),
+        ):
+            reader = getattr(pool, attr, None)
+            if reader is not None:
+                metric.labels(name).set(reader())
+
+    REGISTRY.add_collector(collect)
+
+
+REGISTRY.add_collector(_collect_cache_ratio)
+
+
+def route_template(scope) -> str:
+    """Path template của route đã match (vd. /transactions/{transaction_id})"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware thuần (không qua BaseHTTPMiddleware) để giữ overhead nhỏ"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, status_holder[0]).inc()
@@ -0,0 +1,407 @@
+# utils/profiler.py
+"""Sampling profiler theo route, bật/tắt lúc runtime (không cần restart worker).
+
+Admin bật profiling cho một route template (vd. /budgets/analysis/dashboard)
+với một tỉ lệ request được lấy mẫu. Với mỗi request được chọn, middleware
+gắn một RequestProfile vào ContextVar; một thread nền định kỳ đọc
+sys._current_frames() và gộp stack của các thread đang phục vụ request đó
+thành dạng collapsed ("a;b;c <số mẫu>"), đọc được bằng flamegraph.pl,
+speedscope hoặc render_flamegraph_svg() bên dưới.
+
+Xác định thread nào đang phục vụ request được profile:
+  * event loop (endpoint async): nếu stack chứa frame của ProfilerMiddleware.__call__
+    thì đọc trực tiếp biến local của frame đó; còn không (endpoint chạy trong task
+    riêng, vd. sau BaseHTTPMiddleware) thì tra task đang chạy của loop trong bảng
+    task -> RequestProfile, do task factory cài trên loop ghi lại lúc tạo task
+    (task mới kế thừa context của nơi tạo nó);
+  * threadpool (endpoint/dependency sync): worker của anyio chạy hàm qua
+    context.run(...), nên tìm frame có biến local "context" là contextvars.Context
+    rồi đọc ContextVar trong đó.
+Khi không có route nào được bật, middleware chỉ tốn một lần kiểm tra dict.
+
+Nhiều worker: lệnh bật/tắt được áp dụng ở worker nhận request admin rồi phát
+qua pubsub (COMMAND_CHANNEL) cho các worker khác - cần PUBSUB_BACKEND=redis
+khi chạy nhiều process. Mẫu thì vẫn nằm riêng trong từng worker: status,
+collapsed và flame graph chỉ là của worker trả lời (trường/header "worker").
+"""
+import asyncio
+import contextvars
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from html import escape
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from starlette.routing import Match
+
+from app.utils.pubsub import BROKER
+
+# Giới hạn số stack khác nhau giữ lại cho mỗi route (tránh tăng bộ nhớ vô hạn)
+MAX_STACKS_PER_ROUTE = 5000
+MAX_STACK_DEPTH = 128
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+# Kênh pubsub phát lệnh bật/tắt profiling tới mọi worker
+COMMAND_CHANNEL = "admin:profiler"
+
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "active_request_profile", default=None
+)
+
+
+class RequestProfile:
+    __slots__ = ("target", "active")
+
+    def __init__(self, target: "ProfileTarget"):
+        self.target = target
+        # Worker thread rảnh vẫn giữ context của việc cuối cùng; cờ này loại các mẫu đó
+        self.active = True
+
+
+class ProfileTarget:
+    """Cấu hình và kết quả profiling của một route"""
+
+    def __init__(self, route, method: str, sample_rate: float):
+        self.route = route
+        self.path = route.path
+        self.method = method
+        self.key = target_key(method, route.path)
+        self.sample_rate = sample_rate
+        self.started_at = time.time()
+        self.requests_seen = 0
+        self.requests_profiled = 0
+        self.samples = 0
+        self.dropped_samples = 0
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        self.requests_seen += 1
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self.requests_profiled += 1
+            return True
+        return False
+
+    def add_sample(self, stack: str) -> None:
+        with self._lock:
+            self.samples += 1
+            if stack in self.stacks or len(self.stacks) < MAX_STACKS_PER_ROUTE:
+                self.stacks[stack] += 1
+            else:
+                self.dropped_samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "route": self.path,
+            "method": self.method,
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at,
+            "requests_seen": self.requests_seen,
+            "requests_profiled": self.requests_profiled,
+            "samples": self.samples,
+            "dropped_samples": self.dropped_samples,
+            "distinct_stacks": len(self.stacks),
+            "worker": worker_id(),
+        }
+
+
+def target_key(method: str, path: str) -> str:
+    return f"{method.upper()} {path}"
+
+
+def worker_id() -> str:
+    # Tính mỗi lần gọi: với gunicorn --preload, module được import trước khi fork
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _frame_label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class Profiler:
+    def __init__(self):
+        self.targets: Dict[str, ProfileTarget] = {}
+        self.interval = 0.005
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._marker_code = None
+        # Task (asyncio) -> RequestProfile lúc tạo task; thread ident -> event loop của thread
+        self._task_profiles: "weakref.WeakKeyDictionary[asyncio.Task, RequestProfile]" = weakref.WeakKeyDictionary()
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+
+    # ---------- cấu hình ----------
+
+    def enable(self, route, method: str, sample_rate: float, interval_ms: Optional[float] = None) -> ProfileTarget:
+        """Bật (hoặc cấu hình lại) profiling cho route + method; kết quả cũ của nó bị xoá"""
+        with self._lock:
+            if interval_ms:
+                self.interval = interval_ms / 1000.0
+            target = ProfileTarget(route, method.upper(), sample_rate)
+            targets = dict(self.targets)
+            targets[target.key] = target
+            # Thay cả dict để middleware đọc không cần lock
+            self.targets = targets
+            self._ensure_sampler()
+            return target
+
+    def disable(self, key: str) -> Optional[ProfileTarget]:
+        with self._lock:
+            targets = dict(self.targets)
+            target = targets.pop(key, None)
+            self.targets = targets
+            if not targets:
+                self._stop.set()
+                self._thread = None
+            return target
+
+    def get(self, key: str) -> Optional[ProfileTarget]:
+        return self.targets.get(key)
+
+    def find(self, path: str, method: Optional[str] = None) -> Optional[ProfileTarget]:
+        """Target theo path và method; bỏ trống method khi path chỉ bật cho một method"""
+        if method:
+            return self.targets.get(target_key(method, path))
+        matches = [target for target in self.targets.values() if target.path == path]
+        return matches[0] if len(matches) == 1 else None
+
+    def status(self) -> Dict[str, Any]:
+        targets = list(self.targets.values())
+        total_samples = sum(t.samples for t in targets) or 1
+        return {
+            "worker": worker_id(),
+            "running": self._thread is not None,
+            "interval_ms": self.interval * 1000.0,
+            "targets": [
+                {**t.summary(), "sample_fraction": round(t.samples / total_samples, 4)}
+                for t in targets
+            ],
+        }
+
+    # ---------- đồng bộ giữa các worker ----------
+
+    def broadcast(self, command: Dict[str, Any]) -> None:
+        """Phát lệnh enable/disable cho các worker khác (worker hiện tại đã tự áp dụng)"""
+        BROKER.publish(COMMAND_CHANNEL, {**command, "origin": worker_id()})
+
+    def apply(self, routes: Iterable, command: Dict[str, Any]) -> None:
+        if command["action"] == "enable":
+            method = command["method"]
+            for route in routes:
+                if getattr(route, "path", None) == command["route"] and method in (getattr(route, "methods", None) or ()):
+                    self.enable(route, method, command["sample_rate"], command.get("interval_ms"))
+                    return
+        elif command["action"] == "disable":
+            self.disable(command["key"])
+
+    async def follow(self, app) -> None:
+        """Áp dụng lệnh do worker khác phát (chạy suốt vòng đời app, khởi động từ lifespan)"""
+        subscription = BROKER.subscribe(COMMAND_CHANNEL)
+        try:
+            while True:
+                message = await subscription.get()
+                command = orjson.loads(message)
+                if command.get("origin") == worker_id():
+                    continue
+                try:
+                    self.apply(app.routes, command)
+                except Exception as e:
+                    print(f"Profiler command error: {str(e)}")
+        finally:
+            subscription.close()
+
+    # ---------- middleware ----------
+
+    def match(self, scope) -> Optional[ProfileTarget]:
+        for target in self.targets.values():
+            matched, _ = target.route.matches(scope)
+            if matched == Match.FULL:
+                return target
+        return None
+
+    def track_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Cài task factory ghi lại RequestProfile của mọi task tạo ra trên loop (một lần mỗi loop)"""
+        ident = threading.get_ident()
+        if self._loops.get(ident) is loop:
+            return
+        previous = loop.get_task_factory()
+        task_profiles = self._task_profiles
+
+        def factory(loop, coro, **kwargs):
+            if previous is not None:
+                task = previous(loop, coro, **kwargs)
+            else:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            profile = context.get(_active_profile) if context is not None else _active_profile.get()
+            if profile is not None:
+                task_profiles[task] = profile
+            return task
+
+        loop.set_task_factory(factory)
+        self._loops[ident] = loop
+
+    # ---------- sampler ----------
+
+    def _ensure_sampler(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="route-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, stop: threading.Event) -> None:
+        own_ident = threading.get_ident()
+        while not stop.wait(self.interval):
+            try:
+                self._sample_once(own_ident)
+            except Exception as e:
+                print(f"Profiler sampling error: {str(e)}")
+
+    def _task_owner(self, ident: int) -> Optional[RequestProfile]:
+        loop = self._loops.get(ident)
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+        if loop is None or current_tasks is None:
+            return None
+        task = current_tasks.get(loop)
+        profile = self._task_profiles.get(task) if task is not None else None
+        return profile if profile is not None and profile.active else None
+
+    def _owner(self, ident: int, frame) -> Optional[RequestProfile]:
+        marker = self._marker_code
+        current = frame
+        while current is not None:
+            code = current.f_code
+            if code is marker:
+                profile = current.f_locals.get("profile")
+                return profile if profile is not None and profile.active else None
+            if code.co_filename.startswith(_ASYNCIO_DIR):
+                # Tới vòng lặp sự kiện mà chưa gặp middleware: task đang chạy có thể
+                # là task con của request (BaseHTTPMiddleware, task group...)
+                return self._task_owner(ident)
+            if "context" in code.co_varnames:
+                context = current.f_locals.get("context")
+                if isinstance(context, contextvars.Context):
+                    profile = context.get(_active_profile)
+                    return profile if profile is not None and profile.active else None
+            current = current.f_back
+        return None
+
+    def _sample_once(self, own_ident: int) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            profile = self._owner(ident, frame)
+            if profile is None:
+                continue
+            labels: List[str] = []
+            current = frame
+            while current is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(_frame_label(current.f_code))
+                current = current.f_back
+            labels.reverse()
+            profile.target.add_sample(";".join(labels))
+
+
+PROFILER = Profiler()
+
+
+class ProfilerMiddleware:
+    """ASGI middleware chọn request để profile theo route và tỉ lệ đã cấu hình"""
+
+    def __init__(self, app):
+        self.app = app
+        PROFILER._marker_code = ProfilerMiddleware.__call__.__code__
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILER.targets:
+            await self.app(scope, receive, send)
+            return
+
+        target = PROFILER.match(scope)
+        profile = None
+        if target is not None and target.should_sample():
+            profile = RequestProfile(target)
+            PROFILER.track_loop(asyncio.get_running_loop())
+        token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if profile is not None:
+                profile.active = False
+            _active_profile.reset(token)
+
+
+# ==================== FLAME GRAPH SVG ====================
+
+def _build_tree(collapsed: Counter) -> Dict[str, Any]:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in collapsed.items():
+        root["value"] += count
+        node = root
+        for label in stack.split(";"):
+            child = node["children"].get(label)
+            if child is None:
+                child = node["children"][label] = {"name": label, "value": 0, "children": {}}
+            child["value"] += count
+            node = child
+    return root
+
+
+def render_flamegraph_svg(target: ProfileTarget, width: int = 1200, frame_height: int = 16) -> str:
+    """Render flame graph tĩnh (SVG, không cần JS) từ các stack đã gộp"""
+    with target._lock:
+        stacks = Counter(target.stacks)
+    root = _build_tree(stacks)
+    total = root["value"] or 1
+    rects: List[tuple] = []
+    max_depth = 0
+
+    def walk(node, x: float, depth: int) -> None:
+        nonlocal max_depth
+        w = node["value"] / total * width
+        if w < 0.5:
+            return
+        max_depth = max(max_depth, depth)
+        rects.append((x, depth, w, node["name"], node["value"]))
+        offset = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            walk(child, offset, depth + 1)
+            offset += child["value"] / total * width
+
+    walk(root, 0.0, 0)
+    height = (max_depth + 1) * frame_height + 40
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="16">{escape(target.key)} - {total} samples</text>',
+    ]
+    for x, depth, w, name, value in rects:
+        y = height - (depth + 1) * frame_height
+        hue = 10 + (hash(name) % 40)
+        pct = value / total * 100
+        label = escape(name) if w > 40 else ""
+        parts.append(
+            f'<g><title>{escape(name)} ({value} samples, {pct:.2f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+            f'fill="hsl({hue},85%,60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + frame_height - 4}" textLength="{max(w - 6, 0):.1f}" '
+            f'lengthAdjust="spacingAndGlyphs">{label}</text></g>'
+        )
+    parts.append("</svg>")
+    return "\n".join(parts)
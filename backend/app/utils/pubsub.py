@@ -0,0 +1,153 @@
+# utils/pubsub.py
+"""Pub/sub trong process cho các kênh đẩy realtime (SSE/WebSocket), backend
+phát tin có thể thay để chạy nhiều worker.
+
+    subscription = BROKER.subscribe("user:<id>")      # trong event loop
+    message = await subscription.get(timeout=15)      # bytes JSON hoặc None
+    ...
+    BROKER.publish("user:<id>", {"type": "...", "data": {...}})  # từ thread bất kỳ
+    subscription.close()
+
+publish() serialize message một lần rồi giao cho backend:
+  * LocalBackend (mặc định): giao thẳng cho subscriber trong process;
+  * RedisBackend: PUBLISH lên Redis, mỗi worker có một thread PSUBSCRIBE
+    nhận lại và giao cho subscriber của mình (cần cài gói redis).
+
+Mỗi subscriber có hàng đợi giới hạn; client đọc chậm bị bỏ tin cũ nhất chứ
+không làm chậm bên ghi. publish() không bao giờ ném lỗi ra ngoài: đẩy realtime
+là phụ, không được làm hỏng thao tác ghi đã commit.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.utils.json_response import dumps
+
+logger = logging.getLogger("app.pubsub")
+
+Deliver = Callable[[str, bytes], None]
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", channel: str, max_queue: int):
+        self.broker = broker
+        self.channel = channel
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_queue)
+
+    def _put(self, message: bytes) -> None:
+        # Chạy trên event loop của subscriber
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    def deliver(self, message: bytes) -> None:
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class LocalBackend:
+    """Chỉ trong một process"""
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, channel: str, message: bytes) -> None:
+        self._deliver(channel, message)
+
+    def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """Qua Redis pub/sub, cho nhiều worker/máy chủ"""
+
+    def __init__(self, url: str, prefix: str = "finance:"):
+        import redis  # gói tuỳ chọn, chỉ cần khi dùng backend này
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._pubsub = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(f"{self._prefix}*")
+        threading.Thread(target=self._listen, args=(deliver,), name="pubsub-redis", daemon=True).start()
+
+    def _listen(self, deliver: Deliver) -> None:
+        for message in self._pubsub.listen():
+            channel = message["channel"].decode()[len(self._prefix):]
+            deliver(channel, message["data"])
+
+    def publish(self, channel: str, message: bytes) -> None:
+        self._client.publish(f"{self._prefix}{channel}", message)
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+class Broker:
+    def __init__(self, backend=None, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._backend = None
+        self.use_backend(backend or LocalBackend())
+
+    def use_backend(self, backend) -> None:
+        if self._backend is not None:
+            self._backend.close()
+        backend.start(self._deliver)
+        self._backend = backend
+
+    def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(self, channel, self.max_queue)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel: str, message: Any) -> None:
+        try:
+            self._backend.publish(channel, dumps(message))
+        except Exception:
+            logger.exception("Không phát được tin lên kênh %s", channel)
+
+    def _deliver(self, channel: str, message: bytes) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # Event loop của subscriber đã đóng
+                subscription.close()
+
+
+BROKER = Broker()
+
+
+def configure(backend_name: str, redis_url: str = "") -> None:
+    """Chọn backend theo cấu hình (gọi một lần khi app khởi động)"""
+    if backend_name == "redis":
+        BROKER.use_backend(RedisBackend(redis_url))
+    elif backend_name != "local":
+        raise ValueError(f"PUBSUB_BACKEND không hợp lệ: {backend_name}")
@@ -0,0 +1,249 @@
+# utils/query_stats.py
+"""Đếm số câu SQL, thời gian DB và số dòng cho từng request.
+
+Listener gắn vào class Engine nên áp dụng cho mọi engine trong process.
+Thống kê được giữ trong một ContextVar do middleware khởi tạo; FastAPI
+chạy endpoint sync trong threadpool với context được copy, nên các câu
+SQL chạy trong worker thread vẫn được ghi vào đúng request.
+
+Số dòng: INSERT/UPDATE/DELETE lấy từ cursor.rowcount; SELECT (pyodbc trả
+rowcount = -1) đếm số dòng thực sự fetch về, qua một fetch strategy thay cho
+strategy mặc định của kết quả.
+"""
+import time
+import threading
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.cursor import CursorFetchStrategy
+
+# Giới hạn số câu SQL khác nhau được giữ lại cho một request
+MAX_TRACKED_STATEMENTS = 200
+
+_current_stats: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+class StatementStat:
+    __slots__ = ("statement", "count", "total_ms", "max_ms", "rows", "sample_parameters")
+
+    def __init__(self, statement: str, sample_parameters: Any):
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.sample_parameters = sample_parameters
+
+
+class RequestQueryStats:
+    """Thống kê DB của một request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.query_count = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.statements: Dict[str, StatementStat] = {}
+
+    def record(self, statement: str, parameters: Any, elapsed_ms: float, rows: int) -> None:
+        with self._lock:
+            self.query_count += 1
+            self.total_ms += elapsed_ms
+            if rows > 0:
+                self.rows += rows
+
+            stat = self.statements.get(statement)
+            if stat is None:
+                if len(self.statements) >= MAX_TRACKED_STATEMENTS:
+                    return
+                stat = StatementStat(statement, redact_parameters(parameters))
+                self.statements[statement] = stat
+            stat.count += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            if rows > 0:
+                stat.rows += rows
+
+    def add_rows(self, statement: str, rows: int) -> None:
+        """Cộng số dòng fetch về của một câu SELECT đã được record()"""
+        with self._lock:
+            self.rows += rows
+            stat = self.statements.get(statement)
+            if stat is not None:
+                stat.rows += rows
+
+    def budget_violations(self, query_budget: int, time_budget_ms: float) -> List[str]:
+        """Trả về danh sách ngân sách bị vượt ('queries', 'time')"""
+        violations = []
+        if query_budget and self.query_count > query_budget:
+            violations.append("queries")
+        if time_budget_ms and self.total_ms > time_budget_ms:
+            violations.append("time")
+        return violations
+
+    def offenders(self, limit: int = 3) -> List[Dict[str, Any]]:
+        """Các câu SQL đáng chú ý nhất: lặp nhiều nhất (N+1) và tốn thời gian nhất"""
+        with self._lock:
+            stats = list(self.statements.values())
+        by_count = sorted(stats, key=lambda s: s.count, reverse=True)[:limit]
+        by_time = sorted(stats, key=lambda s: s.total_ms, reverse=True)[:limit]
+
+        seen = set()
+        result = []
+        for stat in by_count + by_time:
+            if stat.statement in seen:
+                continue
+            seen.add(stat.statement)
+            result.append({
+                "sql": " ".join(stat.statement.split()),
+                "count": stat.count,
+                "total_ms": round(stat.total_ms, 2),
+                "max_ms": round(stat.max_ms, 2),
+                "rows": stat.rows,
+                "parameters": stat.sample_parameters,
+            })
+        return result
+
+    def as_headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Query-Count": str(self.query_count),
+            "X-DB-Time-Ms": f"{self.total_ms:.2f}",
+            "X-DB-Rows": str(self.rows),
+        }
+
+    def as_log_fields(self) -> Dict[str, Any]:
+        return {
+            "db_query_count": self.query_count,
+            "db_time_ms": round(self.total_ms, 2),
+            "db_rows": self.rows,
+        }
+
+
+def _redact_value(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, (UUID, date, datetime, Decimal, bool, int, float)):
+        return f"<{type(value).__name__}>"
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<bytes:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Thay giá trị tham số bằng kiểu dữ liệu để log không lộ dữ liệu người dùng"""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        # executemany: chỉ giữ mẫu của dòng đầu tiên
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+class _CountingFetchStrategy(CursorFetchStrategy):
+    """Strategy mặc định (fetch thẳng từ cursor) kèm đếm số dòng fetch về"""
+
+    __slots__ = ("stats", "statement")
+
+    def __init__(self, stats: RequestQueryStats, statement: str):
+        self.stats = stats
+        self.statement = statement
+
+    def fetchone(self, result, dbapi_cursor, hard_close=False):
+        row = super().fetchone(result, dbapi_cursor, hard_close)
+        if row is not None:
+            self.stats.add_rows(self.statement, 1)
+        return row
+
+    def fetchmany(self, result, dbapi_cursor, size=None):
+        rows = super().fetchmany(result, dbapi_cursor, size)
+        if rows:
+            self.stats.add_rows(self.statement, len(rows))
+        return rows
+
+    def fetchall(self, result, dbapi_cursor):
+        rows = super().fetchall(result, dbapi_cursor)
+        if rows:
+            self.stats.add_rows(self.statement, len(rows))
+        return rows
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+        if context is not None:
+            context._query_stats_pending = True
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    if context is not None:
+        context._query_stats_pending = False
+    # pyodbc trả về số dòng bị ảnh hưởng với INSERT/UPDATE/DELETE và -1 với SELECT
+    rows = getattr(cursor, "rowcount", -1) or 0
+    stats.record(statement, parameters, elapsed_ms, rows)
+    # SELECT: đếm lúc fetch; bỏ qua server-side cursor và strategy riêng của dialect
+    if (
+        rows < 0
+        and context is not None
+        and type(context.cursor_fetch_strategy) is CursorFetchStrategy
+        and not context.execution_options.get("stream_results")
+    ):
+        context.cursor_fetch_strategy = _CountingFetchStrategy(stats, statement)
+
+
+def _handle_error(exception_context) -> None:
+    # Câu lệnh lỗi không tới after_cursor_execute: bỏ mốc thời gian nó đã đẩy vào
+    context = exception_context.execution_context
+    if context is None or not getattr(context, "_query_stats_pending", False):
+        return
+    context._query_stats_pending = False
+    connection = exception_context.connection
+    starts = connection.info.get("query_stats_start") if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def install() -> None:
+    """Gắn listener vào Engine (idempotent)"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _installed = True
+
+
+def start_request() -> Tuple[RequestQueryStats, Any]:
+    """Bắt đầu thu thập cho request hiện tại; trả về (stats, token) để reset sau"""
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    return stats, token
+
+
+def end_request(token) -> None:
+    _current_stats.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
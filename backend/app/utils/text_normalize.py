@@ -0,0 +1,48 @@
+# utils/text_normalize.py
+"""Chuẩn hoá chuỗi tiếng Việt để so khớp: bỏ dấu, chữ thường, gộp khoảng trắng.
+
+    normalize_text("  Phở   Bò, Hà Nội ") == "pho bo ha noi"
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal
+from typing import Optional, Set, Union
+
+# đ/Đ không tách được bằng NFD
+_SPECIAL = str.maketrans({"đ": "d", "Đ": "D"})
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_CENT = Decimal("0.01")
+MAX_TOKEN_LENGTH = 64
+
+
+def strip_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize("NFD", text.translate(_SPECIAL))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Bỏ dấu, chữ thường, thay ký tự không phải chữ/số bằng một khoảng trắng"""
+    if not text:
+        return ""
+    return _NON_WORD.sub(" ", strip_diacritics(text).lower()).strip()
+
+
+def search_tokens(*texts: Optional[str]) -> Set[str]:
+    """Tập token (đã chuẩn hoá) của các chuỗi, dùng cho chỉ mục tìm kiếm"""
+    tokens: Set[str] = set()
+    for text in texts:
+        tokens.update(token[:MAX_TOKEN_LENGTH] for token in normalize_text(text).split())
+    return tokens
+
+
+def transaction_fingerprint(
+    amount: Union[Decimal, float, int, str],
+    transaction_date: date,
+    description: Optional[str]
+) -> str:
+    """Khoá phát hiện giao dịch trùng: sha1 của (số tiền, ngày, mô tả đã chuẩn hoá)"""
+    normalized_amount = Decimal(str(amount)).quantize(_CENT)
+    key = f"{normalized_amount}|{transaction_date.isoformat()}|{normalize_text(description)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,9 @@
+# benchmarks/__init__.py
+"""End-to-end API benchmarks.
+
+Chạy từ thư mục backend:
+
+    python -m benchmarks                      # so sánh với baselines.json
+    python -m benchmarks --update-baseline    # ghi lại baseline mới
+    python -m benchmarks --only transactions.list --iterations 200
+"""
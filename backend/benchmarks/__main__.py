@@ -0,0 +1,115 @@
+# benchmarks/__main__.py
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.harness import QueryCounter, compare_with_baseline, run_scenario
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark các endpoint chính của API (in-process ASGI)")
+    parser.add_argument("--iterations", type=int, default=50, help="Số request đo cho mỗi endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="Số request khởi động (không tính)")
+    parser.add_argument("--alloc-iterations", type=int, default=5, help="Số request đo allocation (tracemalloc)")
+    parser.add_argument("--seed", type=int, default=1000, help="Số giao dịch tối thiểu của user benchmark")
+    parser.add_argument("--only", action="append", default=[], help="Chỉ chạy scenario có tên bắt đầu bằng giá trị này")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="File baseline JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="Ghi kết quả hiện tại làm baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Mức tăng cho phép của p95/allocation (0.25 = 25%%)")
+    parser.add_argument("--query-slack", type=float, default=0.0, help="Mức tăng cho phép của số query mỗi request")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Độ trễ giả lập của stub LLM")
+    parser.add_argument("--echo", action="store_true", help="Giữ SQL echo của engine (mặc định tắt khi benchmark)")
+    return parser.parse_args(argv)
+
+
+def _disable_sql_echo() -> None:
+    import database
+    import app.database
+
+    database.engine.echo = False
+    app.database.engine.echo = False
+
+
+def _print_results(results) -> None:
+    header = f"{'scenario':34} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'alloc KiB':>10} {'err':>4}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.name:34} {r.p50_ms:9.2f} {r.p95_ms:9.2f} {r.p99_ms:9.2f} "
+            f"{r.queries_per_request:8.1f} {r.alloc_kib_per_request:10.1f} {r.errors:4d}"
+        )
+
+
+async def _run(args) -> int:
+    import httpx
+    from app.main import app
+
+    from benchmarks.scenarios import build_scenarios, setup_context, teardown_context
+    from benchmarks.stub_llm import install_stub_llm
+
+    if not args.echo:
+        _disable_sql_echo()
+    install_stub_llm(latency_ms=args.llm_latency_ms)
+
+    counter = QueryCounter()
+    counter.install()
+
+    scenarios = build_scenarios()
+    if args.only:
+        scenarios = [s for s in scenarios if any(s.name.startswith(prefix) for prefix in args.only)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        ctx = await setup_context(client, args.seed)
+        results = []
+        try:
+            for scenario in scenarios:
+                results.append(await run_scenario(
+                    client,
+                    scenario,
+                    ctx,
+                    counter,
+                    iterations=args.iterations,
+                    warmup=args.warmup,
+                    alloc_iterations=args.alloc_iterations,
+                ))
+        finally:
+            await teardown_context(ctx)
+
+    _print_results(results)
+
+    failed = [r for r in results if r.errors]
+    for r in failed:
+        print(f"[ERROR] {r.name}: {r.errors}/{r.iterations} request trả về status không mong đợi")
+
+    if args.update_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline.update({r.name: r.to_baseline() for r in results})
+        args.baseline.write_text(json.dumps(baseline, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Đã ghi baseline vào {args.baseline}")
+        return 1 if failed else 0
+
+    if not args.baseline.exists():
+        print(f"Chưa có baseline ({args.baseline}); chạy lại với --update-baseline để tạo.")
+        return 1 if failed else 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare_with_baseline(results, baseline, args.threshold, args.query_slack)
+    for regression in regressions:
+        print(f"[REGRESSION] {regression}")
+    return 1 if (regressions or failed) else 0
+
+
+def main(argv=None) -> int:
+    return asyncio.run(_run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# benchmarks/bench_json_serialization.py
+"""So sánh chi phí serialize một trang 1.000 giao dịch.
+
+    python -m benchmarks.bench_json_serialization --rows 1000 --repeat 50
+
+Các cách được đo:
+  * stdlib:   model_dump(mode="json") + JSONResponse (json.dumps) - mặc định cũ của FastAPI
+  * unicode:  jsonable_encoder + json.dumps(ensure_ascii=False) - UnicodeJSONResponse cũ
+  * orjson:   model_dump(mode="json") + FastJSONResponse - đường đi hiện tại
+  * orjson-raw: dict chứa Decimal/UUID/date đưa thẳng vào FastJSONResponse
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+import benchmarks.harness  # noqa: F401  (thiết lập sys.path)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.transaction_schema import TransactionListResponse
+from app.utils.json_response import FastJSONResponse
+
+
+def build_rows(count: int):
+    user_id = uuid.uuid4()
+    category_id = uuid.uuid4()
+    today = date.today()
+    rows = []
+    for i in range(count):
+        rows.append({
+            "TransactionID": uuid.uuid4(),
+            "UserID": user_id,
+            "UserCategoryID": category_id,
+            "transaction_type": "expense" if i % 4 else "income",
+            "amount": Decimal(f"{(i % 500) * 1000 + 12345}.50"),
+            "description": f"Ăn trưa cùng đồng nghiệp #{i}",
+            "transaction_date": today - timedelta(days=i % 90),
+            "transaction_time": dt_time(12, i % 60),
+            "payment_method": "Tiền mặt",
+            "location": "Quận 1, TP. Hồ Chí Minh",
+            "notes": None,
+            "created_by": "manual",
+            "category_display_name": "Ăn uống",
+            "CreatedAt": datetime.now(),
+            "UpdatedAt": None,
+        })
+    return rows
+
+
+def _time(fn, repeat: int):
+    fn()  # khởi động
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples), len(body)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rows = build_rows(args.rows)
+    page = TransactionListResponse(
+        transaction=rows,
+        total_count=len(rows),
+        total_income=sum(r["amount"] for r in rows if r["transaction_type"] == "income"),
+        total_expense=sum(r["amount"] for r in rows if r["transaction_type"] == "expense"),
+        net_amount=Decimal("0"),
+    )
+
+    def unicode_dumps(content):
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    cases = [
+        ("stdlib", lambda: JSONResponse(page.model_dump(mode="json")).body),
+        ("unicode", lambda: unicode_dumps(jsonable_encoder(page))),
+        ("orjson", lambda: FastJSONResponse(page.model_dump(mode="json")).body),
+        ("orjson-raw", lambda: FastJSONResponse({"transaction": rows, "total_count": len(rows)}).body),
+        ("render-only stdlib", lambda: unicode_dumps(page_json)),
+        ("render-only orjson", lambda: FastJSONResponse(page_json).body),
+    ]
+    page_json = page.model_dump(mode="json")
+
+    print(f"{args.rows} rows, {args.repeat} lần mỗi cách")
+    print(f"{'case':22} {'median ms':>10} {'max ms':>10} {'bytes':>10}")
+    for name, fn in cases:
+        median, worst, size = _time(fn, args.repeat)
+        print(f"{name:22} {median:10.2f} {worst:10.2f} {size:10d}")
+
+
+if __name__ == "__main__":
+    main()
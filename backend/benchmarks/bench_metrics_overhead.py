@@ -0,0 +1,63 @@
+# benchmarks/bench_metrics_overhead.py
+"""Đo overhead của MetricsMiddleware trên hot path.
+
+    python -m benchmarks.bench_metrics_overhead --requests 20000
+
+So sánh một ASGI app rỗng có và không có MetricsMiddleware, cùng chi phí
+thuần của một lần observe histogram.
+"""
+import argparse
+import asyncio
+import time
+
+import benchmarks.harness  # noqa: F401  (thiết lập sys.path)
+from app.utils import metrics
+
+
+class _Route:
+    path = "/bench/{item_id}"
+
+
+async def _empty_app(scope, receive, send):
+    scope["route"] = _Route()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench/1"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    base = asyncio.run(_drive(_empty_app, args.requests))
+    wrapped = asyncio.run(_drive(metrics.MetricsMiddleware(_empty_app), args.requests))
+
+    child = metrics.HTTP_LATENCY.labels("GET", "/bench/{item_id}")
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        child.observe(0.012)
+    observe = (time.perf_counter() - start) / args.requests
+
+    print(f"empty app:            {base * 1e6:8.2f} µs/request")
+    print(f"with MetricsMiddleware:{wrapped * 1e6:8.2f} µs/request")
+    print(f"middleware overhead:  {(wrapped - base) * 1e6:8.2f} µs/request")
+    print(f"histogram observe:    {observe * 1e9:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_transaction_listing.py
+"""Latency của GET /transactions/ (tầng CRUD) với user có lịch sử dài.
+
+    python -m benchmarks.bench_transaction_listing --transactions 100000 --repeat 20
+
+Chạy trên DB cấu hình trong .env. Lần đầu tạo user benchmark riêng và nạp đủ
+số giao dịch bằng bulk_insert_transactions (ExternalID "bench:<i>" nên chạy
+lại không nạp trùng).
+
+Các cách được đo, cùng một bộ filter:
+  * joined:    Transactions JOIN UserCategories JOIN Categories, COUNT và SUM
+               riêng, lấy cả entity (đường đi cũ)
+  * join-free: get_transactions hiện tại - một câu aggregate, trang chỉ gồm
+               các cột cần thiết, tên danh mục tra từ catalogue đã cache
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import benchmarks.harness  # noqa: F401  (thiết lập sys.path)
+from benchmarks.harness import QueryCounter, percentile
+from sqlalchemy import asc, case, desc, func
+
+import database
+from database import SessionLocal
+from crud import transaction_crud
+from crud.category_crud import provision_default_user_categories, resolve_user_category_ids
+from models.category import Category, UserCategory
+from models.transaction import Transaction
+from models.user_model import User
+from schemas.transaction_schema import TransactionFilter
+
+BENCH_EMAIL = "bench.listing@example.com"
+CATEGORIES = [("Ăn uống", "expense"), ("Giao thông", "expense"), ("Mua sắm", "expense"), ("Lương", "income")]
+SEED_CHUNK = 5000
+
+
+def _ensure_user(db) -> User:
+    user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+    if user is None:
+        user = User(email=BENCH_EMAIL, password_hash="!", FullName="Listing Benchmark")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    return user
+
+
+def _seed(db, user_id, target: int) -> int:
+    existing = db.query(func.count()).select_from(Transaction).filter(Transaction.UserID == user_id).scalar()
+    provision_default_user_categories(db, user_id=user_id)
+    category_ids = resolve_user_category_ids(db, user_id, CATEGORIES)
+    if len(category_ids) < len(CATEGORIES):
+        raise SystemExit("Thiếu danh mục hệ thống mẫu - chạy database/data_sample.sql trước")
+
+    today = date.today()
+    for start in range(existing, target, SEED_CHUNK):
+        rows = []
+        for i in range(start, min(start + SEED_CHUNK, target)):
+            name, transaction_type = CATEGORIES[i % len(CATEGORIES)]
+            rows.append({
+                "UserCategoryID": category_ids[(name, transaction_type)],
+                "TransactionType": transaction_type,
+                "Amount": Decimal(10000 + (i % 97) * 1000),
+                "Description": f"Giao dịch benchmark {i} tại cửa hàng {i % 300}",
+                "TransactionDate": today - timedelta(days=i % 1500),
+                "PaymentMethod": "Tiền mặt" if i % 3 else "Chuyển khoản",
+                "Location": "Hà Nội" if i % 2 else "TP. Hồ Chí Minh",
+                "Notes": None,
+                "CreatedBy": "imported",
+                "ExternalID": f"bench:{i}",
+            })
+        transaction_crud.bulk_insert_transactions(db, user_id, rows)
+        print(f"  đã nạp {min(start + SEED_CHUNK, target)}/{target}")
+    return max(existing, target)
+
+
+def joined_page(db, user_id, filters: TransactionFilter):
+    """Bản sao đường đi cũ của get_transactions để so sánh"""
+    query = (
+        db.query(Transaction, UserCategory, Category)
+        .join(UserCategory, Transaction.UserCategoryID == UserCategory.UserCategoryID)
+        .join(Category, UserCategory.CategoryID == Category.CategoryID)
+        .filter(Transaction.UserID == user_id)
+    )
+    if filters.category_display_name:
+        query = query.filter(func.coalesce(UserCategory.CustomName, Category.CategoryName) == filters.category_display_name)
+    if filters.date_from:
+        query = query.filter(Transaction.TransactionDate >= filters.date_from)
+
+    total_count = query.count()
+    query.with_entities(
+        func.sum(case((Transaction.TransactionType == 'income', Transaction.Amount), else_=0)),
+        func.sum(case((Transaction.TransactionType == 'expense', Transaction.Amount), else_=0))
+    ).first()
+    order = desc if filters.sort_order == "desc" else asc
+    rows = query.order_by(order(Transaction.TransactionDate)).offset(filters.skip).limit(filters.limit).all()
+    return total_count, [
+        (transaction, user_category.CustomName or category.CategoryName)
+        for transaction, user_category, category in rows
+    ]
+
+
+def _measure(fn, repeat: int, counter: QueryCounter):
+    fn()  # khởi động (và nạp catalogue danh mục)
+    samples = []
+    queries = 0
+    for _ in range(repeat):
+        counter.reset()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        queries += counter.reset()
+    ordered = sorted(samples)
+    return statistics.median(ordered), percentile(ordered, 95), queries / repeat
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    database.engine.echo = False
+    counter = QueryCounter()
+    counter.install()
+
+    db = SessionLocal()
+    try:
+        user_id = _ensure_user(db).UserID
+        total = _seed(db, user_id, args.transactions)
+
+        shapes = [
+            ("first page", TransactionFilter(limit=args.limit)),
+            ("deep page", TransactionFilter(limit=args.limit, skip=min(total // 2, 50000))),
+            ("category", TransactionFilter(limit=args.limit, category_display_name="Giao thông")),
+            ("last 90 days", TransactionFilter(limit=args.limit, date_from=date.today() - timedelta(days=90))),
+        ]
+
+        print(f"{total} giao dịch, trang {args.limit} dòng, {args.repeat} lần mỗi cách")
+        print(f"{'shape':14} {'path':10} {'median ms':>10} {'p95 ms':>10} {'queries':>8}")
+        for name, filters in shapes:
+            cases = [
+                ("joined", lambda: joined_page(db, user_id, filters)),
+                ("join-free", lambda: transaction_crud.get_transactions(db, user_id, filters)),
+            ]
+            for path, fn in cases:
+                median, p95, queries = _measure(fn, args.repeat, counter)
+                print(f"{name:14} {path:10} {median:10.2f} {p95:10.2f} {queries:8.1f}")
+            db.expire_all()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
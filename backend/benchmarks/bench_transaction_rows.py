@@ -0,0 +1,86 @@
+# benchmarks/bench_transaction_rows.py
+"""Chi phí mỗi dòng khi dựng danh sách giao dịch trả về cho client.
+
+    python -m benchmarks.bench_transaction_rows --rows 1000 --repeat 30
+
+  * validated: TransactionResponse(**row) trong CRUD, sau đó FastAPI dump ra dict,
+    validate lại theo response_model rồi serialize (đường đi cũ)
+  * trusted:   TransactionResponse.model_construct(**row) và FastJSONResponse
+    serialize model thẳng ra bytes (đường đi hiện tại)
+"""
+import argparse
+import statistics
+import time
+from decimal import Decimal
+
+import benchmarks.harness  # noqa: F401  (thiết lập sys.path)
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.schemas.transaction_schema import TransactionListResponse, TransactionResponse
+from app.utils.json_response import FastJSONResponse
+from benchmarks.bench_json_serialization import build_rows
+
+_RESPONSE_ADAPTER = TypeAdapter(TransactionListResponse)
+
+
+def _totals(rows):
+    income = sum((r["amount"] for r in rows if r["transaction_type"] == "income"), Decimal(0))
+    expense = sum((r["amount"] for r in rows if r["transaction_type"] == "expense"), Decimal(0))
+    return income, expense
+
+
+def validated_path(rows) -> bytes:
+    income, expense = _totals(rows)
+    page = TransactionListResponse(
+        transaction=[TransactionResponse(**row) for row in rows],
+        total_count=len(rows),
+        total_income=income,
+        total_expense=expense,
+        net_amount=income - expense,
+    )
+    # Mô phỏng serialize_response của FastAPI: dump -> validate theo response_model -> encode
+    revalidated = _RESPONSE_ADAPTER.validate_python(page.model_dump(by_alias=True))
+    return FastJSONResponse(jsonable_encoder(revalidated)).body
+
+
+def trusted_path(rows) -> bytes:
+    income, expense = _totals(rows)
+    page = TransactionListResponse.model_construct(
+        transaction=[TransactionResponse.model_construct(**row) for row in rows],
+        total_count=len(rows),
+        total_income=income,
+        total_expense=expense,
+        net_amount=income - expense,
+    )
+    return FastJSONResponse(page).body
+
+
+def _measure(fn, rows, repeat: int) -> float:
+    fn(rows)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    rows = build_rows(args.rows)
+    before = _measure(validated_path, rows, args.repeat)
+    after = _measure(trusted_path, rows, args.repeat)
+
+    print(f"{args.rows} rows, median của {args.repeat} lần")
+    print(f"validated: {before * 1000:8.2f} ms/page {before / args.rows * 1e6:8.2f} µs/row")
+    print(f"trusted:   {after * 1000:8.2f} ms/page {after / args.rows * 1e6:8.2f} µs/row")
+    print(f"speedup:   {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/bench_user_categories.py
+"""Latency của GET /categories/user-categories/ với user có nhiều danh mục custom.
+
+    python -m benchmarks.bench_user_categories --custom 500 --repeat 30
+
+Chạy trên DB cấu hình trong .env; user benchmark riêng được tạo và nạp đủ số
+danh mục custom ở lần chạy đầu.
+
+  * old: query trang (LEFT JOIN Categories) + query COUNT riêng, dựng
+         CategoryResponse/UserCategoryResponse có validate, rồi FastAPI
+         validate lại theo response_model (đường đi cũ)
+  * new: get_user_categories_page (trang + COUNT(*) OVER ()), danh mục gốc từ
+         get_system_categories() đã cache, model_construct + FastJSONResponse
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import benchmarks.harness  # noqa: F401  (thiết lập sys.path)
+from benchmarks.harness import QueryCounter, percentile
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert
+
+import database
+from database import SessionLocal
+from crud import category_crud
+from models.category import Category, UserCategory
+from models.user_model import User
+from schemas.category_schema import CategoryResponse, UserCategoryListResponse, UserCategoryResponse
+from app.utils.json_response import FastJSONResponse
+from app.utils.text_normalize import normalize_text
+
+BENCH_EMAIL = "bench.categories@example.com"
+_RESPONSE_ADAPTER = TypeAdapter(UserCategoryListResponse)
+
+
+def _ensure_user(db) -> User:
+    user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+    if user is None:
+        user = User(email=BENCH_EMAIL, password_hash="!", FullName="Category Benchmark")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    return user
+
+
+def _seed(db, user_id, target: int) -> int:
+    existing = (
+        db.query(func.count())
+        .select_from(UserCategory)
+        .filter(UserCategory.UserID == user_id, UserCategory.CategoryID.is_(None))
+        .scalar()
+    )
+    rows = []
+    for i in range(existing, target):
+        name = f"Danh mục riêng {i}"
+        rows.append({
+            "UserCategoryID": uuid.uuid4(),
+            "UserID": user_id,
+            "CategoryID": None,
+            "CustomName": name,
+            "CustomNameNorm": normalize_text(name),
+            "CategoryType": "expense" if i % 5 else "income",
+            "IsActive": True,
+        })
+    if rows:
+        db.execute(insert(UserCategory), rows)
+        db.commit()
+    category_crud.provision_default_user_categories(db, user_id=user_id)
+    return max(existing, target)
+
+
+def old_path(db, user_id, skip: int, limit: int) -> bytes:
+    results = (
+        db.query(UserCategory, Category)
+        .join(Category, UserCategory.CategoryID == Category.CategoryID, isouter=True)
+        .filter(UserCategory.UserID == user_id)
+        .order_by(UserCategory.CreatedAt.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    total = db.query(UserCategory).filter(UserCategory.UserID == user_id).count()
+    items = []
+    for user_category, category in results:
+        display_name = user_category.CustomName or (category.CategoryName if category else "Unknown Category")
+        items.append(UserCategoryResponse(
+            user_category_id=user_category.UserCategoryID,
+            user_id=user_category.UserID,
+            category_id=user_category.CategoryID,
+            # custom_name là bắt buộc trong schema; đường đi cũ lỗi validate với danh mục liên kết
+            custom_name=display_name,
+            category_type=user_category.CategoryType,
+            is_active=user_category.IsActive,
+            created_at=user_category.CreatedAt,
+            category=CategoryResponse(
+                category_id=category.CategoryID,
+                category_name=category.CategoryName,
+                category_type=category.CategoryType,
+                parent_category_id=category.ParentCategoryID,
+                is_active=category.IsActive,
+                sort_order=category.SortOrder,
+                created_at=category.CreatedAt
+            ) if category else None,
+            display_name=display_name
+        ))
+    page = UserCategoryListResponse(user_categories=items, total=total)
+    revalidated = _RESPONSE_ADAPTER.validate_python(page.model_dump(by_alias=True))
+    return FastJSONResponse(jsonable_encoder(revalidated)).body
+
+
+def new_path(db, user_id, skip: int, limit: int) -> bytes:
+    rows, total = category_crud.get_user_categories_page(db, user_id, skip=skip, limit=limit)
+    system_categories = category_crud.get_system_categories(db)
+    items = []
+    for row in rows:
+        category = system_categories.get(row.CategoryID) if row.CategoryID else None
+        items.append(UserCategoryResponse.model_construct(
+            user_category_id=row.UserCategoryID,
+            user_id=user_id,
+            category_id=row.CategoryID,
+            custom_name=row.CustomName,
+            category_type=row.CategoryType,
+            is_active=row.IsActive,
+            created_at=row.CreatedAt,
+            category=category,
+            display_name=row.CustomName or (category.category_name if category else None) or "Unknown Category"
+        ))
+    return FastJSONResponse(UserCategoryListResponse.model_construct(user_categories=items, total=total)).body
+
+
+def _measure(fn, repeat: int, counter: QueryCounter):
+    fn()  # khởi động (và nạp cache danh mục hệ thống)
+    samples = []
+    queries = 0
+    for _ in range(repeat):
+        counter.reset()
+        start = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        queries += counter.reset()
+    ordered = sorted(samples)
+    return statistics.median(ordered), percentile(ordered, 95), queries / repeat, len(body)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--custom", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    database.engine.echo = False
+    counter = QueryCounter()
+    counter.install()
+
+    db = SessionLocal()
+    try:
+        user_id = _ensure_user(db).UserID
+        total = _seed(db, user_id, args.custom)
+
+        print(f"{total} danh mục custom, {args.repeat} lần mỗi cách")
+        print(f"{'page':16} {'path':5} {'median ms':>10} {'p95 ms':>10} {'queries':>8} {'bytes':>9}")
+        for name, skip, limit in [("first 100", 0, 100), ("all (limit 1000)", 0, 1000), ("deep 100", 400, 100)]:
+            for path, fn in [("old", old_path), ("new", new_path)]:
+                median, p95, queries, size = _measure(lambda: fn(db, user_id, skip, limit), args.repeat, counter)
+                print(f"{name:16} {path:5} {median:10.2f} {p95:10.2f} {queries:8.1f} {size:9d}")
+            db.expire_all()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# benchmarks/harness.py
+import sys
+import time
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_DIR = BACKEND_DIR / "app"
+
+# App dùng cả import kiểu "app.xxx" lẫn "xxx" (routes, crud, schemas...)
+for path in (str(BACKEND_DIR), str(APP_DIR)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Đếm số câu SQL được gửi xuống DB (mọi engine trong process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self._installed = False
+
+    def install(self) -> None:
+        if self._installed:
+            return
+        # Lắng nghe trên class Engine vì app đang có 2 engine
+        # (module "database" và "app.database" được import riêng biệt)
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        self._installed = True
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+    def reset(self) -> int:
+        with self._lock:
+            value = self.count
+            self.count = 0
+        return value
+
+
+@dataclass
+class Scenario:
+    """Một endpoint cần đo.
+
+    build_request(ctx) trả về dict gồm method, url và (tuỳ chọn) json/params.
+    Nó được gọi ngoài vùng đo thời gian nên có thể chuẩn bị dữ liệu
+    (ví dụ tạo một giao dịch mới để đo DELETE).
+    """
+    name: str
+    build_request: Callable[[Dict[str, Any]], Any]
+    expected_status: tuple = (200, 201)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    queries_per_request: float
+    alloc_kib_per_request: float
+    errors: int = 0
+    samples_ms: List[float] = field(default_factory=list, repr=False)
+
+    def to_baseline(self) -> Dict[str, float]:
+        return {
+            "p50_ms": round(self.p50_ms, 3),
+            "p95_ms": round(self.p95_ms, 3),
+            "p99_ms": round(self.p99_ms, 3),
+            "queries_per_request": round(self.queries_per_request, 2),
+            "alloc_kib_per_request": round(self.alloc_kib_per_request, 1),
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile theo nội suy tuyến tính (giống numpy 'linear')"""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+async def _send(client, request: Dict[str, Any]):
+    return await client.request(
+        request["method"],
+        request["url"],
+        json=request.get("json"),
+        params=request.get("params"),
+        headers=request.get("headers"),
+    )
+
+
+async def run_scenario(
+    client,
+    scenario: Scenario,
+    ctx: Dict[str, Any],
+    counter: QueryCounter,
+    iterations: int,
+    warmup: int,
+    alloc_iterations: int,
+) -> ScenarioResult:
+    """Chạy một scenario: warmup, đo latency + số query, rồi đo allocation riêng"""
+    errors = 0
+
+    for _ in range(warmup):
+        await _send(client, await _maybe_await(scenario.build_request(ctx)))
+
+    samples: List[float] = []
+    total_queries = 0
+    for _ in range(iterations):
+        request = await _maybe_await(scenario.build_request(ctx))
+        counter.reset()
+        start = time.perf_counter()
+        response = await _send(client, request)
+        elapsed = (time.perf_counter() - start) * 1000
+        total_queries += counter.reset()
+        samples.append(elapsed)
+        if response.status_code not in scenario.expected_status:
+            errors += 1
+
+    # tracemalloc làm chậm đáng kể nên đo allocation ở vòng riêng
+    alloc_total = 0
+    if alloc_iterations:
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_iterations):
+                request = await _maybe_await(scenario.build_request(ctx))
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                await _send(client, request)
+                _, peak = tracemalloc.get_traced_memory()
+                alloc_total += max(peak - before, 0)
+        finally:
+            tracemalloc.stop()
+
+    ordered = sorted(samples)
+    return ScenarioResult(
+        name=scenario.name,
+        iterations=iterations,
+        p50_ms=percentile(ordered, 50),
+        p90_ms=percentile(ordered, 90),
+        p95_ms=percentile(ordered, 95),
+        p99_ms=percentile(ordered, 99),
+        mean_ms=sum(samples) / len(samples) if samples else 0.0,
+        queries_per_request=total_queries / iterations if iterations else 0.0,
+        alloc_kib_per_request=(alloc_total / alloc_iterations / 1024) if alloc_iterations else 0.0,
+        errors=errors,
+        samples_ms=samples,
+    )
+
+
+async def _maybe_await(value):
+    if hasattr(value, "__await__"):
+        return await value
+    return value
+
+
+@dataclass
+class Regression:
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+    limit: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.scenario}: {self.metric} {self.current:.2f} > {self.limit:.2f} "
+            f"(baseline {self.baseline:.2f})"
+        )
+
+
+def compare_with_baseline(
+    results: List[ScenarioResult],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    query_slack: float = 0.0,
+) -> List[Regression]:
+    """So sánh kết quả với baseline.
+
+    - Latency (p95) và allocation: vượt quá baseline * (1 + threshold) là regression.
+    - Số query mang tính tất định nên mặc định không cho tăng (query_slack = 0).
+    """
+    regressions: List[Regression] = []
+    for result in results:
+        base: Optional[Dict[str, float]] = baseline.get(result.name)
+        if not base:
+            continue
+        current = result.to_baseline()
+        checks = (
+            ("p95_ms", threshold),
+            ("alloc_kib_per_request", threshold),
+            ("queries_per_request", query_slack),
+        )
+        for metric, allowed in checks:
+            if metric not in base:
+                continue
+            limit = base[metric] * (1 + allowed)
+            if current[metric] > limit:
+                regressions.append(Regression(
+                    scenario=result.name,
+                    metric=metric,
+                    baseline=base[metric],
+                    current=current[metric],
+                    limit=limit,
+                ))
+    return regressions
@@ -0,0 +1,154 @@
+# benchmarks/scenarios.py
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from benchmarks.harness import Scenario
+
+BENCH_EMAIL = "bench.user@example.com"
+BENCH_PASSWORD = "bench-password-123"
+EXPENSE_CATEGORY = "Ăn uống"
+INCOME_CATEGORY = "Lương"
+
+
+def _transaction_payload(i: int, transaction_type: str = "expense") -> Dict[str, Any]:
+    return {
+        "transaction_type": transaction_type,
+        "amount": str(10000 + (i % 97) * 1000),
+        "description": f"Benchmark giao dịch {i}",
+        "transaction_date": (date.today() - timedelta(days=i % 60)).isoformat(),
+        "payment_method": "Tiền mặt",
+        "location": "Hà Nội",
+        "category_display_name": EXPENSE_CATEGORY if transaction_type == "expense" else INCOME_CATEGORY,
+    }
+
+
+async def setup_context(client, seed_transactions: int) -> Dict[str, Any]:
+    """Tạo user benchmark, đăng nhập và chuẩn bị dữ liệu cố định cho các scenario"""
+    await client.post("/auth/register", json={
+        "full_name": "Benchmark User",
+        "email": BENCH_EMAIL,
+        "password": BENCH_PASSWORD,
+    })  # 400 nếu user đã tồn tại - bỏ qua
+    login = await client.post("/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Đảm bảo đủ số giao dịch để trang danh sách có ý nghĩa
+    listing = await client.get("/transactions/", params={"limit": 1}, headers=headers)
+    listing.raise_for_status()
+    existing = listing.json()["total_count"]
+    for i in range(existing, seed_transactions):
+        response = await client.post(
+            "/transactions/",
+            json=_transaction_payload(i, "income" if i % 10 == 0 else "expense"),
+            headers=headers,
+        )
+        response.raise_for_status()
+
+    fixture = await client.post("/transactions/", json=_transaction_payload(0), headers=headers)
+    fixture.raise_for_status()
+
+    today = date.today()
+    budget = await client.post("/budgets/", json={
+        "budget_name": "Benchmark budget",
+        "budget_type": "monthly",
+        "amount": "5000000",
+        "period_start": today.replace(day=1).isoformat(),
+        "period_end": (today.replace(day=1) + timedelta(days=32)).replace(day=1).isoformat(),
+    }, headers=headers)
+    budget.raise_for_status()
+    budget_id = budget.json()["BudgetID"]
+    allocation = await client.post(f"/budgets/{budget_id}/categories", json={
+        "category_display_name": EXPENSE_CATEGORY,
+        "allocated_amount": "3000000",
+    }, headers=headers)
+    allocation.raise_for_status()
+
+    session = await client.post("/chat/sessions", json={"session_name": "Benchmark"}, headers=headers)
+    session.raise_for_status()
+
+    return {
+        "client": client,
+        "headers": headers,
+        "transaction_id": fixture.json()["TransactionID"],
+        "budget_id": budget_id,
+        "session_id": session.json()["SessionID"],
+        "counter": 0,
+    }
+
+
+async def teardown_context(ctx: Dict[str, Any]) -> None:
+    """Xoá budget benchmark để các lần chạy sau không tích luỹ budget"""
+    await ctx["client"].delete(f"/budgets/{ctx['budget_id']}", headers=ctx["headers"])
+
+
+def _next(ctx: Dict[str, Any]) -> int:
+    ctx["counter"] += 1
+    return ctx["counter"]
+
+
+async def _prepare_delete(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    created = await ctx["client"].post(
+        "/transactions/", json=_transaction_payload(_next(ctx)), headers=ctx["headers"]
+    )
+    created.raise_for_status()
+    return {
+        "method": "DELETE",
+        "url": f"/transactions/{created.json()['TransactionID']}",
+        "headers": ctx["headers"],
+    }
+
+
+def build_scenarios() -> List[Scenario]:
+    """Danh sách endpoint chính được benchmark"""
+    return [
+        Scenario("auth.login", lambda ctx: {
+            "method": "POST", "url": "/auth/login",
+            "json": {"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+        }),
+        Scenario("transactions.create", lambda ctx: {
+            "method": "POST", "url": "/transactions/",
+            "json": _transaction_payload(_next(ctx)), "headers": ctx["headers"],
+        }),
+        Scenario("transactions.get", lambda ctx: {
+            "method": "GET", "url": f"/transactions/{ctx['transaction_id']}", "headers": ctx["headers"],
+        }),
+        Scenario("transactions.update", lambda ctx: {
+            "method": "PUT", "url": f"/transactions/{ctx['transaction_id']}",
+            "json": {"notes": f"cập nhật {_next(ctx)}"}, "headers": ctx["headers"],
+        }),
+        Scenario("transactions.delete", _prepare_delete),
+        Scenario("transactions.list", lambda ctx: {
+            "method": "GET", "url": "/transactions/",
+            "params": {"limit": 100}, "headers": ctx["headers"],
+        }),
+        Scenario("transactions.list_1000", lambda ctx: {
+            "method": "GET", "url": "/transactions/by_date_range/",
+            "params": {"limit": 1000}, "headers": ctx["headers"],
+        }),
+        Scenario("categories.my_categories", lambda ctx: {
+            "method": "GET", "url": "/categories/my-categories", "headers": ctx["headers"],
+        }),
+        Scenario("categories.user_categories", lambda ctx: {
+            "method": "GET", "url": "/categories/user-categories/", "headers": ctx["headers"],
+        }),
+        Scenario("budgets.overview", lambda ctx: {
+            "method": "GET", "url": f"/budgets/{ctx['budget_id']}/overview", "headers": ctx["headers"],
+        }),
+        Scenario("budgets.vs_actual", lambda ctx: {
+            "method": "GET", "url": f"/budgets/{ctx['budget_id']}/vs-actual", "headers": ctx["headers"],
+        }),
+        Scenario("budgets.dashboard", lambda ctx: {
+            "method": "GET", "url": "/budgets/analysis/dashboard", "headers": ctx["headers"],
+        }),
+        Scenario("chat.interact.general", lambda ctx: {
+            "method": "POST", "url": "/chat/interact",
+            "json": {"session_id": ctx["session_id"], "message": "Lãi suất kép hoạt động như thế nào?"},
+            "headers": ctx["headers"],
+        }),
+        Scenario("chat.interact.add_transaction", lambda ctx: {
+            "method": "POST", "url": "/chat/interact",
+            "json": {"session_id": ctx["session_id"], "message": "Tôi vừa chi 50000 ăn uống hôm nay"},
+            "headers": ctx["headers"],
+        }),
+    ]
@@ -0,0 +1,43 @@
+# benchmarks/stub_llm.py
+"""OpenAI client giả lập để benchmark /chat/interact không phụ thuộc mạng"""
+import time
+from types import SimpleNamespace
+
+
+class _StubCompletions:
+    def __init__(self, latency_ms: float, reply: str):
+        self.latency_ms = latency_ms
+        self.reply = reply
+        self.calls = 0
+
+    def create(self, model: str, messages, **kwargs):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        completion_tokens = len(self.reply.split())
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+class StubOpenAIClient:
+    """Có cùng hình dạng với OpenAI().chat.completions.create(...)"""
+
+    def __init__(self, latency_ms: float = 0.0, reply: str = "Đây là câu trả lời giả lập cho benchmark."):
+        self.chat = SimpleNamespace(completions=_StubCompletions(latency_ms, reply))
+
+
+def install_stub_llm(latency_ms: float = 0.0) -> StubOpenAIClient:
+    """Thay client của chatbot_service bằng stub, trả về stub để kiểm tra số lần gọi"""
+    from services.gpt_service import chatbot_service
+
+    stub = StubOpenAIClient(latency_ms=latency_ms)
+    chatbot_service.client = stub
+    return stub
@@ -0,0 +1,22 @@
+# tests/conftest.py
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_DIR = BACKEND_DIR / "app"
+
+# App dùng cả import kiểu "app.xxx" lẫn "xxx" (crud, models...), như benchmarks/harness.py
+for path in (str(BACKEND_DIR), str(APP_DIR)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Settings bắt buộc; test không kết nối DB cấu hình trong .env
+for name, value in {
+    "DATABASE_URL": "DRIVER={ODBC Driver 17 for SQL Server};SERVER=test",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "OPENAI_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
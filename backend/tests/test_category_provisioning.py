@@ -0,0 +1,89 @@
+# tests/test_category_provisioning.py
+"""provision_default_user_categories trên SQLite: mỗi dòng UserCategories
+được tạo phải có khoá riêng (DB sinh, không dùng default Python của cả câu lệnh)."""
+import uuid
+
+import pytest
+
+pytest.importorskip("pyodbc")  # app.database tạo engine mssql+pyodbc lúc import
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from crud.category_crud import provision_default_user_categories
+
+_SCHEMA = [
+    "CREATE TABLE Users (UserID CHAR(32) PRIMARY KEY)",
+    """CREATE TABLE Categories (
+        CategoryID CHAR(32) PRIMARY KEY,
+        CategoryType VARCHAR(50) NOT NULL,
+        IsActive BOOLEAN NOT NULL DEFAULT 1
+    )""",
+    """CREATE TABLE UserCategories (
+        UserCategoryID CHAR(32) PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        UserID CHAR(32) NOT NULL,
+        CategoryID CHAR(32),
+        CustomName VARCHAR(100),
+        CustomNameNorm VARCHAR(100),
+        CategoryType VARCHAR(50) NOT NULL,
+        IsActive BOOLEAN NOT NULL DEFAULT 1,
+        CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _add_users(db, count):
+    user_ids = [uuid.uuid4() for _ in range(count)]
+    for user_id in user_ids:
+        db.execute(text("INSERT INTO Users (UserID) VALUES (:id)"), {"id": user_id.hex})
+    return user_ids
+
+
+def _add_categories(db, types):
+    for index, category_type in enumerate(types):
+        db.execute(
+            text("INSERT INTO Categories (CategoryID, CategoryType, IsActive) VALUES (:id, :type, :active)"),
+            {"id": uuid.uuid4().hex, "type": category_type, "active": index < len(types) - 1},
+        )
+
+
+def _user_categories(db):
+    return db.execute(text("SELECT UserCategoryID, UserID, IsActive FROM UserCategories")).all()
+
+
+def test_provisions_every_active_category_for_every_user(db):
+    _add_users(db, 2)
+    # Danh mục cuối không active
+    _add_categories(db, ["expense", "expense", "income", "expense"])
+
+    assert provision_default_user_categories(db) == 6
+
+    rows = _user_categories(db)
+    assert len(rows) == 6
+    assert len({row.UserCategoryID for row in rows}) == 6
+    assert all(row.IsActive for row in rows)
+
+
+def test_provisioning_is_idempotent_and_scoped_to_user(db):
+    first, second = _add_users(db, 2)
+    _add_categories(db, ["expense", "income", "expense", "income"])
+
+    assert provision_default_user_categories(db, user_id=first.hex) == 3
+    assert provision_default_user_categories(db, user_id=first.hex) == 0
+    assert provision_default_user_categories(db) == 3
+
+    rows = _user_categories(db)
+    assert len({row.UserCategoryID for row in rows}) == 6
+    assert {row.UserID for row in rows} == {first.hex, second.hex}
@@ -0,0 +1,118 @@
+# tests/test_transaction_batch.py
+"""apply_transaction_batch trên SQLite: delete rồi create cùng ID và ID create
+đã thuộc user khác."""
+import uuid
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pyodbc")  # app.database tạo engine mssql+pyodbc lúc import
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from crud import transaction_crud
+from schemas.transaction_schema import TransactionBatchOperation
+
+_SCHEMA = [
+    """CREATE TABLE Transactions (
+        TransactionID CHAR(32) PRIMARY KEY,
+        UserID CHAR(32) NOT NULL,
+        UserCategoryID CHAR(32) NOT NULL,
+        TransactionType VARCHAR(20) NOT NULL,
+        Amount NUMERIC(15, 2) NOT NULL,
+        Description VARCHAR(500),
+        TransactionDate DATE NOT NULL,
+        TransactionTime TIME,
+        PaymentMethod VARCHAR(50),
+        PaymentMethodNorm VARCHAR(50),
+        Location VARCHAR(255),
+        LocationNorm VARCHAR(255),
+        Notes VARCHAR(500),
+        CreatedBy VARCHAR(20),
+        CreatedAt DATETIME,
+        UpdatedAt DATETIME,
+        ExternalID VARCHAR(64),
+        DedupKey VARCHAR(40)
+    )""",
+    """CREATE TABLE TransactionSearchTokens (
+        UserID CHAR(32) NOT NULL,
+        Token VARCHAR(64) NOT NULL,
+        TransactionID CHAR(32) NOT NULL REFERENCES Transactions(TransactionID) ON DELETE CASCADE,
+        PRIMARY KEY (UserID, Token, TransactionID)
+    )""",
+]
+
+CATEGORY_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON"))
+    with engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+    # Danh mục, cảnh báo và thông báo không thuộc phạm vi của các test này
+    monkeypatch.setattr(
+        transaction_crud, "resolve_user_category_ids", lambda db, user_id, keys: {key: CATEGORY_ID for key in keys}
+    )
+    monkeypatch.setattr(transaction_crud, "_transactions_written", lambda db, user_id, changes: None)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _data(description):
+    return {
+        "transaction_type": "expense",
+        "amount": "50000",
+        "description": description,
+        "transaction_date": date(2026, 10, 1).isoformat(),
+        "category_display_name": "Ăn uống",
+    }
+
+
+def _apply(db, user_id, *operations):
+    return transaction_crud.apply_transaction_batch(
+        db, user_id, [TransactionBatchOperation(**operation) for operation in operations]
+    )
+
+
+def _rows(db):
+    return db.execute(text("SELECT TransactionID, UserID, Description FROM Transactions")).all()
+
+
+def test_delete_then_create_same_id_replaces_row(db):
+    user_id, transaction_id = uuid.uuid4(), uuid.uuid4()
+    _apply(db, user_id, {"op": "create", "transaction_id": transaction_id, "data": _data("bún chả")})
+
+    result = _apply(
+        db, user_id,
+        {"op": "delete", "transaction_id": transaction_id},
+        {"op": "create", "transaction_id": transaction_id, "data": _data("phở bò")},
+        {"op": "update", "transaction_id": transaction_id, "data": {"notes": "ăn sáng"}},
+    )
+
+    assert result["committed"] and result["failed"] == 0
+    assert [row.Description for row in _rows(db)] == ["phở bò"]
+    tokens = {row.Token for row in db.execute(text("SELECT Token FROM TransactionSearchTokens"))}
+    assert "bun" not in tokens and {"pho", "an"} <= tokens
+
+
+def test_create_with_id_of_another_user_fails_only_that_item(db):
+    owner, other, transaction_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    _apply(db, owner, {"op": "create", "transaction_id": transaction_id, "data": _data("bún chả")})
+
+    result = _apply(
+        db, other,
+        {"op": "create", "transaction_id": transaction_id, "data": _data("phở bò")},
+        {"op": "create", "data": _data("cơm tấm")},
+    )
+
+    assert result["committed"]
+    assert [item["status"] for item in result["results"]] == ["error", "ok"]
+    assert result["results"][0]["error"] == "Giao dịch đã tồn tại"
+    rows = {row.Description: row.UserID for row in _rows(db)}
+    assert rows == {"bún chả": owner.hex, "cơm tấm": other.hex}
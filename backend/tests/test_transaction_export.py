@@ -0,0 +1,102 @@
+# tests/test_transaction_export.py
+"""query_transactions_for_export trên SQLite: giao dịch thuộc danh mục tự tạo
+(UserCategories.CategoryID NULL) vẫn có trong file export, như ở trang danh sách."""
+import uuid
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pyodbc")  # app.database tạo engine mssql+pyodbc lúc import
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from crud.transaction_crud import query_transactions_for_export
+from schemas.transaction_schema import TransactionFilter
+
+_SCHEMA = [
+    """CREATE TABLE Categories (
+        CategoryID CHAR(32) PRIMARY KEY,
+        CategoryName VARCHAR(100) NOT NULL,
+        CategoryNameNorm VARCHAR(100),
+        CategoryType VARCHAR(50) NOT NULL
+    )""",
+    """CREATE TABLE UserCategories (
+        UserCategoryID CHAR(32) PRIMARY KEY,
+        UserID CHAR(32) NOT NULL,
+        CategoryID CHAR(32),
+        CustomName VARCHAR(100),
+        CustomNameNorm VARCHAR(100),
+        CategoryType VARCHAR(50) NOT NULL
+    )""",
+    """CREATE TABLE Transactions (
+        TransactionID CHAR(32) PRIMARY KEY,
+        UserID CHAR(32) NOT NULL,
+        UserCategoryID CHAR(32) NOT NULL,
+        TransactionType VARCHAR(20) NOT NULL,
+        Amount NUMERIC(15, 2) NOT NULL,
+        Description VARCHAR(500),
+        TransactionDate DATE NOT NULL,
+        TransactionTime TIME,
+        PaymentMethod VARCHAR(50),
+        PaymentMethodNorm VARCHAR(50),
+        Location VARCHAR(255),
+        LocationNorm VARCHAR(255),
+        Notes VARCHAR(500),
+        CreatedBy VARCHAR(20),
+        CreatedAt DATETIME
+    )""",
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _add_user_category(db, user_id, name, category_id=None, custom_name=None):
+    user_category_id = uuid.uuid4()
+    if category_id is None and custom_name is None:
+        category_id = uuid.uuid4()
+        db.execute(
+            text("INSERT INTO Categories (CategoryID, CategoryName, CategoryType) VALUES (:id, :name, 'expense')"),
+            {"id": category_id.hex, "name": name},
+        )
+    db.execute(
+        text("""INSERT INTO UserCategories (UserCategoryID, UserID, CategoryID, CustomName, CategoryType)
+                VALUES (:id, :user_id, :category_id, :custom_name, 'expense')"""),
+        {
+            "id": user_category_id.hex,
+            "user_id": user_id.hex,
+            "category_id": category_id.hex if category_id else None,
+            "custom_name": custom_name,
+        },
+    )
+    return user_category_id
+
+
+def _add_transaction(db, user_id, user_category_id, day):
+    db.execute(
+        text("""INSERT INTO Transactions (TransactionID, UserID, UserCategoryID, TransactionType, Amount, TransactionDate)
+                VALUES (:id, :user_id, :user_category_id, 'expense', 50000, :day)"""),
+        {"id": uuid.uuid4().hex, "user_id": user_id.hex, "user_category_id": user_category_id.hex, "day": day},
+    )
+
+
+def test_export_includes_custom_categories(db):
+    user_id = uuid.uuid4()
+    system = _add_user_category(db, user_id, "Ăn uống")
+    custom = _add_user_category(db, user_id, None, custom_name="Cà phê sáng")
+    _add_transaction(db, user_id, system, date(2026, 10, 1))
+    _add_transaction(db, user_id, custom, date(2026, 10, 2))
+
+    rows = query_transactions_for_export(db, user_id, TransactionFilter()).all()
+
+    assert [row.category_display_name for row in rows] == ["Ăn uống", "Cà phê sáng"]
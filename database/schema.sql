@@ -371,4 +371,235 @@ CREATE TABLE ChatbotTrainingData (
     Timestamp DATETIME2 DEFAULT GETDATE()
 );
 
-CREATE INDEX IX_ChatbotTrainingData_User ON ChatbotTrainingData(UserID);
\ No newline at end of file
+CREATE INDEX IX_ChatbotTrainingData_User ON ChatbotTrainingData(UserID);
+
+-- Import giao dịch hàng loạt: nguồn 'imported' và ExternalID để upload lại không bị trùng (19/10/26)
+-- ===================================================================
+DECLARE @CreatedByCheck SYSNAME = (
+    SELECT name FROM sys.check_constraints
+    WHERE parent_object_id = OBJECT_ID('Transactions') AND definition LIKE '%CreatedBy%'
+);
+IF @CreatedByCheck IS NOT NULL
+    EXEC('ALTER TABLE Transactions DROP CONSTRAINT ' + @CreatedByCheck);
+ALTER TABLE Transactions ADD CONSTRAINT CK_Transactions_CreatedBy
+    CHECK (CreatedBy IN ('manual', 'chatbot', 'imported'));
+
+ALTER TABLE Transactions ADD ExternalID NVARCHAR(64) NULL;
+GO
+
+CREATE UNIQUE INDEX UX_Transactions_User_ExternalID
+    ON Transactions(UserID, ExternalID) WHERE ExternalID IS NOT NULL;
+
+
+-- Phát hiện giao dịch trùng: DedupKey = sha1(số tiền|ngày|mô tả chuẩn hoá) (19/10/26)
+-- Dữ liệu cũ: chạy python -m app.jobs.backfill_dedup_keys để tính khoá
+-- ===================================================================
+ALTER TABLE Transactions ADD DedupKey CHAR(40) NULL;
+GO
+
+CREATE INDEX IX_Transactions_User_DedupKey
+    ON Transactions(UserID, DedupKey) INCLUDE (TransactionID, CreatedBy)
+    WHERE DedupKey IS NOT NULL;
+
+
+-- Tìm kiếm giao dịch: chỉ mục đảo (token đã bỏ dấu) của Description/Notes/Location (19/10/26)
+-- Dữ liệu cũ: chạy python -m app.jobs.rebuild_search_index để tạo token
+-- ===================================================================
+CREATE TABLE TransactionSearchTokens (
+    UserID UNIQUEIDENTIFIER NOT NULL,
+    Token NVARCHAR(64) NOT NULL,
+    TransactionID UNIQUEIDENTIFIER NOT NULL
+        FOREIGN KEY REFERENCES Transactions(TransactionID) ON DELETE CASCADE,
+    CONSTRAINT PK_TransactionSearchTokens PRIMARY KEY (UserID, Token, TransactionID)
+);
+
+CREATE INDEX IX_TransactionSearchTokens_Transaction ON TransactionSearchTokens(TransactionID);
+
+
+-- Cột chuẩn hoá (bỏ dấu, chữ thường) cho lọc/tra tên không phân biệt dấu (19/10/26)
+-- Dữ liệu cũ: chạy python -m app.jobs.backfill_normalized_columns để tính giá trị
+-- ===================================================================
+ALTER TABLE Transactions ADD
+    PaymentMethodNorm NVARCHAR(50) NULL,
+    LocationNorm VARCHAR(255) NULL;
+ALTER TABLE Categories ADD CategoryNameNorm NVARCHAR(100) NULL;
+ALTER TABLE UserCategories ADD CustomNameNorm NVARCHAR(100) NULL;
+GO
+
+CREATE INDEX IX_Transactions_User_PaymentMethodNorm ON Transactions(UserID, PaymentMethodNorm);
+CREATE INDEX IX_Transactions_User_LocationNorm ON Transactions(UserID, LocationNorm);
+CREATE INDEX IX_Categories_NameNorm ON Categories(CategoryNameNorm, CategoryType) INCLUDE (IsActive);
+CREATE INDEX IX_UserCategories_User_CustomNameNorm
+    ON UserCategories(UserID, CustomNameNorm) INCLUDE (CategoryID, CategoryType, IsActive);
+
+
+-- Tổng hợp giao dịch theo ngày/danh mục, giữ đúng bằng trigger; báo cáo đọc bảng này (19/10/26)
+-- Dữ liệu cũ: chạy python -m app.jobs.rebuild_daily_totals để tính lại toàn bộ
+-- ===================================================================
+CREATE TABLE DailyCategoryTotals (
+    UserID UNIQUEIDENTIFIER NOT NULL REFERENCES Users(UserID) ON DELETE CASCADE,
+    TransactionDate DATE NOT NULL,
+    UserCategoryID UNIQUEIDENTIFIER NOT NULL,
+    TransactionType NVARCHAR(20) NOT NULL,
+    TotalAmount DECIMAL(18,2) NOT NULL,
+    TransactionCount INT NOT NULL,
+    CONSTRAINT PK_DailyCategoryTotals PRIMARY KEY (UserID, TransactionDate, UserCategoryID, TransactionType)
+);
+
+CREATE INDEX IX_DailyCategoryTotals_User_Category
+    ON DailyCategoryTotals(UserID, UserCategoryID, TransactionType) INCLUDE (TotalAmount);
+GO
+
+-- Chênh lệch = inserted - deleted theo (user, ngày, danh mục, loại): một thao tác
+-- ghi chỉ chạm vài dòng tổng hợp, dòng về 0 giao dịch thì bị xoá
+CREATE TRIGGER TR_Transactions_DailyTotals ON Transactions AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    -- UPDATE chỉ đổi cột khác (vd. UpdatedAt từ TR_Transactions_UpdatedAt) không làm đổi tổng
+    IF EXISTS (SELECT 1 FROM inserted) AND EXISTS (SELECT 1 FROM deleted)
+        AND NOT (UPDATE(UserID) OR UPDATE(UserCategoryID) OR UPDATE(TransactionType)
+                 OR UPDATE(Amount) OR UPDATE(TransactionDate))
+        RETURN;
+
+    WITH Changes AS (
+        SELECT UserID, TransactionDate, UserCategoryID, TransactionType, Amount, 1 AS Delta FROM inserted
+        UNION ALL
+        SELECT UserID, TransactionDate, UserCategoryID, TransactionType, -Amount, -1 FROM deleted
+    ), Net AS (
+        SELECT UserID, TransactionDate, UserCategoryID, TransactionType,
+               SUM(Amount) AS Amount, SUM(Delta) AS Delta
+        FROM Changes
+        GROUP BY UserID, TransactionDate, UserCategoryID, TransactionType
+        HAVING SUM(Amount) <> 0 OR SUM(Delta) <> 0
+    )
+    MERGE DailyCategoryTotals WITH (HOLDLOCK) AS d
+    USING Net AS n
+        ON d.UserID = n.UserID AND d.TransactionDate = n.TransactionDate
+        AND d.UserCategoryID = n.UserCategoryID AND d.TransactionType = n.TransactionType
+    WHEN MATCHED AND d.TransactionCount + n.Delta <= 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET
+        TotalAmount = d.TotalAmount + n.Amount,
+        TransactionCount = d.TransactionCount + n.Delta
+    WHEN NOT MATCHED AND n.Delta > 0 THEN
+        INSERT (UserID, TransactionDate, UserCategoryID, TransactionType, TotalAmount, TransactionCount)
+        VALUES (n.UserID, n.TransactionDate, n.UserCategoryID, n.TransactionType, n.Amount, n.Delta);
+END;
+GO
+
+ALTER PROCEDURE GetUserFinancialOverview
+    @UserID UNIQUEIDENTIFIER,
+    @StartDate DATE = NULL,
+    @EndDate DATE = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    IF @StartDate IS NULL SET @StartDate = DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1);
+    IF @EndDate IS NULL SET @EndDate = EOMONTH(GETDATE());
+    SELECT 
+        SUM(CASE WHEN TransactionType = 'income' THEN TotalAmount ELSE 0 END) as TotalIncome,
+        SUM(CASE WHEN TransactionType = 'expense' THEN TotalAmount ELSE 0 END) as TotalExpense,
+        SUM(CASE WHEN TransactionType = 'income' THEN TotalAmount ELSE -TotalAmount END) as NetAmount,
+        SUM(TransactionCount) as TotalTransactions
+    FROM DailyCategoryTotals
+    WHERE UserID = @UserID 
+    AND TransactionDate BETWEEN @StartDate AND @EndDate;
+END;
+GO
+
+
+-- Chốt số liệu theo tháng: tháng đã đóng đọc MonthlyCategoryTotals thay cho từng ngày (19/10/26)
+-- Chạy định kỳ (hằng đêm) python -m app.jobs.close_periods để chốt tháng mới đóng / tháng bị sửa muộn
+-- ===================================================================
+CREATE TABLE PeriodSnapshots (
+    UserID UNIQUEIDENTIFIER NOT NULL REFERENCES Users(UserID) ON DELETE CASCADE,
+    PeriodMonth DATE NOT NULL,
+    ClosedAt DATETIME2 DEFAULT GETDATE(),
+    CONSTRAINT PK_PeriodSnapshots PRIMARY KEY (UserID, PeriodMonth)
+);
+
+CREATE TABLE MonthlyCategoryTotals (
+    UserID UNIQUEIDENTIFIER NOT NULL,
+    PeriodMonth DATE NOT NULL,
+    UserCategoryID UNIQUEIDENTIFIER NOT NULL,
+    TransactionType NVARCHAR(20) NOT NULL,
+    TotalAmount DECIMAL(18,2) NOT NULL,
+    TransactionCount INT NOT NULL,
+    CONSTRAINT PK_MonthlyCategoryTotals PRIMARY KEY (UserID, PeriodMonth, UserCategoryID, TransactionType),
+    CONSTRAINT FK_MonthlyCategoryTotals_Snapshot FOREIGN KEY (UserID, PeriodMonth)
+        REFERENCES PeriodSnapshots(UserID, PeriodMonth) ON DELETE CASCADE
+);
+GO
+
+-- Sửa muộn một tháng đã chốt: chỉ bỏ snapshot của đúng (user, tháng) đó
+CREATE TRIGGER TR_DailyCategoryTotals_InvalidateSnapshot ON DailyCategoryTotals AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    DELETE s FROM PeriodSnapshots s
+    JOIN (
+        SELECT UserID, DATEFROMPARTS(YEAR(TransactionDate), MONTH(TransactionDate), 1) AS PeriodMonth FROM inserted
+        UNION
+        SELECT UserID, DATEFROMPARTS(YEAR(TransactionDate), MONTH(TransactionDate), 1) FROM deleted
+    ) c ON c.UserID = s.UserID AND c.PeriodMonth = s.PeriodMonth;
+END;
+GO
+
+
+-- Cảnh báo ngân sách sinh khi ghi giao dịch, chống trùng theo kỳ; dashboard đọc cảnh báo chưa đọc (19/10/26)
+-- ===================================================================
+ALTER TABLE BudgetAlerts ADD PeriodStart DATE NULL;
+GO
+
+CREATE UNIQUE INDEX UX_BudgetAlerts_Dedup
+    ON BudgetAlerts(BudgetID, BudgetCategoryID, AlertType, PeriodStart);
+CREATE INDEX IX_BudgetAlerts_User_Unread
+    ON BudgetAlerts(UserID, IsRead, CreatedAt DESC) INCLUDE (BudgetID, AlertType);
+
+
+-- Rollover ngân sách: chốt kỳ đã hết và tạo kỳ kế tiếp kèm BudgetCategories (19/10/26)
+-- Chạy định kỳ (hằng đêm) python -m app.jobs.rollover_budgets
+-- ===================================================================
+ALTER TABLE Budgets ADD PreviousBudgetID UNIQUEIDENTIFIER NULL;
+GO
+
+-- Mỗi ngân sách chỉ có một kỳ kế tiếp: chạy lại/chạy song song không tạo trùng
+CREATE UNIQUE INDEX UX_Budgets_PreviousBudgetID
+    ON Budgets(PreviousBudgetID) WHERE PreviousBudgetID IS NOT NULL;
+-- Job chỉ quét ngân sách đang hoạt động theo ngày hết kỳ
+CREATE INDEX IX_Budgets_Active_PeriodEnd
+    ON Budgets(PeriodEnd) INCLUDE (UserID, BudgetType, PeriodStart, AutoAdjust) WHERE IsActive = 1;
+
+
+-- Giao dịch định kỳ: định nghĩa và nguồn 'recurring' cho giao dịch được tạo tự động (19/10/26)
+-- Chạy hằng ngày python -m app.jobs.materialize_recurring
+-- ===================================================================
+ALTER TABLE Transactions DROP CONSTRAINT CK_Transactions_CreatedBy;
+ALTER TABLE Transactions ADD CONSTRAINT CK_Transactions_CreatedBy
+    CHECK (CreatedBy IN ('manual', 'chatbot', 'imported', 'recurring'));
+
+CREATE TABLE RecurringTransactions (
+    RecurringID UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
+    UserID UNIQUEIDENTIFIER NOT NULL REFERENCES Users(UserID),
+    UserCategoryID UNIQUEIDENTIFIER NOT NULL REFERENCES UserCategories(UserCategoryID) ON DELETE CASCADE,
+    TransactionType NVARCHAR(20) NOT NULL CHECK (TransactionType IN ('income', 'expense')),
+    Amount DECIMAL(15,2) NOT NULL CHECK (Amount > 0),
+    Description NVARCHAR(500),
+    PaymentMethod NVARCHAR(50),
+    Location NVARCHAR(255),
+    Notes NVARCHAR(500),
+    Frequency NVARCHAR(20) NOT NULL CHECK (Frequency IN ('daily', 'weekly', 'monthly', 'yearly')),
+    IntervalCount INT NOT NULL DEFAULT 1 CHECK (IntervalCount >= 1),
+    StartDate DATE NOT NULL,
+    EndDate DATE NULL,
+    NextRunDate DATE NOT NULL,
+    LastRunDate DATE NULL,
+    IsActive BIT DEFAULT 1,
+    CreatedAt DATETIME2 DEFAULT GETDATE(),
+    UpdatedAt DATETIME2 DEFAULT GETDATE(),
+    CONSTRAINT CK_RecurringTransactions_Dates CHECK (EndDate IS NULL OR EndDate >= StartDate)
+);
+GO
+
+-- Job quét các định nghĩa đến hạn; trang danh sách theo user
+CREATE INDEX IX_RecurringTransactions_Due
+    ON RecurringTransactions(NextRunDate, RecurringID) WHERE IsActive = 1;
+CREATE INDEX IX_RecurringTransactions_UserID ON RecurringTransactions(UserID);